@@ -12,6 +12,13 @@ import json
 import math
 from collections import Counter, defaultdict
 import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from catalog import default_catalog
+from fingerprint import level_fingerprint
+from residue_tables import residue_set
 
 
 # ============================================================
@@ -54,8 +61,10 @@ def load_residues_9699690():
         return residues
     
     except FileNotFoundError:
-        print("❌ Fichier non trouvé : analysis_mod9699690_COMPLETE.json")
-        return None
+        print("⚠️ Fichier non trouvé, dérivation via la loi (p-2)")
+        residues = residue_set("sg", 8)
+        print(f"✓ {len(residues):,} résidus dérivés")
+        return set(residues)
 
 
 # ============================================================
@@ -309,7 +318,10 @@ def save_results(collision_residues, stats):
     with open(filename, 'w') as f:
         json.dump(data, f, indent=2)
     
-    print(f"\n✓ Résultats sauvegardés : {filename}")
+    default_catalog().record_analysis("collisions", "sg", MOD_PREV, data, params={"prime": P},
+                                      fingerprint=level_fingerprint("sg", 8))
+    
+    print(f"\n✓ Résultats sauvegardés : {filename} (+ catalogue)")
 
 
 # ============================================================
@@ -319,6 +331,17 @@ def save_results(collision_residues, stats):
 def main():
     """Script principal."""
     
+    # Résultat déjà au catalogue : pas de recalcul (sauf --force)
+    stored = default_catalog().analysis("collisions", "sg", MOD_PREV, {"prime": P},
+                                        fingerprint=level_fingerprint("sg", 8))
+    if stored is not None and "--force" not in sys.argv:
+        print(f"✓ Résultats lus dans le catalogue ({default_catalog().path})")
+        print(f"  Résidus analysés : {stored['total_residues']:,}")
+        print(f"  Collisions       : {stored['collision_residues_count']:,}")
+        print(f"  Anomalie publiée : {stored['expected_anomaly']:,}")
+        print(f"  (--force pour recalculer)")
+        return
+    
     # Chargement
     residues = load_residues_9699690()
     
@@ -327,7 +350,9 @@ def main():
         return
     
     # Analyse collisions
-    collision_residues, normal_residues = analyze_collisions(residues)
+    with default_catalog().timed("p23_collisions", modulus=MOD_PREV) as run:
+        collision_residues, normal_residues = analyze_collisions(residues)
+        run["items"] = len(residues)
     
     # Statistiques
     stats = analyze_statistics(collision_residues, normal_residues)
@@ -12,6 +12,14 @@ import json
 from datetime import datetime
 from collections import defaultdict, Counter
 import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from catalog import default_catalog
+from fingerprint import level_fingerprint
+from residue_set import ResidueSet
+from residue_tables import residue_count, residue_set
 
 
 # ============================================================
@@ -22,6 +30,11 @@ MOD_PREV = 223092870
 P_NEW = 29
 MOD_NEW = MOD_PREV * P_NEW  # 6,469,693,230
 
+# Référence publiée pour p=23 (sur les données d'origine) ; le catalogue
+# donne en plus la valeur exacte recalculée sur les tables complètes
+EPSILON_23 = 0.0435
+NON_UNIFORM_23 = 4.35  # Pourcentage
+
 print("="*90)
 print("TEST p=29 : CALCUL DE ε(29)")
 print("="*90)
@@ -95,8 +108,10 @@ def load_residues_9699690():
         return residues
     
     except FileNotFoundError:
-        print(f"  ✗ Fichier non trouvé : analysis_mod9699690_COMPLETE.json")
-        return None
+        print(f"  ⚠ Fichier non trouvé, dérivation via la loi (p-2)")
+        residues = residue_set("sg", 8)
+        print(f"  ✓ {len(residues):,} résidus mod 9699690 dérivés")
+        return set(residues)
 
 
 # ============================================================
@@ -277,26 +292,62 @@ def analyze_uniformity(residues_new, residues_prev):
 # COMPARAISON AVEC p=23
 # ============================================================
 
-def compare_with_p23():
-    """Compare les résultats avec p=23."""
+def load_p23_reference():
+    """
+    ε(23) et non-uniformité du passage mod 9699690 → mod 223092870.
+
+    Lus dans le catalogue ; calculés une fois sur les tables complètes
+    (multiplicités exactes de chaque parent) s'ils n'y sont pas encore.
+    Le résultat est lié à l'empreinte du niveau 9 : une table modifiée
+    est recalculée.
+    """
+    
+    def compute():
+        child = ResidueSet.from_level("sg", 9)
+        residues_prev = residue_count("sg", 8)
+        _, counts = child.project_counts(9699690)
+        distribution = Counter(counts.tolist())
+        distribution[0] = residues_prev - len(counts)  # Parents sans extension
+        return {
+            "residues_prev": residues_prev,
+            "observed": len(child),
+            "ratio": len(child) / residues_prev,
+            "epsilon": len(child) / residues_prev - 21,
+            "non_uniform_pct": 100 * (1 - distribution[21] / residues_prev),
+            "distribution": {str(k): v for k, v in sorted(distribution.items()) if v},
+        }
+    
+    return default_catalog().cached("extension", "sg", 223092870, compute, params={"prime": 23},
+                                    fingerprint=level_fingerprint("sg", 9))
+
+
+def compare_with_p23(stats_dist=None, stats_unif=None):
+    """Compare les résultats avec p=23 (valeurs du catalogue)."""
     
     print("\n" + "="*90)
     print("COMPARAISON p=23 vs p=29")
     print("="*90)
     
-    # Données p=23
-    epsilon_23 = 0.0435
-    non_uniform_23 = 4.35  # Pourcentage
+    ref = load_p23_reference()
     
     print(f"\np=23 :")
-    print(f"  ε(23)           : +{epsilon_23:.4f}")
-    print(f"  Non-uniformité  : {non_uniform_23:.2f}%")
-    print(f"  Ratio           : 21.0435")
+    print(f"  ε(23)           : {EPSILON_23:+.4f} (publié)   {ref['epsilon']:+.4f} (tables complètes)")
+    print(f"  Non-uniformité  : {NON_UNIFORM_23:.2f}% (publié)   {ref['non_uniform_pct']:.2f}% (tables complètes)")
+    print(f"  Ratio           : {ref['ratio']:.4f}")
     
     print(f"\np=29 :")
-    print(f"  ε(29)           : [À CALCULER]")
-    print(f"  Non-uniformité  : [À CALCULER]")
-    print(f"  Ratio           : [À CALCULER]")
+    if stats_dist is None:
+        print(f"  ε(29)           : [À CALCULER]")
+        print(f"  Non-uniformité  : [À CALCULER]")
+        print(f"  Ratio           : [À CALCULER]")
+        return
+    
+    print(f"  ε(29)           : {stats_dist['epsilon']:+.4f}")
+    distribution = (stats_unif or {}).get("distribution")
+    if distribution:
+        uniform = distribution.get(P_NEW - 2, distribution.get(str(P_NEW - 2), 0))
+        print(f"  Non-uniformité  : {100 * (1 - uniform / sum(distribution.values())):.2f}% (échantillon)")
+    print(f"  Ratio           : {stats_dist['ratio']:.4f}")
 
 
 # ============================================================
@@ -304,7 +355,9 @@ def compare_with_p23():
 # ============================================================
 
 def save_results(stats_dist, stats_unif):
-    """Sauvegarde les résultats."""
+    """Sauvegarde les résultats (JSON et catalogue)."""
+    
+    residues_prev = stats_dist["predicted"] // (P_NEW - 2)
     
     data = {
         "timestamp": datetime.now().isoformat(),
@@ -312,7 +365,7 @@ def save_results(stats_dist, stats_unif):
         "modulus_previous": MOD_PREV,
         "prime_factor": P_NEW,
         "summary": {
-            "residues_prev": 7968646,  # Approximatif si non exact
+            "residues_prev": residues_prev,
             "residues_observed": stats_dist["observed"],
             "residues_predicted": stats_dist["predicted"],
             "ratio": stats_dist["ratio"],
@@ -330,7 +383,12 @@ def save_results(stats_dist, stats_unif):
     with open(filename, 'w') as f:
         json.dump(data, f, indent=2)
     
-    print(f"\n✓ Résultats sauvegardés : {filename}")
+    default_catalog().record_analysis(
+        "extension", "sg", MOD_NEW,
+        {"residues_prev": residues_prev, "distribution": stats_dist, "uniformity": stats_unif},
+        params={"prime": P_NEW}, fingerprint=level_fingerprint("sg", 9))
+    
+    print(f"\n✓ Résultats sauvegardés : {filename} (+ catalogue)")
 
 
 # ============================================================
@@ -341,6 +399,18 @@ def main():
     """Script principal."""
     
     start_total = time.time()
+    catalog = default_catalog()
+    
+    # Résultat déjà au catalogue : pas de recalcul (sauf --force)
+    stored = catalog.analysis("extension", "sg", MOD_NEW, {"prime": P_NEW},
+                              fingerprint=level_fingerprint("sg", 9))
+    if stored is not None and "--force" not in sys.argv:
+        stats_dist, stats_unif = stored["distribution"], stored["uniformity"]
+        print(f"✓ Résultats mod {MOD_NEW:,} lus dans le catalogue ({catalog.path})")
+        print(f"  Résidus : {stats_dist['observed']:,}   ε({P_NEW}) : {stats_dist['epsilon']:+.6f}")
+        print(f"  (--force pour recalculer)")
+        compare_with_p23(stats_dist, stats_unif)
+        return
     
     # Chargement
     print("="*90)
@@ -361,7 +431,9 @@ def main():
     print("ÉTAPE 2 : GÉNÉRATION MOD 6469693230 (p=29)")
     print("="*90)
     
-    residues_new = generate_via_crt(residues_prev, MOD_PREV, P_NEW, MOD_NEW)
+    with catalog.timed("p29_crt_generation", modulus=MOD_NEW) as run:
+        residues_new = generate_via_crt(residues_prev, MOD_PREV, P_NEW, MOD_NEW)
+        run["items"] = len(residues_new)
     
     print(f"\n✓ {len(residues_new):,} résidus générés")
     
@@ -372,7 +444,7 @@ def main():
     stats_unif = analyze_uniformity(residues_new, residues_prev)
     
     # Comparaison
-    compare_with_p23()
+    compare_with_p23(stats_dist, stats_unif)
     
     # Sauvegarde
     print("\n" + "="*90)
@@ -418,14 +490,16 @@ def main():
     
     # Tendance
     if abs(stats_dist['epsilon']) > 0.001:
-        epsilon_23 = 0.0435
+        epsilon_23 = load_p23_reference()["epsilon"]
         epsilon_29 = stats_dist['epsilon']
         
         print(f"\nTendance :")
         print(f"  ε(23) = {epsilon_23:+.4f}")
         print(f"  ε(29) = {epsilon_29:+.4f}")
         
-        if abs(epsilon_29) > abs(epsilon_23):
+        if epsilon_23 == 0:
+            print(f"  → Anomalie propre à p=29 (ε(23) = 0)")
+        elif abs(epsilon_29) > abs(epsilon_23):
             print(f"  → Amplification : ×{abs(epsilon_29/epsilon_23):.2f}")
         elif abs(epsilon_29) < abs(epsilon_23):
             print(f"  → Atténuation : ×{abs(epsilon_29/epsilon_23):.2f}")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Filtre d'admissibilité factorisé (sans table)
+=============================================
+
+Un entier n est admissible au niveau k s'il appartient à la table de
+résidus mod P_k. Par le CRT, c'est équivalent à vérifier séparément
+chaque premier p du niveau :
+
+  SG   : n mod p ∉ {0, (p-1)/2}
+  safe : n mod p ∉ {0, 1}
+
+Coût : π(p_k) réductions modulaires, aucune table matérialisée. Le test
+reste exact à P_15 = 614,889,782,588,491,410 et au-delà.
+
+Comme les tables, le filtre suppose n > p_k : un petit premier du
+niveau est lui-même rejeté car divisible par p.
+"""
+
+from functools import lru_cache
+
+from residue_tables import PRIMES, forbidden_residues
+
+try:
+    import numpy as np
+except ImportError:  # Forme scalaire seulement
+    np = None
+
+
+@lru_cache(maxsize=None)
+def level_filters(kind, level):
+    """Couples (p, créneaux interdits) pour les premiers du niveau."""
+    if not 1 <= level <= len(PRIMES):
+        raise ValueError(f"Niveau {level} hors de [1, {len(PRIMES)}]")
+    return tuple((p, forbidden_residues(kind, p)) for p in PRIMES[:level])
+
+
+# ============================================================
+# FORME SCALAIRE
+# ============================================================
+
+def is_admissible(n, level, kind="safe"):
+    """Vrai si n mod P_level est un résidu `kind` (SG ou safe)."""
+    for p, forbidden in level_filters(kind, level):
+        if n % p in forbidden:
+            return False
+    return True
+
+
+# ============================================================
+# FORME VECTORISÉE (NumPy)
+# ============================================================
+
+def admissible_mask(values, level, kind="safe"):
+    """
+    Masque booléen d'admissibilité pour un tableau uint64.
+
+    Une réduction par premier du niveau, sans table ni boucle Python
+    sur les éléments.
+    """
+    if np is None:
+        raise ImportError("admissible_mask nécessite NumPy")
+    values = np.asarray(values, dtype=np.uint64)
+    mask = np.ones(values.shape, dtype=bool)
+    for p, forbidden in level_filters(kind, level):
+        r = values % np.uint64(p)
+        for f in forbidden:
+            mask &= r != np.uint64(f)
+    return mask
+
+
+def filter_admissible(values, level, kind="safe"):
+    """Sous-tableau des valeurs admissibles (ordre conservé)."""
+    mask = admissible_mask(values, level, kind)
+    return np.asarray(values, dtype=np.uint64)[mask]
+
+
+if __name__ == "__main__":
+    import time
+
+    from residue_tables import primorial
+
+    level = 15
+    start = 8_000_000_000_000_000
+    n = 1_000_000
+
+    print(f"Filtre au niveau {level} (P_{level} = {primorial(level):,})")
+
+    t0 = time.time()
+    kept = sum(1 for x in range(start | 1, start + 2 * n, 2) if is_admissible(x, level))
+    t_scalar = time.time() - t0
+    print(f"  Scalaire   : {kept:,}/{n:,} admissibles en {t_scalar:.3f}s")
+
+    if np is not None:
+        candidates = np.arange(start | 1, start + 2 * n, 2, dtype=np.uint64)
+        t0 = time.time()
+        kept_vec = int(admissible_mask(candidates, level).sum())
+        t_vec = time.time() - t0
+        print(f"  Vectorisé  : {kept_vec:,}/{n:,} admissibles en {t_vec:.3f}s")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+API asyncio pour les tests de safe primes
+=========================================
+
+Les appels bloquants (Miller-Rabin, recherche par roue) sont envoyés par
+lots à un ProcessPoolExecutor partagé ; la boucle d'événements n'est
+jamais bloquée.
+
+    ok = await is_safe_prime_async(n)
+    flags = await batch_test(ns)
+    async for p in safe_primes_from(start):
+        ...
+
+La concurrence (lots simultanés) est bornée par un sémaphore configurable.
+L'annulation d'une coroutine annule les lots qui n'ont pas encore démarré.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from generate_safe_primes_validator import is_safe_prime
+from safe_prime_pipeline import WHEEL_MODULUS, search_block, small_safe_primes
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+DEFAULT_BATCH_SIZE = 256
+
+# Tours de roue 2310 par lot de recherche
+DEFAULT_BLOCK_TURNS = 64
+
+# Lots de recherche lancés en avance par safe_primes_from
+DEFAULT_PREFETCH = 4
+
+
+# ============================================================
+# EXÉCUTEUR PARTAGÉ
+# ============================================================
+
+_executor = None
+_max_workers = None
+_max_concurrency = None
+_semaphores = {}
+
+
+def configure(max_workers=None, max_concurrency=None):
+    """
+    Configure le pool partagé (à appeler avant la première requête).
+
+    max_concurrency borne le nombre de lots en vol, toutes requêtes
+    confondues (par défaut : 2 × max_workers).
+    """
+    global _max_workers, _max_concurrency
+    shutdown()
+    _max_workers = max_workers
+    _max_concurrency = max_concurrency
+
+
+def get_executor():
+    """Retourne le ProcessPoolExecutor partagé (créé à la demande)."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=_max_workers)
+    return _executor
+
+
+def shutdown(wait=True):
+    """Arrête le pool partagé et annule les lots en attente."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait, cancel_futures=True)
+        _executor = None
+    _semaphores.clear()
+
+
+def _semaphore():
+    """Sémaphore de concurrence propre à la boucle courante."""
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        limit = _max_concurrency or 2 * (_max_workers or os.cpu_count() or 1)
+        sem = _semaphores[loop] = asyncio.Semaphore(limit)
+    return sem
+
+
+async def _run(func, *args):
+    """Exécute func(*args) dans le pool, sous le sémaphore."""
+    async with _semaphore():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), func, *args)
+
+
+# ============================================================
+# FONCTIONS EXÉCUTÉES DANS LE POOL
+# ============================================================
+
+def _safe_prime_flags(ns):
+    return [is_safe_prime(n) for n in ns]
+
+
+# ============================================================
+# API ASYNCHRONE
+# ============================================================
+
+async def is_safe_prime_async(n):
+    """Version non bloquante de is_safe_prime."""
+    return await _run(is_safe_prime, n)
+
+
+async def batch_test(ns, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Teste une liste d'entiers par lots ; retourne les drapeaux dans l'ordre.
+
+    En cas d'annulation, les lots non démarrés sont annulés.
+    """
+    ns = list(ns)
+    tasks = [
+        asyncio.ensure_future(_run(_safe_prime_flags, ns[i:i + batch_size]))
+        for i in range(0, len(ns), batch_size)
+    ]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return [flag for batch in results for flag in batch]
+
+
+async def safe_primes_from(start, level=8, block_turns=DEFAULT_BLOCK_TURNS,
+                           prefetch=DEFAULT_PREFETCH):
+    """
+    Générateur asynchrone infini des safe primes ≥ start, dans l'ordre.
+
+    `prefetch` blocs de roue sont recherchés en avance dans le pool ;
+    fermer le générateur (break, aclose, annulation) annule les blocs
+    en vol.
+    """
+    base = (start // WHEEL_MODULUS) * WHEEL_MODULUS
+    step = block_turns * WHEEL_MODULUS
+    in_flight = []
+
+    def launch():
+        nonlocal base
+        in_flight.append(asyncio.ensure_future(
+            _run(search_block, base, block_turns, level, start)))
+        base += step
+
+    try:
+        for _ in range(prefetch):
+            launch()
+        # 5, 7, 11, 23 : exclus par la roue, donc jamais dans les blocs
+        for p in small_safe_primes(start):
+            yield p
+        while True:
+            found = await in_flight.pop(0)
+            launch()
+            for p in found:
+                yield p
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    import time
+
+    async def demo():
+        start = 8_000_000_000_000_000
+
+        t0 = time.perf_counter()
+        primes = []
+        async for p in safe_primes_from(start):
+            primes.append(p)
+            if len(primes) >= 200:
+                break
+        print(f"✓ {len(primes)} safe primes ≥ {start:,} en {time.perf_counter() - t0:.3f}s")
+
+        # Requêtes concurrentes : la boucle reste réactive
+        t0 = time.perf_counter()
+        flags = await asyncio.gather(*(is_safe_prime_async(p) for p in primes[:50]))
+        print(f"✓ 50 requêtes concurrentes : {sum(flags)} safe primes "
+              f"en {time.perf_counter() - t0:.3f}s")
+
+        t0 = time.perf_counter()
+        flags = await batch_test(range(start, start + 100_000))
+        print(f"✓ batch_test sur 100,000 entiers : {sum(flags)} safe primes "
+              f"en {time.perf_counter() - t0:.3f}s")
+
+    try:
+        asyncio.run(demo())
+    finally:
+        shutdown()
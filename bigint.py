@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Arithmétique modulaire grands entiers : backend interchangeable
+===============================================================
+
+Miller-Rabin repose sur pow(a, d, n). Pour des opérandes de 1024 bits
+et plus, GMP est plusieurs fois plus rapide que le pow intégré.
+
+Deux backends, mêmes résultats :
+
+  gmpy2  : GMP via gmpy2 (optionnel, détecté à l'import)
+  python : pow intégré, toujours disponible
+
+Opérations : powmod, invert, strong_prp (un tour de Miller-Rabin en
+base a). Les résultats sont des int Python quel que soit le backend.
+
+Choix : variable d'environnement SG_BIGINT_BACKEND (« python » pour
+forcer le repli), sinon gmpy2 s'il est installé.
+"""
+
+import os
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+class PythonBackend:
+    """pow intégré."""
+
+    name = "python"
+
+    @staticmethod
+    def powmod(base, exponent, modulus):
+        return pow(base, exponent, modulus)
+
+    @staticmethod
+    def invert(a, modulus):
+        return pow(a, -1, modulus)
+
+    @staticmethod
+    def strong_prp(n, a):
+        """Vrai si n (impair > 3) est pseudo-premier fort en base a."""
+        r, d = 0, n - 1
+        while d % 2 == 0:
+            r += 1
+            d //= 2
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            return True
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                return True
+        return False
+
+
+class GmpyBackend:
+    """GMP via gmpy2 ; conversions en int aux frontières."""
+
+    name = "gmpy2"
+
+    @staticmethod
+    def powmod(base, exponent, modulus):
+        return int(gmpy2.powmod(base, exponent, modulus))
+
+    @staticmethod
+    def invert(a, modulus):
+        try:
+            return int(gmpy2.invert(a, modulus))
+        except ZeroDivisionError:
+            raise ValueError("base is not invertible for the given modulus") from None
+
+    @staticmethod
+    def strong_prp(n, a):
+        # gmpy2 refuse gcd(n, a) > 1 : n est alors composé (1 < a < n)
+        if gmpy2.gcd(n, a) != 1:
+            return False
+        return bool(gmpy2.is_strong_prp(n, a))
+
+
+BACKENDS = {"python": PythonBackend}
+if gmpy2 is not None:
+    BACKENDS["gmpy2"] = GmpyBackend
+
+
+def _default_backend():
+    name = os.environ.get("SG_BIGINT_BACKEND")
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"Backend indisponible : {name} (disponibles : {', '.join(BACKENDS)})")
+        return BACKENDS[name]
+    return BACKENDS.get("gmpy2", PythonBackend)
+
+
+_backend = _default_backend()
+
+
+def set_backend(name):
+    """Change le backend actif ; retourne le précédent (nom)."""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Backend indisponible : {name} (disponibles : {', '.join(BACKENDS)})")
+    previous, _backend = _backend.name, BACKENDS[name]
+    return previous
+
+
+def backend_name():
+    """Nom du backend actif, avec la version de GMP le cas échéant."""
+    if _backend is GmpyBackend:
+        return f"gmpy2 {gmpy2.version()} ({gmpy2.mp_version()})"
+    return _backend.name
+
+
+# ============================================================
+# OPÉRATIONS
+# ============================================================
+
+def powmod(base, exponent, modulus):
+    """base^exponent mod modulus."""
+    return _backend.powmod(base, exponent, modulus)
+
+
+def invert(a, modulus):
+    """Inverse de a mod modulus (ValueError s'il n'existe pas)."""
+    return _backend.invert(a, modulus)
+
+
+def strong_prp(n, a):
+    """Un tour de Miller-Rabin : n impair > 3, base 2 ≤ a ≤ n - 2."""
+    return _backend.strong_prp(n, a)
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+def benchmark(bits=(256, 1024, 2048, 4096), repeat=20, seed=1):
+    """Temps moyen d'un powmod (exposant n - 1) par taille et par backend."""
+    import random
+    import time
+
+    rng = random.Random(seed)
+    operands = {b: [(rng.getrandbits(b), rng.getrandbits(b) | 1 | (1 << (b - 1)))
+                    for _ in range(repeat)] for b in bits}
+    rows = []
+    for name, backend in BACKENDS.items():
+        for b in bits:
+            t0 = time.perf_counter()
+            results = [backend.powmod(a, n - 1, n) for a, n in operands[b]]
+            elapsed = time.perf_counter() - t0
+            rows.append((name, b, elapsed / repeat, results))
+    return rows
+
+
+if __name__ == "__main__":
+    print("="*70)
+    print(f"ARITHMÉTIQUE GRANDS ENTIERS — backend actif : {backend_name()}")
+    print("="*70)
+    print(f"Backends disponibles : {', '.join(BACKENDS)}")
+    if gmpy2 is None:
+        print("⚠ gmpy2 absent : repli sur pow intégré (pip install gmpy2)")
+
+    rows = benchmark()
+    reference = {b: (t, results) for name, b, t, results in rows if name == "python"}
+    print(f"\n{'Backend':<8} | {'Bits':>5} | {'powmod':>12} | {'Gain':>6} | Résultats")
+    print("-" * 56)
+    for name, b, t, results in rows:
+        t_ref, expected = reference[b]
+        print(f"{name:<8} | {b:5d} | {1e6 * t:9.1f} µs | {t_ref / t:5.1f}× | "
+              f"{'✓ identiques' if results == expected else '⚠ DIFFÉRENTS'}")
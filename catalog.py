@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Catalogue local des résultats (SQLite)
+======================================
+
+Les résultats étaient dispersés dans des JSON ad hoc
+(analysis_mod6469693230_p29.json, p23_anomaly_analysis.json) et des
+valeurs recopiées à la main (epsilon_23 = 0.0435, residues_prev = 7968646).
+
+Un fichier SQLite embarqué enregistre :
+
+  levels   : chaque niveau calculé (kind, modulus, count, empreinte, fichier)
+  analyses : chaque résultat d'analyse (ε, histogrammes d'extensions,
+             collisions…) indexé par (nom, kind, modulus, paramètres)
+  runs     : chaque exécution (durée, volume traité, débit)
+
+Les scripts interrogent le catalogue avant de recalculer
+(Catalog.analysis / Catalog.cached) : une analyse déjà faite revient
+instantanément.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from residue_tables import default_cache_dir, level_of
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS levels (
+    kind        TEXT    NOT NULL,
+    modulus     INTEGER NOT NULL,
+    level       INTEGER,
+    count       INTEGER NOT NULL,
+    fingerprint TEXT,
+    path        TEXT,
+    created     TEXT    NOT NULL,
+    PRIMARY KEY (kind, modulus)
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    name        TEXT    NOT NULL,
+    kind        TEXT    NOT NULL,
+    modulus     INTEGER NOT NULL,
+    params      TEXT    NOT NULL,
+    result      TEXT    NOT NULL,
+    fingerprint TEXT,
+    created     TEXT    NOT NULL,
+    PRIMARY KEY (name, kind, modulus, params)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    name        TEXT    NOT NULL,
+    params      TEXT    NOT NULL,
+    started     TEXT    NOT NULL,
+    elapsed     REAL    NOT NULL,
+    items       INTEGER,
+    throughput  REAL
+);
+"""
+
+
+def default_catalog_path():
+    """Catalogue courant : $SG_CATALOG, sinon catalog.sqlite du cache disque."""
+    return os.environ.get("SG_CATALOG", os.path.join(default_cache_dir(), "catalog.sqlite"))
+
+
+def _params_key(params):
+    """Paramètres sous forme canonique (clé d'unicité)."""
+    return json.dumps(params or {}, sort_keys=True, default=str)
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+# ============================================================
+# CATALOGUE
+# ============================================================
+
+class Catalog:
+    """Accès au fichier SQLite du catalogue (utilisable avec `with`)."""
+
+    def __init__(self, path=None):
+        path = default_catalog_path() if path is None else path
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Plusieurs processus peuvent écrire : attente sur verrou plutôt qu'échec
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --------------------------------------------------------
+    # Niveaux
+    # --------------------------------------------------------
+
+    def record_level(self, kind, modulus, count, fingerprint=None, path=None):
+        try:
+            level = level_of(modulus)
+        except ValueError:
+            level = None
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO levels VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(kind), modulus, level, count, fingerprint, path, _now()))
+
+    def level(self, kind, modulus):
+        """Niveau enregistré (dict) ou None."""
+        row = self._db.execute(
+            "SELECT kind, modulus, level, count, fingerprint, path, created "
+            "FROM levels WHERE kind = ? AND modulus = ?", (kind, modulus)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("kind", "modulus", "level", "count", "fingerprint", "path", "created"), row))
+
+    def levels(self):
+        rows = self._db.execute(
+            "SELECT kind, modulus, level, count, fingerprint FROM levels ORDER BY kind, modulus")
+        return [dict(zip(("kind", "modulus", "level", "count", "fingerprint"), r)) for r in rows]
+
+    # --------------------------------------------------------
+    # Analyses
+    # --------------------------------------------------------
+
+    def record_analysis(self, name, kind, modulus, result, params=None, fingerprint=None):
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, kind, modulus, _params_key(params),
+                 json.dumps(result, default=str), fingerprint, _now()))
+
+    def analysis(self, name, kind, modulus, params=None, fingerprint=None):
+        """
+        Résultat enregistré (dict) ou None.
+
+        Avec `fingerprint`, seul un résultat calculé sur les mêmes données
+        (même empreinte de niveau) est retourné.
+        """
+        query = "SELECT result FROM analyses WHERE name = ? AND kind = ? AND modulus = ? AND params = ?"
+        args = (name, kind, modulus, _params_key(params))
+        if fingerprint is not None:
+            query += " AND fingerprint IS ?"
+            args += (fingerprint,)
+        row = self._db.execute(query, args).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def cached(self, name, kind, modulus, compute, params=None, fingerprint=None):
+        """Résultat enregistré, sinon compute() enregistré puis retourné."""
+        result = self.analysis(name, kind, modulus, params, fingerprint)
+        if result is None:
+            result = compute()
+            self.record_analysis(name, kind, modulus, result, params, fingerprint)
+        return result
+
+    # --------------------------------------------------------
+    # Exécutions
+    # --------------------------------------------------------
+
+    def record_run(self, name, elapsed, items=None, params=None, started=None):
+        throughput = items / elapsed if items is not None and elapsed > 0 else None
+        with self._db:
+            self._db.execute(
+                "INSERT INTO runs (name, params, started, elapsed, items, throughput) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, _params_key(params), started or _now(), elapsed, items, throughput))
+
+    @contextmanager
+    def timed(self, name, **params):
+        """
+        Chronomètre un bloc et l'enregistre dans `runs`.
+
+        Le bloc renseigne run["items"] pour que le débit soit calculé.
+        """
+        run = {"items": None}
+        started, t0 = _now(), time.time()
+        yield run
+        self.record_run(name, time.time() - t0, run["items"], params, started)
+
+    def runs(self, name=None, limit=20):
+        query = "SELECT name, params, started, elapsed, items, throughput FROM runs"
+        args = ()
+        if name is not None:
+            query += " WHERE name = ?"
+            args = (name,)
+        rows = self._db.execute(query + " ORDER BY id DESC LIMIT ?", args + (limit,))
+        return [dict(zip(("name", "params", "started", "elapsed", "items", "throughput"), r))
+                for r in rows]
+
+
+_default = None
+
+
+def default_catalog():
+    """Catalogue par défaut (rouvert seulement si $SG_CATALOG change)."""
+    global _default
+    if _default is None or _default.path != default_catalog_path():
+        _default = Catalog()
+    return _default
+
+
+def record_level_quietly(kind, modulus, count, fingerprint=None, path=None):
+    """record_level sur le catalogue par défaut ; sans effet s'il est indisponible."""
+    try:
+        default_catalog().record_level(kind, modulus, count, fingerprint, path)
+    except (OSError, sqlite3.Error):
+        pass
+
+
+if __name__ == "__main__":
+    import sys
+
+    catalog = Catalog(sys.argv[1]) if len(sys.argv) > 1 else default_catalog()
+    print(f"Catalogue : {catalog.path}")
+
+    print(f"\n{'Kind':<5} | {'Niveau':>6} | {'Modulus':>15} | {'Résidus':>13} | Empreinte")
+    print("-" * 72)
+    for row in catalog.levels():
+        print(f"{row['kind']:<5} | {row['level'] or '-':>6} | {row['modulus']:15,} | "
+              f"{row['count']:13,} | {row['fingerprint'] or '-'}")
+
+    print(f"\nAnalyses :")
+    for name, kind, modulus, created in catalog._db.execute(
+            "SELECT name, kind, modulus, created FROM analyses ORDER BY created"):
+        print(f"  {created}  {name:<20} {kind:<5} mod {modulus:,}")
+
+    print(f"\nDernières exécutions :")
+    for run in catalog.runs():
+        rate = f"{run['throughput']:,.0f}/s" if run["throughput"] else "-"
+        print(f"  {run['started']}  {run['name']:<24} {run['elapsed']:8.2f}s  {rate}")
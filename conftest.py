@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_caches(tmp_path_factory):
+    """Cache de tables et catalogue temporaires : ~/.cache n'est jamais modifié."""
+    root = tmp_path_factory.mktemp("cache")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("SG_RESIDUE_CACHE", str(root / "residues"))
+        mp.setenv("SG_CATALOG", str(root / "catalog.sqlite"))
+        yield root
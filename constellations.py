@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Moteur générique de résidus admissibles pour constellations
+===========================================================
+
+forbidden1 / forbidden2 de generate_via_crt et analyze_collisions sont
+codés à la main pour les formes r et 2r+1. Ici une constellation est un
+ensemble quelconque de formes linéaires (a_i·r + b_i) / d_i :
+
+  Sophie Germain : r, 2r+1            safe      : r, (r-1)/2
+  jumeaux        : r, r+2             cousins   : r, r+4
+  sexy           : r, r+6             triplets  : r, r+2, r+6
+  Cunningham k   : 2^i·r + 2^i - 1 (i < k)
+
+Pour un premier q ne divisant pas d_i, la forme i est divisible par q
+sur les créneaux r mod q tels que a_i·r + b_i ≡ 0. Les créneaux interdits
+sont l'union sur les formes : les collisions (deux formes, même créneau)
+sont fusionnées automatiquement. Si q divise d_i, la forme n'impose rien
+mod q (sa parité dépend de r mod q·d_i) : c'est la convention des tables
+safe, où seul r pair est exclu mod 2.
+
+  |F_q| = nombre de créneaux interdits mod q
+  Res(P_k) = ∏ (q - |F_q|)      (forme close, q ≤ p_k)
+
+Une Constellation s'utilise partout où un `kind` est attendu
+(forbidden_residues, residue_count, lift_table, lifting, admissibility,
+ResidueTableProvider) : un seul moteur vectorisé pour toutes.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from residue_tables import PRIMES, primorial
+
+
+# ============================================================
+# CRÉNEAUX INTERDITS
+# ============================================================
+
+@lru_cache(maxsize=None)
+def _forbidden(forms, q):
+    slots = set()
+    for a, b, d in forms:
+        if d % q == 0:
+            continue
+        slots.update(r for r in range(q) if (a * r + b) % q == 0)
+    return tuple(sorted(slots))
+
+
+def _normalize(form):
+    a, b, *d = form
+    return (a, b, d[0] if d else 1)
+
+
+# ============================================================
+# CONSTELLATION
+# ============================================================
+
+class Constellation(namedtuple("Constellation", "name forms")):
+    """
+    Formes linéaires (a, b, d) = (a·r + b) / d d'une constellation.
+
+    Hachable et picklable : utilisable comme `kind` (caches, workers).
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, name, forms):
+        return super().__new__(cls, name, tuple(_normalize(f) for f in forms))
+
+    def __str__(self):
+        return self.name
+
+    def forbidden(self, q):
+        """Créneaux interdits mod q (triés, collisions fusionnées)."""
+        return _forbidden(self.forms, q)
+
+    def collisions(self, q):
+        """Nombre de créneaux partagés par plusieurs formes mod q."""
+        imposing = sum(1 for a, b, d in self.forms if d % q and a % q)
+        return imposing - len(self.forbidden(q))
+
+    def count(self, level):
+        """Res(P_level) = ∏(q - |F_q|) ; 0 si la constellation est bloquée."""
+        count = 1
+        for q in PRIMES[:level]:
+            count *= q - len(self.forbidden(q))
+        return count
+
+    def blocked_by(self, level=len(PRIMES)):
+        """Premiers q ≤ p_level qui interdisent tous les créneaux."""
+        return [q for q in PRIMES[:level] if len(self.forbidden(q)) == q]
+
+    def values(self, r):
+        """Valeurs des formes en r (None si une forme n'est pas entière)."""
+        out = []
+        for a, b, d in self.forms:
+            n, rem = divmod(a * r + b, d)
+            if rem:
+                return None
+            out.append(n)
+        return out
+
+    def table(self, level):
+        """Résidus admissibles mod P_level (array 'Q' trié, via le fournisseur)."""
+        from residue_tables import residue_table
+        return residue_table(self, level)
+
+    def wheel(self, level):
+        """Résidus admissibles mod P_level (uint64 trié), sans cache disque."""
+        import numpy as np
+
+        from residue_tables import build_residue_table
+        return np.frombuffer(build_residue_table(self, level), dtype=np.uint64)
+
+    def density(self, level):
+        return self.count(level) / primorial(level)
+
+
+# ============================================================
+# CONSTELLATIONS USUELLES
+# ============================================================
+
+SOPHIE_GERMAIN = Constellation("sg", [(1, 0), (2, 1)])
+SAFE = Constellation("safe", [(1, 0), (1, -1, 2)])
+TWINS = Constellation("twins", [(1, 0), (1, 2)])
+COUSINS = Constellation("cousins", [(1, 0), (1, 4)])
+SEXY = Constellation("sexy", [(1, 0), (1, 6)])
+TRIPLETS = Constellation("triplets", [(1, 0), (1, 2), (1, 6)])
+
+
+def cunningham_chain(length):
+    """Chaîne de Cunningham de 1re espèce : 2^i·r + 2^i - 1, i < length."""
+    return Constellation(f"cunningham{length}",
+                         [(1 << i, (1 << i) - 1) for i in range(length)])
+
+
+CONSTELLATIONS = {c.name: c for c in (SOPHIE_GERMAIN, SAFE, TWINS, COUSINS, SEXY, TRIPLETS)}
+
+
+def get(name):
+    """Constellation par nom ('twins', 'cunningham5', …)."""
+    if name.startswith("cunningham") and name[10:].isdigit():
+        return cunningham_chain(int(name[10:]))
+    try:
+        return CONSTELLATIONS[name]
+    except KeyError:
+        raise ValueError(f"Constellation inconnue : {name!r} "
+                         f"(attendu : {', '.join(CONSTELLATIONS)} ou cunninghamK)") from None
+
+
+if __name__ == "__main__":
+    import sys
+
+    from residue_tables import forbidden_residues, residue_count
+
+    level = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    names = sys.argv[2:] or list(CONSTELLATIONS) + ["cunningham3", "cunningham4"]
+
+    # Cohérence avec les tables codées en dur
+    for c, kind in ((SOPHIE_GERMAIN, "sg"), (SAFE, "safe")):
+        assert all(c.forbidden(q) == forbidden_residues(kind, q) for q in PRIMES)
+        assert all(c.count(k) == residue_count(kind, k) for k in range(1, len(PRIMES) + 1))
+
+    print(f"{'Constellation':<14} | {'Formes':<28} | {'Res(P_' + str(level) + ')':>14} | "
+          f"{'Densité':>10} | Collisions (q: n)")
+    print("-" * 100)
+    for name in names:
+        c = get(name)
+        forms = ", ".join(f"({a}r{b:+d})/{d}" if d > 1 else f"{a}r{b:+d}" for a, b, d in c.forms)
+        coll = ", ".join(f"{q}: {c.collisions(q)}" for q in PRIMES[:level] if c.collisions(q))
+        print(f"{c.name:<14} | {forms[:28]:<28} | {c.count(level):14,} | {c.density(level):10.3e} | "
+              f"{coll or '-'}")
+
+    c = get(names[0])
+    wheel = c.wheel(min(level, 7))
+    assert len(wheel) == c.count(min(level, 7))
+    print(f"\n✓ Roue {c.name} mod {primorial(min(level, 7)):,} : {len(wheel):,} résidus "
+          f"(= forme close), premiers : {wheel[:8].tolist()}")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Chaînes de Cunningham (première espèce) sur la hiérarchie de résidus
+====================================================================
+
+Un couple Sophie Germain (p, 2p+1) est une chaîne de longueur 2. Une
+chaîne de longueur k est
+
+  p, 2p+1, 4p+3, …, 2^i·p + 2^i - 1 = 2^i·(p+1) - 1   (i < k)
+
+Même règle d'exclusion par premier que generate_via_crt : pour un petit
+premier q impair, l'élément i est divisible par q ssi
+
+  p ≡ 2^(-i) - 1  (mod q)
+
+soit au plus k créneaux interdits mod q, moins s'il y a collision
+(quand l'ordre de 2 mod q est < k : q = 3 n'interdit que 2 créneaux, q = 7
+en interdit 3). D'où la roue de la chaîne au niveau n :
+
+  |W_k(P_n)| = ∏ (q - d_q(k)),  d_q(k) = min(k, ord_q(2))   (q = 2 : d = 1)
+
+La chaîne est la constellation constellations.cunningham_chain(k) :
+créneaux, comptes et roue viennent du moteur générique.
+
+Recherche : tours de roue → crible (mêmes créneaux pour les premiers
+au-delà de la roue) → Miller-Rabin élément par élément.
+"""
+
+import numpy as np
+
+from constellations import cunningham_chain
+from generate_safe_primes_validator import miller_rabin
+from residue_tables import PRIMES, primorial, residue_count
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+# Premiers du crible au-delà de la roue
+SIEVE_LIMIT = 2000
+SIEVE_PRIMES = tuple(
+    q for q in range(3, SIEVE_LIMIT, 2)
+    if all(q % d for d in range(3, int(q**0.5) + 1, 2))
+)
+
+# Taille maximale de roue construite automatiquement (résidus)
+MAX_WHEEL = 1 << 22
+
+# Candidats par bloc de recherche
+DEFAULT_BLOCK = 1 << 20
+
+# Roue de référence : 2310, 135 résidus SG (niveau 5)
+REFERENCE_LEVEL = 5
+
+
+# ============================================================
+# CRÉNEAUX ET COMPTES
+# ============================================================
+
+def chain_element(p, i):
+    """i-ème élément de la chaîne issue de p : 2^i·(p+1) - 1."""
+    return ((p + 1) << i) - 1
+
+
+def chain_forbidden(q, length):
+    """Créneaux interdits mod q (triés, sans doublon) pour une chaîne de `length`."""
+    return cunningham_chain(length).forbidden(q)
+
+
+def chain_count(length, level):
+    """|W_length(P_level)| = ∏(q - d_q), forme close."""
+    return cunningham_chain(length).count(level)
+
+
+def density_gain(length, level):
+    """Densité de la roue 2310 (SG) divisée par celle de la roue de la chaîne."""
+    reference = residue_count("sg", REFERENCE_LEVEL) / primorial(REFERENCE_LEVEL)
+    return reference / (chain_count(length, level) / primorial(level))
+
+
+def auto_level(length, max_wheel=MAX_WHEEL):
+    """Plus haut niveau dont la roue tient dans `max_wheel` résidus."""
+    level = 1
+    while level < len(PRIMES) and chain_count(length, level + 1) <= max_wheel \
+            and primorial(level + 1) < 2**40:
+        level += 1
+    return level
+
+
+# ============================================================
+# ROUE
+# ============================================================
+
+def chain_wheel(length, level):
+    """Résidus autorisés mod P_level (uint64, triés), par relèvement."""
+    return cunningham_chain(length).wheel(level)
+
+
+# ============================================================
+# TESTS
+# ============================================================
+
+def chain_length(p, limit=None):
+    """Longueur de la chaîne de première espèce issue de p (0 si p composé)."""
+    n = 0
+    while (limit is None or n < limit) and miller_rabin(chain_element(p, n)):
+        n += 1
+    return n
+
+
+def is_chain(p, length):
+    """Vrai si p, 2p+1, … (length éléments) sont tous premiers."""
+    return chain_length(p, length) == length
+
+
+# ============================================================
+# RECHERCHE
+# ============================================================
+
+def _sieve(candidates, length, level):
+    """Élimine les candidats dont un élément est divisible par un premier du crible."""
+    mask = np.ones(len(candidates), dtype=bool)
+    for q in SIEVE_PRIMES:
+        if q <= PRIMES[level - 1]:
+            continue  # Déjà exclu par la roue
+        r = candidates % np.uint64(q)
+        for f in chain_forbidden(q, length):
+            mask &= r != np.uint64(f)
+    return candidates[mask]
+
+
+def search_chains(start, stop, length, level=None, block=DEFAULT_BLOCK, stats=None):
+    """
+    Chaînes de longueur ≥ `length` dont le premier élément p ∈ [start, stop).
+
+    Retourne une liste triée de (p, longueur). Les p ≤ SIEVE_LIMIT sont
+    testés directement (un élément peut y être lui-même un petit
+    premier). `stats` (dict) reçoit les comptes de candidats.
+    """
+    if stop >= 2**64:
+        raise OverflowError("Recherche vectorisée limitée à p < 2^64")
+    level = level or auto_level(length)
+    modulus = primorial(level)
+    wheel = chain_wheel(length, level)
+    stats = stats if stats is not None else {}
+    stats.update(level=level, wheel=len(wheel), candidates=0, sieved=0)
+
+    found = [(p, n) for p in range(start, min(stop, SIEVE_LIMIT + 1))
+             if (n := chain_length(p)) >= length]
+
+    start = max(start, SIEVE_LIMIT + 1)
+    turns = max(1, block // len(wheel))
+    base = start - start % modulus
+    while base < stop:
+        bases = np.uint64(base) + np.uint64(modulus) * np.arange(turns, dtype=np.uint64)
+        candidates = (bases[:, None] + wheel[None, :]).ravel()
+        candidates = candidates[(candidates >= np.uint64(start)) & (candidates < np.uint64(stop))]
+        stats["candidates"] += len(candidates)
+        survivors = _sieve(candidates, length, level)
+        stats["sieved"] += len(survivors)
+        for p in survivors.tolist():
+            n = chain_length(p)
+            if n >= length:
+                found.append((p, n))
+        base += turns * modulus
+    return found
+
+
+def print_wheel_table(max_length=6, level=8):
+    """Taille et gain de densité des roues de chaîne par longueur."""
+    print(f"\n{'Longueur':>8} | {'Résidus mod ' + format(primorial(level), ','):>22} | "
+          f"{'Densité':>12} | {'Gain / 2310':>11}")
+    print("-" * 64)
+    for k in range(2, max_length + 1):
+        count = chain_count(k, level)
+        print(f"{k:8d} | {count:22,} | {count / primorial(level):12.3e} | "
+              f"{density_gain(k, level):10.1f}×")
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    start = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    stop = int(sys.argv[3]) if len(sys.argv) > 3 else 10**9
+
+    print("="*90)
+    print(f"CHAÎNES DE CUNNINGHAM (1re espèce) DE LONGUEUR ≥ {length}")
+    print("="*90)
+    print_wheel_table(max(length, 6))
+
+    stats = {}
+    t0 = time.time()
+    chains = search_chains(start, stop, length, stats=stats)
+    elapsed = time.time() - t0
+
+    print(f"\nIntervalle [{start:,}, {stop:,}) — roue niveau {stats['level']} "
+          f"({stats['wheel']:,} résidus mod {primorial(stats['level']):,})")
+    print(f"  Candidats roue   : {stats['candidates']:,} "
+          f"({(stop - start) / max(1, stats['candidates']):,.0f}× moins que l'exhaustif)")
+    print(f"  Après crible     : {stats['sieved']:,}")
+    print(f"  Chaînes trouvées : {len(chains):,} en {elapsed:.1f}s")
+    for p, n in chains[:20]:
+        print(f"    p = {p:>20,}  longueur {n}")
+    if len(chains) > 20:
+        print(f"    … ({len(chains) - 20:,} de plus)")
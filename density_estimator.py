@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Estimation Monte Carlo du nombre de safe primes dans [a, b]
+===========================================================
+
+Vers 10^18 et au-delà, même la recherche par roue ne peut plus compter
+exactement. On échantillonne uniformément les candidats admissibles
+d'un niveau et on teste leur primalité :
+
+  N_adm  = nombre d'admissibles dans [a, b] (exact en mode table)
+  p̂      = proportion de safe primes dans l'échantillon
+  N̂      = N_adm × p̂, intervalle de Wilson au niveau de confiance choisi
+
+Deux tirages uniformes :
+
+  table : rang uniforme dans [rang(a), rang(b+1)), puis unrank
+          (i // Res) × P_k + table[i mod Res]
+  crt   : un créneau autorisé uniforme par premier du niveau, recombinés
+          par CRT (aucune table, tout niveau jusqu'à P_15), puis un tour k
+          uniforme parmi ceux qui placent le résidu dans [a, b]
+  scan  : intervalle court (≤ SCAN_LIMIT entiers) : admissibles énumérés
+          par le filtre factorisé, comptage exact, tirage dans la liste
+
+L'échantillonnage s'arrête dès que l'erreur relative cible est atteinte.
+Comme les tables, on suppose a > p_k (les petits safe primes ≤ p_k ne
+sont pas admissibles).
+
+Comparaison Hardy–Littlewood : densité des safe primes en t
+C₂ / (ln t · ln(t/2)), des Sophie Germain 2C₂ / (ln t · ln 2t), intégrée
+sur [a, b] ; divisée par N_adm, c'est le taux de succès prédit par
+candidat admissible du niveau.
+"""
+
+import math
+import random
+from statistics import NormalDist
+
+import numpy as np
+
+from admissibility import level_filters
+from generate_safe_primes_validator import miller_rabin
+from residue_tables import PRIMES, default_provider, forbidden_residues, primorial, residue_count
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+# Constante des nombres premiers jumeaux C₂ = ∏_{q>2} q(q-2)/(q-1)²
+TWIN_PRIME_CONSTANT = 0.6601618158468696
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_REL_ERROR = 0.05
+
+# Échantillons par lot entre deux tests d'arrêt
+DEFAULT_BATCH = 2048
+
+DEFAULT_MAX_SAMPLES = 10_000_000
+
+# Succès minimum avant d'autoriser l'arrêt anticipé
+MIN_HITS = 30
+
+# Intervalles de l'intégration de Simpson (échelle logarithmique)
+INTEGRATION_STEPS = 2000
+
+# Au-delà, le mode table n'est plus mémorisable
+MAX_TABLE_LEVEL = 9
+
+# En dessous (entiers dans [a, b]), énumération exacte des admissibles
+SCAN_LIMIT = 1 << 22
+
+# Tirages de résidus CRT sans tour valide avant abandon
+MAX_CRT_ATTEMPTS = 100_000
+
+
+# ============================================================
+# TIRAGE UNIFORME DES ADMISSIBLES
+# ============================================================
+
+class TableSampler:
+    """Rang / unrank sur la table du niveau : tirage et comptage exacts."""
+
+    def __init__(self, a, b, level, kind, rng):
+        self.modulus = primorial(level)
+        self.table = np.frombuffer(default_provider.get(kind, level), dtype=np.uint64)
+        self.rng = rng
+        self.lo, self.hi = self.rank(a), self.rank(b + 1)
+        self.admissible = self.hi - self.lo
+        self.exact = True
+
+    def rank(self, n):
+        """Nombre d'admissibles dans [0, n)."""
+        q, r = divmod(n, self.modulus)
+        return q * len(self.table) + int(np.searchsorted(self.table, np.uint64(r)))
+
+    def sample(self, size):
+        res = len(self.table)
+        out = []
+        for _ in range(size):
+            q, i = divmod(self.rng.randrange(self.lo, self.hi), res)
+            out.append(q * self.modulus + int(self.table[i]))
+        return out
+
+
+class CRTSampler:
+    """
+    Créneaux autorisés tirés indépendamment par premier, recombinés par CRT.
+
+    N_adm est estimé par la densité du niveau (exact à ±2·Res près).
+    """
+
+    def __init__(self, a, b, level, kind, rng):
+        self.a, self.b = a, b
+        self.modulus = primorial(level)
+        self.rng = rng
+        self.digits = []
+        for q in PRIMES[:level]:
+            m = self.modulus // q
+            basis = m * pow(m % q, -1, q)
+            allowed = [s for s in range(q) if s not in forbidden_residues(kind, q)]
+            self.digits.append((basis, allowed))
+        self.k_lo, self.k_hi = a // self.modulus, b // self.modulus
+        self.admissible = round(residue_count(kind, level) * (b - a + 1) / self.modulus)
+        self.exact = False
+
+    def sample(self, size):
+        # Un résidu r donne les tours k ∈ [⌈(a-r)/P⌉, ⌊(b-r)/P⌋] ; r est
+        # accepté avec probabilité (nombre de tours) / span, ce qui garde
+        # chaque admissible de [a, b] équiprobable
+        span = -(-(self.b - self.a + 1) // self.modulus)
+        out = []
+        attempts = 0
+        while len(out) < size:
+            r = sum(basis * self.rng.choice(allowed) for basis, allowed in self.digits) % self.modulus
+            k_lo = -((r - self.a) // self.modulus)
+            k_hi = (self.b - r) // self.modulus
+            if k_hi >= k_lo and self.rng.randrange(span) <= k_hi - k_lo:
+                out.append(self.rng.randint(k_lo, k_hi) * self.modulus + r)
+                attempts = 0
+                continue
+            attempts += 1
+            if attempts >= MAX_CRT_ATTEMPTS:
+                raise ValueError(f"[{self.a:,}, {self.b:,}] trop étroit pour P = {self.modulus:,} "
+                                 f"({MAX_CRT_ATTEMPTS:,} résidus sans tour valide) : "
+                                 f"baisser le niveau ou utiliser le tirage scan")
+        return out
+
+
+class ScanSampler:
+    """Intervalle court : admissibles énumérés (comptage exact), tirage dans la liste."""
+
+    def __init__(self, a, b, level, kind, rng):
+        if b - a + 1 > SCAN_LIMIT:
+            raise ValueError(f"Intervalle de {b - a + 1:,} entiers > SCAN_LIMIT ({SCAN_LIMIT:,})")
+        offsets = np.arange(b - a + 1, dtype=np.int64)
+        mask = np.ones(len(offsets), dtype=bool)
+        for p, forbidden in level_filters(kind, level):
+            r = (offsets + a % p) % p
+            for f in forbidden:
+                mask &= r != f
+        self.a = a
+        self.offsets = offsets[mask]
+        self.rng = rng
+        self.admissible = len(self.offsets)
+        self.exact = True
+
+    def sample(self, size):
+        return [self.a + int(self.offsets[self.rng.randrange(self.admissible)]) for _ in range(size)]
+
+
+SAMPLERS = {"table": TableSampler, "crt": CRTSampler, "scan": ScanSampler}
+
+
+# ============================================================
+# TESTS ET INTERVALLES
+# ============================================================
+
+def _is_member(n, kind):
+    """Safe prime (n et (n-1)/2) ou Sophie Germain (n et 2n+1)."""
+    if kind == "safe":
+        # La moitié est plus petite : rejet plus rapide
+        return miller_rabin((n - 1) // 2) and miller_rabin(n)
+    return miller_rabin(n) and miller_rabin(2 * n + 1)
+
+
+def wilson_interval(hits, n, confidence=DEFAULT_CONFIDENCE):
+    """Intervalle de Wilson (bas, haut) pour une proportion hits / n."""
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = hits / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+# ============================================================
+# HARDY–LITTLEWOOD
+# ============================================================
+
+def _density(t, kind):
+    if kind == "safe":
+        return TWIN_PRIME_CONSTANT / (math.log(t) * math.log(t / 2))
+    return 2 * TWIN_PRIME_CONSTANT / (math.log(t) * math.log(2 * t))
+
+
+def hardy_littlewood(a, b, kind="safe", steps=INTEGRATION_STEPS):
+    """Nombre prédit dans [a, b] : ∫ densité(t) dt (Simpson en u = ln t)."""
+    a = max(a, 5)
+    if b <= a:
+        return 0.0
+    u0, u1 = math.log(a), math.log(b)
+    h = (u1 - u0) / steps
+    total = 0.0
+    for i in range(steps + 1):
+        u = u0 + i * h
+        weight = 1 if i in (0, steps) else (4 if i % 2 else 2)
+        total += weight * _density(math.exp(u), kind) * math.exp(u)
+    return total * h / 3
+
+
+# ============================================================
+# ESTIMATION
+# ============================================================
+
+def estimate_count(a, b, level=8, kind="safe", rel_error=DEFAULT_REL_ERROR,
+                   confidence=DEFAULT_CONFIDENCE, max_samples=DEFAULT_MAX_SAMPLES,
+                   batch=DEFAULT_BATCH, sampler=None, seed=None):
+    """
+    Estime le nombre de safe primes (ou SG) dans [a, b].
+
+    `sampler` : "scan" (défaut si b - a < SCAN_LIMIT), "table" (défaut
+    jusqu'au niveau 9) ou "crt". Retourne un rapport : estimation, intervalle, échantillons, prédiction
+    Hardy–Littlewood et écart relatif à celle-ci.
+    """
+    if b < a:
+        raise ValueError(f"Intervalle vide : [{a:,}, {b:,}]")
+    if sampler is None:
+        if b - a + 1 <= SCAN_LIMIT:
+            sampler = "scan"
+        else:
+            sampler = "table" if level <= MAX_TABLE_LEVEL else "crt"
+    rng = random.Random(seed)
+    source = SAMPLERS[sampler](a, b, level, kind, rng)
+
+    samples = hits = 0
+    # Aucun admissible : zéro exact, sans tirage
+    while source.admissible and samples < max_samples:
+        for n in source.sample(min(batch, max_samples - samples)):
+            hits += _is_member(n, kind)
+        samples = min(samples + batch, max_samples)
+        low, high = wilson_interval(hits, samples, confidence)
+        if hits >= MIN_HITS and (high - low) / 2 <= rel_error * hits / samples:
+            break
+
+    low, high = wilson_interval(hits, samples, confidence)
+    n_adm = source.admissible
+    estimate = n_adm * hits / samples if samples else 0.0
+    predicted = hardy_littlewood(a, b, kind)
+    return {
+        "a": a, "b": b, "kind": kind, "level": level, "sampler": sampler,
+        "admissible": n_adm, "admissible_exact": source.exact,
+        "samples": samples, "hits": hits, "confidence": confidence,
+        "hit_rate": hits / samples if samples else 0.0,
+        "estimate": estimate,
+        "interval": (n_adm * low, n_adm * high),
+        "rel_error": (high - low) / 2 / (hits / samples) if hits else float("inf"),
+        "hardy_littlewood": predicted,
+        "predicted_hit_rate": predicted / n_adm if n_adm else 0.0,
+        "ratio_to_hl": estimate / predicted if predicted else float("nan"),
+    }
+
+
+def print_estimate(report):
+    """Affiche un rapport de estimate_count."""
+    name = "safe primes" if report["kind"] == "safe" else "Sophie Germain"
+    exact = "exact" if report["admissible_exact"] else "densité"
+    low, high = report["interval"]
+    print("\n" + "="*90)
+    print(f"ESTIMATION MONTE CARLO : {name} dans [{report['a']:,}, {report['b']:,}]")
+    print("="*90)
+    print(f"\n  Niveau {report['level']} (P = {primorial(report['level']):,}), tirage {report['sampler']}")
+    print(f"  Admissibles         : {report['admissible']:,} ({exact})")
+    print(f"  Échantillons        : {report['samples']:,}  succès : {report['hits']:,} "
+          f"(taux {report['hit_rate']:.5f})")
+    print(f"\n  Estimation          : {report['estimate']:,.0f}")
+    print(f"  IC {100 * report['confidence']:.0f}%              : [{low:,.0f}, {high:,.0f}] "
+          f"(±{100 * report['rel_error']:.2f}%)")
+    print(f"\n  Hardy–Littlewood    : {report['hardy_littlewood']:,.0f} "
+          f"(taux prédit {report['predicted_hit_rate']:.5f} par admissible)")
+    print(f"  Estimation / HL     : {report['ratio_to_hl']:.4f}")
+    inside = low <= report["hardy_littlewood"] <= high
+    print(f"\n{'✓ HL dans l' if inside else '⚠ HL hors de l'}'intervalle de confiance")
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Estimation Monte Carlo du nombre de safe primes")
+    parser.add_argument("a", type=lambda s: int(float(s)))
+    parser.add_argument("b", type=lambda s: int(float(s)))
+    parser.add_argument("--level", type=int, default=8)
+    parser.add_argument("--kind", choices=("safe", "sg"), default="safe")
+    parser.add_argument("--sampler", choices=tuple(SAMPLERS))
+    parser.add_argument("--rel-error", type=float, default=DEFAULT_REL_ERROR)
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument("--max-samples", type=int, default=DEFAULT_MAX_SAMPLES)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    t0 = time.time()
+    report = estimate_count(args.a, args.b, args.level, args.kind, args.rel_error,
+                            args.confidence, args.max_samples, sampler=args.sampler, seed=args.seed)
+    print_estimate(report)
+    print(f"\nTemps : {time.time() - t0:.1f}s")
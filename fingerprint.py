@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Empreintes de contenu des niveaux
+=================================
+
+Vérifier un niveau chargé revenait à comparer len() à un nombre magique
+(`!= 378675`) : un fichier de la bonne taille mais corrompu passait.
+
+Empreinte d'un ensemble de résidus, indépendante de l'ordre :
+
+  count  = nombre de résidus
+  digest = Σ mix64(r) mod 2^64     (mix64 : finaliseur splitmix64)
+
+  - incrémentale : chaque bloc s'ajoute (relèvement en flux, fichiers
+    non triés de lift_chunks) et deux empreintes partielles fusionnent
+  - vérifiable en une passe sur le fichier, sans rien recalculer
+  - clé de cache stable : Fingerprint.key
+
+Les métadonnées d'un fichier de niveau (kind, modulus, count, digest)
+sont écrites à côté de lui dans `<fichier>.json`.
+"""
+
+import json
+import os
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # Forme pure Python seulement
+    np = None
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+MASK64 = (1 << 64) - 1
+
+# Constantes de splitmix64
+_GAMMA = 0x9E3779B97F4A7C15
+_MUL1 = 0xBF58476D1CE4E5B9
+_MUL2 = 0x94D049BB133111EB
+
+# Éléments par bloc pour la vérification d'un fichier
+VERIFY_CHUNK = 1 << 22
+
+METADATA_SUFFIX = ".json"
+
+
+# ============================================================
+# HACHAGE
+# ============================================================
+
+def mix64(x):
+    """Finaliseur splitmix64 d'un entier (forme scalaire)."""
+    z = (x + _GAMMA) & MASK64
+    z = ((z ^ (z >> 30)) * _MUL1) & MASK64
+    z = ((z ^ (z >> 27)) * _MUL2) & MASK64
+    return z ^ (z >> 31)
+
+
+def _digest_array(values):
+    """Σ mix64 mod 2^64 d'un tableau uint64 (arithmétique modulaire native)."""
+    z = values.astype(np.uint64, copy=True)
+    z += np.uint64(_GAMMA)
+    z ^= z >> np.uint64(30)
+    z *= np.uint64(_MUL1)
+    z ^= z >> np.uint64(27)
+    z *= np.uint64(_MUL2)
+    z ^= z >> np.uint64(31)
+    return int(z.sum(dtype=np.uint64))
+
+
+# ============================================================
+# EMPREINTE
+# ============================================================
+
+class Fingerprint(namedtuple("Fingerprint", "count digest")):
+    """Empreinte (count, digest) d'un ensemble de résidus."""
+
+    __slots__ = ()
+
+    @property
+    def key(self):
+        """Clé de cache textuelle, ex. '378675-0f3a…'."""
+        return f"{self.count}-{self.digest:016x}"
+
+    @classmethod
+    def from_key(cls, key):
+        count, digest = key.split("-")
+        return cls(int(count), int(digest, 16))
+
+    def __add__(self, other):
+        """Fusion de deux empreintes d'ensembles disjoints."""
+        return Fingerprint(self.count + other.count, (self.digest + other.digest) & MASK64)
+
+
+EMPTY = Fingerprint(0, 0)
+
+
+class FingerprintAccumulator:
+    """Empreinte construite bloc par bloc (ordre des blocs indifférent)."""
+
+    def __init__(self):
+        self.count = 0
+        self.digest = 0
+
+    def update(self, values):
+        """Ajoute un bloc (tableau uint64, array 'Q' ou itérable d'entiers)."""
+        if np is not None and not isinstance(values, np.ndarray) and hasattr(values, "typecode"):
+            values = np.frombuffer(values, dtype=np.uint64) if values.typecode == "Q" else np.asarray(values)
+        if np is not None and isinstance(values, np.ndarray):
+            self.count += len(values)
+            self.digest = (self.digest + _digest_array(values)) & MASK64
+        else:
+            for r in values:
+                self.count += 1
+                self.digest = (self.digest + mix64(r)) & MASK64
+        return self
+
+    def result(self):
+        return Fingerprint(self.count, self.digest)
+
+
+def fingerprint(values):
+    """Empreinte d'un ensemble de résidus en mémoire."""
+    return FingerprintAccumulator().update(values).result()
+
+
+def fingerprint_file(path, chunk_size=VERIFY_CHUNK):
+    """Empreinte d'un fichier uint64 brut (.u64) ou compressé (.blk), en une passe."""
+    acc = FingerprintAccumulator()
+    with open(path, "rb") as f:
+        compressed = f.read(8) == b"SGBLOCK1"
+    if compressed:
+        from level_store import BlockLevel  # level_store importe ce module
+        with BlockLevel(path) as level:
+            for chunk in level.iter_chunks():
+                acc.update(chunk)
+    elif np is not None:
+        data = np.memmap(path, dtype="<u8", mode="r") if os.path.getsize(path) else []
+        for i in range(0, len(data), chunk_size):
+            acc.update(np.asarray(data[i:i + chunk_size]))
+    else:
+        from array import array
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(8 * chunk_size)
+                if not block:
+                    break
+                acc.update(array("Q", block))
+    return acc.result()
+
+
+def level_fingerprint(kind, level, provider=None):
+    """
+    Clé d'empreinte (Fingerprint.key) du niveau `level` du fournisseur.
+
+    À passer au catalogue (analysis / cached / record_analysis) : un
+    résultat calculé sur une autre table n'est alors pas relu.
+    """
+    from residue_tables import default_provider  # residue_tables importe ce module
+    return (provider or default_provider).fingerprint(kind, level).key
+
+
+# ============================================================
+# MÉTADONNÉES DE NIVEAU
+# ============================================================
+
+def metadata_path(path):
+    return path + METADATA_SUFFIX
+
+
+def write_metadata(path, kind, modulus, fp, **extra):
+    """Écrit les métadonnées (empreinte comprise) à côté du fichier de niveau."""
+    meta = {"kind": str(kind), "modulus": modulus, "count": fp.count,
+            "digest": f"{fp.digest:016x}", "key": fp.key, **extra}
+    target = metadata_path(path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, target)
+    return meta
+
+
+def read_metadata(path):
+    """Métadonnées du fichier de niveau, ou None si absentes / illisibles."""
+    try:
+        with open(metadata_path(path), "r") as f:
+            meta = json.load(f)
+        meta["fingerprint"] = Fingerprint(int(meta["count"]), int(meta["digest"], 16))
+        return meta
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def verify_file(path, chunk_size=VERIFY_CHUNK):
+    """
+    Compare le fichier à l'empreinte de ses métadonnées.
+
+    Retourne (ok, attendue, calculée) ; ok vaut None sans métadonnées.
+    """
+    meta = read_metadata(path)
+    actual = fingerprint_file(path, chunk_size)
+    if meta is None:
+        return None, None, actual
+    return actual == meta["fingerprint"], meta["fingerprint"], actual
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    status = 0
+    for path in sys.argv[1:]:
+        t0 = time.time()
+        ok, expected, actual = verify_file(path)
+        elapsed = time.time() - t0
+        if ok is None:
+            print(f"? {path} : {actual.key} (pas de métadonnées) [{elapsed:.1f}s]")
+        elif ok:
+            print(f"✓ {path} : {actual.key} [{elapsed:.1f}s]")
+        else:
+            print(f"✗ {path} : {actual.key} ≠ {expected.key} attendu [{elapsed:.1f}s]")
+            status = 1
+    raise SystemExit(status)
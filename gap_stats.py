@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Statistiques d'écarts en flux
+=============================
+
+analyze_distribution ne donne que des comptes par résidu et un top-10.
+Ici les écarts entre éléments consécutifs d'une suite croissante :
+
+  - safe primes consécutifs sur de grands intervalles
+  - résidus admissibles consécutifs d'un niveau (écart circulaire
+    compris) : c'est le pas de la roue, donc son coût
+
+GapStats consomme la suite par blocs, dans l'ordre, en mémoire bornée :
+
+  - histogramme par classes de largeur `bin_width` (une entrée par
+    classe non vide, au plus max_gap / bin_width)
+  - moments (effectif, moyenne, variance par Welford, min, max)
+  - records d'écart maximal (écart, début), dans l'ordre de la suite
+
+Deux GapStats de plages disjointes fusionnent (merge) : l'écart de
+jonction est ajouté, les moments combinés (Chan et al.), les records
+recalculés. Les shards d'un calcul parallèle se réduisent ainsi.
+"""
+
+from collections import Counter
+
+import numpy as np
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+DEFAULT_BIN_WIDTH = 1
+
+# Tours de roue par bloc pour les safe primes
+SEARCH_TURNS = 4096
+
+
+# ============================================================
+# ACCUMULATEUR
+# ============================================================
+
+class GapStats:
+    """Écarts d'une suite croissante, alimentée par blocs successifs."""
+
+    def __init__(self, bin_width=DEFAULT_BIN_WIDTH):
+        self.bin_width = bin_width
+        self.first = None
+        self.last = None
+        self.count = 0          # Nombre d'écarts
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min_gap = None
+        self.max_gap = 0
+        self.histogram = Counter()
+        self.records = []       # (écart, début) strictement croissants
+
+    # --------------------------------------------------------
+    # Alimentation
+    # --------------------------------------------------------
+
+    def update(self, values):
+        """Ajoute un bloc trié, postérieur aux blocs précédents."""
+        if not (isinstance(values, list) and values and max(values) >= 2**64):
+            values = np.asarray(values, dtype=np.uint64)
+        if not len(values):
+            return self
+        if isinstance(values, np.ndarray):
+            head = [] if self.last is None else [self.last]
+            series = np.concatenate([np.asarray(head, dtype=np.uint64), values])
+            gaps = np.diff(series.astype(np.int64) if int(series[-1]) < 2**63 else series)
+            starts = series[:-1]
+        else:  # Entiers ≥ 2^64 : repli Python
+            series = ([] if self.last is None else [self.last]) + list(values)
+            gaps = np.asarray([b - a for a, b in zip(series, series[1:])], dtype=object)
+            starts = series[:-1]
+
+        if self.first is None:
+            self.first = int(values[0])
+        self.last = int(values[-1])
+        if len(gaps):
+            if np.any(gaps <= 0):
+                raise ValueError("Suite non strictement croissante")
+            self._add_gaps(gaps, starts)
+        return self
+
+    def add_gap(self, gap, start):
+        """Ajoute un écart isolé (ex. écart circulaire d'un niveau)."""
+        self._add_gaps(np.asarray([gap], dtype=np.int64), [start])
+
+    def _add_gaps(self, gaps, starts):
+        n = len(gaps)
+        values = gaps.astype(np.float64)
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        self._combine_moments(n, batch_mean, batch_m2)
+
+        low, high = int(gaps.min()), int(gaps.max())
+        self.min_gap = low if self.min_gap is None else min(self.min_gap, low)
+
+        bins, counts = np.unique(np.asarray(gaps, dtype=np.int64) // self.bin_width,
+                                 return_counts=True)
+        for b, c in zip(bins.tolist(), counts.tolist()):
+            self.histogram[b * self.bin_width] += c
+
+        if high > self.max_gap:
+            # Records : écarts supérieurs à tous les précédents
+            values = np.asarray(gaps, dtype=np.int64)
+            previous = np.maximum.accumulate(np.concatenate([[self.max_gap], values[:-1]]))
+            for i in np.flatnonzero(values > previous):
+                self.records.append((int(gaps[i]), int(starts[i])))
+            self.max_gap = high
+
+    def _combine_moments(self, n, mean, m2):
+        total = self.count + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+
+    # --------------------------------------------------------
+    # Fusion
+    # --------------------------------------------------------
+
+    def merge(self, other):
+        """
+        Fusionne une plage disjointe (avant ou après) ; retourne self.
+
+        L'écart entre les deux plages est compté une fois.
+        """
+        if other.first is None:
+            return self
+        if self.first is None:
+            self.__dict__.update(other.copy().__dict__)
+            return self
+        if other.bin_width != self.bin_width:
+            raise ValueError("Largeurs de classe différentes")
+        if other.last < self.first:
+            merged = other.copy().merge(self)
+            self.__dict__.update(merged.__dict__)
+            return self
+        if other.first <= self.last:
+            raise ValueError("Plages qui se chevauchent")
+
+        junction = other.first - self.last
+        earlier_max = self.max_gap
+        self.add_gap(junction, self.last)
+        if other.count:
+            self._combine_moments(other.count, other.mean, other.m2)
+            self.min_gap = other.min_gap if self.min_gap is None else min(self.min_gap, other.min_gap)
+            self.histogram.update(other.histogram)
+            bar = max(earlier_max, junction)
+            for gap, start in other.records:
+                if gap > bar:
+                    self.records.append((gap, start))
+                    bar = gap
+            self.max_gap = max(self.max_gap, other.max_gap)
+        self.last = other.last
+        return self
+
+    def copy(self):
+        clone = GapStats(self.bin_width)
+        clone.__dict__.update({k: (v.copy() if hasattr(v, "copy") else v)
+                               for k, v in self.__dict__.items()})
+        return clone
+
+    # --------------------------------------------------------
+    # Résultats
+    # --------------------------------------------------------
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    def to_dict(self):
+        """Forme sérialisable (JSON) pour stocker un résultat de shard."""
+        return {
+            "bin_width": self.bin_width, "first": self.first, "last": self.last,
+            "count": self.count, "mean": self.mean, "m2": self.m2,
+            "min_gap": self.min_gap, "max_gap": self.max_gap,
+            "histogram": {str(k): v for k, v in sorted(self.histogram.items())},
+            "records": self.records,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data["bin_width"])
+        for key in ("first", "last", "count", "mean", "m2", "min_gap", "max_gap"):
+            setattr(stats, key, data[key])
+        stats.histogram = Counter({int(k): v for k, v in data["histogram"].items()})
+        stats.records = [tuple(r) for r in data["records"]]
+        return stats
+
+
+# ============================================================
+# SOURCES
+# ============================================================
+
+def level_gaps(source, modulus=None, bin_width=DEFAULT_BIN_WIDTH):
+    """
+    Écarts entre résidus consécutifs d'un niveau, écart circulaire compris.
+
+    `source` : « kind:level », fichier trié ou tableau (level_diff.iter_level_chunks).
+    """
+    from level_diff import iter_level_chunks
+    from residue_tables import primorial
+
+    if modulus is None:
+        if not (isinstance(source, str) and source.partition(":")[2].isdigit()):
+            raise ValueError("modulus requis pour une source autre que « kind:level »")
+        modulus = primorial(int(source.partition(":")[2]))
+
+    stats = GapStats(bin_width)
+    for chunk in iter_level_chunks(source):
+        stats.update(chunk)
+    if stats.first is not None:
+        stats.add_gap(stats.first + modulus - stats.last, stats.last)
+    return stats
+
+
+def safe_prime_gaps(start, stop, bin_width=DEFAULT_BIN_WIDTH):
+    """Écarts entre safe primes consécutifs de [start, stop) (roue 2310)."""
+    from safe_prime_pipeline import WHEEL_MODULUS, search_block
+
+    from generate_safe_primes_validator import is_safe_prime
+
+    stats = GapStats(bin_width)
+    # Sous la roue, les petits safe primes (5, 7, 11, 23, …) sont testés un à un
+    stats.update([p for p in range(start, min(stop, WHEEL_MODULUS)) if is_safe_prime(p)])
+    start = max(start, WHEEL_MODULUS)
+    base = start - start % WHEEL_MODULUS
+    while base < stop:
+        turns = min(SEARCH_TURNS, -(-(stop - base) // WHEEL_MODULUS))
+        stats.update([p for p in search_block(base, turns, start=start) if p < stop])
+        base += turns * WHEEL_MODULUS
+    return stats
+
+
+def file_gaps(path, bin_width=DEFAULT_BIN_WIDTH):
+    """Écarts d'un fichier de safe primes trié (formats de stream_validator)."""
+    from stream_validator import iter_prime_chunks
+
+    stats = GapStats(bin_width)
+    for _, values, _ in iter_prime_chunks(path):
+        stats.update(values)
+    return stats
+
+
+def _shard(task):
+    start, stop, bin_width = task
+    return safe_prime_gaps(start, stop, bin_width).to_dict()
+
+
+def parallel_safe_prime_gaps(start, stop, shards, workers=None, bin_width=DEFAULT_BIN_WIDTH):
+    """safe_prime_gaps réparti sur un pool ; résultats de shards fusionnés."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    step = -(-(stop - start) // shards)
+    tasks = [(a, min(a + step, stop), bin_width) for a in range(start, stop, step)]
+    total = GapStats(bin_width)
+    with ProcessPoolExecutor(workers) as pool:
+        for part in pool.map(_shard, tasks):
+            total.merge(GapStats.from_dict(part))
+    return total
+
+
+def print_gaps(stats, title, top=15):
+    """Affiche histogramme, moments et records."""
+    print("\n" + "="*90)
+    print(title)
+    print("="*90)
+    print(f"\n  Écarts     : {stats.count:,} (de {stats.first:,} à {stats.last:,})")
+    print(f"  Moyenne    : {stats.mean:.3f}   écart-type : {stats.variance ** 0.5:.3f}")
+    print(f"  Min / Max  : {stats.min_gap} / {stats.max_gap}")
+
+    print(f"\n  Histogramme (classes de {stats.bin_width}, {top} plus fréquentes) :")
+    for gap, c in stats.histogram.most_common(top):
+        print(f"    {gap:>8} : {c:>12,} ({100 * c / stats.count:6.2f}%)")
+
+    print(f"\n  Records d'écart maximal :")
+    for gap, start in stats.records[-top:]:
+        print(f"    {gap:>8} après {start:,}")
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    level = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    stop = int(float(sys.argv[2])) if len(sys.argv) > 2 else 10**8
+
+    t0 = time.time()
+    stats = level_gaps(f"safe:{level}")
+    print_gaps(stats, f"ÉCARTS ENTRE RÉSIDUS SAFE ADMISSIBLES (NIVEAU {level})")
+    print(f"\n  Temps : {time.time() - t0:.1f}s")
+
+    t0 = time.time()
+    stats = parallel_safe_prime_gaps(0, stop, shards=32)
+    print_gaps(stats, f"ÉCARTS ENTRE SAFE PRIMES CONSÉCUTIFS < {stop:,}")
+    print(f"\n  Temps : {time.time() - t0:.1f}s")
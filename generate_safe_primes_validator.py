@@ -7,47 +7,31 @@ Génère des safe primes dans un intervalle et valide que 100%
 ont des résidus dans SAFE_PRIME_RESIDUES_2310.
 """
 
+import os
 import random
 from collections import Counter
 
-# Safe prime residues mod 2310
-SAFE_RESIDUES_2310 = {
-    17, 47, 53, 59, 83, 107, 137, 149, 167, 173, 179, 227, 233, 257, 
-    263, 269, 293, 299, 317, 347, 359, 377, 383, 389, 437, 443, 467, 
-    479, 503, 509, 527, 557, 563, 569, 587, 593, 599, 629, 647, 653, 
-    677, 689, 713, 719, 767, 773, 779, 797, 809, 839, 857, 863, 887, 
-    893, 899, 923, 929, 977, 983, 989, 1007, 1019, 1049, 1073, 1097, 
-    1103, 1109, 1139, 1157, 1187, 1193, 1217, 1223, 1229, 1259, 1283, 
-    1307, 1313, 1319, 1349, 1367, 1403, 1427, 1433, 1439, 1469, 1487, 
-    1493, 1517, 1523, 1553, 1559, 1577, 1613, 1619, 1637, 1643, 1649, 
-    1679, 1697, 1703, 1733, 1763, 1769, 1787, 1817, 1823, 1829, 1847, 
-    1853, 1889, 1907, 1913, 1943, 1949, 1973, 1979, 1997, 2027, 2033, 
-    2039, 2063, 2099, 2117, 2147, 2153, 2159, 2183, 2207, 2237, 2243, 
-    2249, 2273, 2279, 2309
-}
+from admissibility import is_admissible
+from bigint import backend_name, strong_prp
+from residue_tables import residue_set
+
+# Résidus safe / SG mod 2310 (niveau 5), dérivés de la loi (p-2)
+SAFE_RESIDUES_2310 = residue_set("safe", 5)
+SG_RESIDUES_2310 = residue_set("sg", 5)
+
+# Export de main() : hors du dépôt (safe_primes_generated.csv est la référence suivie)
+DEFAULT_OUTPUT = os.path.join("outputs", "safe_primes_generated.csv")
 
 
 def miller_rabin(n, k=20):
-    """Test de primalité Miller-Rabin."""
+    """Test de primalité Miller-Rabin (arithmétique du backend bigint)."""
     if n < 2: return False
     if n in (2, 3): return True
     if n % 2 == 0: return False
     
-    r, d = 0, n - 1
-    while d % 2 == 0:
-        r += 1
-        d //= 2
-    
     for _ in range(k):
         a = random.randrange(2, n - 1)
-        x = pow(a, d, n)
-        if x in (1, n - 1):
-            continue
-        for _ in range(r - 1):
-            x = pow(x, 2, n)
-            if x == n - 1:
-                break
-        else:
+        if not strong_prp(n, a):
             return False
     return True
 
@@ -83,12 +67,15 @@ def generate_safe_primes_naive(start, count=100):
     return safe_primes, tested
 
 
-def generate_safe_primes_optimized(start, count=100):
+def generate_safe_primes_optimized(start, count=100, level=5):
     """
     Génère des safe primes en utilisant SAFE_RESIDUES_2310 (rapide).
     
     Ne teste QUE les candidats p où p mod 2310 ∈ SAFE_RESIDUES_2310.
     Cela réduit l'espace de recherche de ~94%.
+    
+    Avec level > 5, les candidats de la roue 2310 sont en plus filtrés
+    par le test factorisé au niveau P_level avant Miller-Rabin.
     """
     safe_primes = []
     tested = 0
@@ -103,6 +90,8 @@ def generate_safe_primes_optimized(start, count=100):
             p = base + r
             if p < start:
                 continue
+            if level > 5 and not is_admissible(p, level):
+                continue
             
             tested += 1
             if is_safe_prime(p):
@@ -206,13 +195,19 @@ def benchmark_methods(start=10000, count=50):
     print(f"{'Naïve':<20} {t_naive:>9.3f}s {tested_naive:>18,} {'×1.0':>10}")
     print(f"{'Optimisée (p-2)':<20} {t_opt:>9.3f}s {tested_opt:>18,} {'×'+str(round(t_naive/t_opt, 1)):>10}")
     
-    print(f"\n✓ Réduction des tests : {100*(1-tested_opt/tested_naive):.1f}%")
+    print(f"\n✓ Backend arithmétique : {backend_name()}")
+    print(f"✓ Réduction des tests : {100*(1-tested_opt/tested_naive):.1f}%")
     print(f"✓ Speedup temporal    : ×{t_naive/t_opt:.1f}")
     
     return primes_opt
 
 
-def main():
+def main(output_path=DEFAULT_OUTPUT, force=False):
+    # Refus avant calcul : le CSV de référence suivi par git n'est pas écrasé par accident
+    if os.path.exists(output_path) and not force:
+        raise SystemExit(f"✗ {output_path} existe déjà (--force pour l'écraser)")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
     print("\n" + "#"*70)
     print("# GÉNÉRATION ET VALIDATION DE SAFE PRIMES")
     print("# Validation de la loi d'échelle (p-2)")
@@ -286,37 +281,22 @@ Cela confirme que :
     print("EXPORT DES DONNÉES")
     print("="*70)
     
-    import csv
-    filename = "/mnt/user-data/outputs/safe_primes_generated.csv"
-    with open(filename, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(["SafePrime", "Residus2310", "SophieGermain", "InSAFE", "InSG"])
-        
-        SG_RESIDUES_2310 = {
-            23,29,41,53,83,89,113,131,149,173,179,191,221,233,239,251,263,281,
-            293,299,323,359,383,389,419,431,443,449,461,491,503,509,551,569,593,
-            611,629,641,653,659,683,701,713,719,743,761,779,809,821,839,851,881,
-            893,911,923,953,971,989,1013,1019,1031,1049,1073,1079,1091,1103,
-            1121,1139,1163,1181,1223,1229,1241,1271,1283,1289,1301,1313,1343,
-            1349,1373,1409,1433,1439,1451,1469,1481,1493,1499,1511,1541,1553,
-            1559,1583,1601,1619,1643,1649,1679,1691,1703,1709,1733,1751,1763,
-            1769,1811,1829,1871,1889,1901,1913,1931,1943,1961,1973,1979,2003,
-            2021,2039,2063,2069,2081,2099,2111,2129,2141,2153,2171,2213,2231,
-            2273,2279,2291,2309
-        }
-        
-        for p in safe_primes2:  # Utiliser le batch de 200
-            r = p % 2310
-            # Vérifier si p est aussi Sophie Germain
-            q = 2 * p + 1
-            is_sg = miller_rabin(q)
-            in_safe = r in SAFE_RESIDUES_2310
-            in_sg = r in SG_RESIDUES_2310
-            writer.writerow([p, r, is_sg, in_safe, in_sg])
-    
-    print(f"\n✓ Données exportées : {filename}")
-    print(f"  {len(safe_primes2)} safe primes avec résidus et classifications")
+    from safe_prime_export import export_safe_primes
+    
+    # Format déduit de l'extension : .csv, .npy (répertoire) ou .npz
+    written = export_safe_primes(safe_primes2, output_path)  # Batch de 200
+    
+    print(f"\n✓ Données exportées : {output_path}")
+    print(f"  {written} safe primes avec résidus et classifications")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Génération et validation de safe primes")
+    parser.add_argument("output", nargs="?", default=DEFAULT_OUTPUT,
+                        help=f"fichier d'export (.csv, .npz ou répertoire .npy ; défaut {DEFAULT_OUTPUT})")
+    parser.add_argument("--force", action="store_true", help="écraser un fichier existant")
+    args = parser.parse_args()
+
+    main(args.output, args.force)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Différence en flux entre deux niveaux stockés
+=============================================
+
+load_residues_223092870 a deux sources (JSON « RECALCULATED » et
+régénération depuis mod 9699690) et les comptes publiés divergent
+(7,952,175 dans le README, 7,968,646 dans l'en-tête p29). Ce module
+dit lesquels des résidus diffèrent.
+
+Les deux niveaux (triés, sans doublon) sont fusionnés en une passe :
+
+  - différence symétrique A \\ B et B \\ A
+  - comptes par sous-classe (résidu mod P_h) de chaque côté
+  - les K premiers résidus différents de chaque côté
+
+Mémoire constante : deux blocs en cours, quel que soit le volume
+(milliards de résidus possibles pour des fichiers .u64).
+
+Sources acceptées : fichiers lus par stream_validator.iter_prime_chunks
+(.u64, .npy, .npz, .csv), niveaux compressés .blk (level_store),
+« kind:level » (table du fournisseur), .json (clé de liste de résidus,
+chargé en mémoire) ou tableau en mémoire.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from residue_tables import default_provider, primorial
+from stream_validator import DEFAULT_CHUNK_SIZE, iter_prime_chunks
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+# Sous-classes par défaut : résidus mod P_3 = 30
+DEFAULT_CLASS_LEVEL = 3
+
+# Résidus différents conservés de chaque côté
+DEFAULT_FIRST = 20
+
+
+# ============================================================
+# SOURCES
+# ============================================================
+
+def _iter_array(values, chunk_size):
+    for i in range(0, len(values), chunk_size):
+        yield np.asarray(values[i:i + chunk_size], dtype=np.uint64)
+
+
+def _json_residues(path, key=None):
+    """Liste de résidus d'un JSON d'analyse (clé `key` ou première clé « residues_* »)."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    if key is None:
+        keys = [k for k, v in data.items() if k.startswith("residues_") and isinstance(v, list)]
+        if not keys:
+            raise KeyError(f"{path} : aucune liste de résidus (statistiques seulement ?)")
+        key = keys[0]
+    return np.unique(np.asarray(data[key], dtype=np.uint64))
+
+
+def iter_level_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, json_key=None):
+    """
+    Itère sur les blocs uint64 d'une source de niveau.
+
+    `source` : chemin de fichier, « kind:level », ou tableau / séquence.
+    """
+    if not isinstance(source, str):
+        if hasattr(source, "values") and not callable(source.values):
+            source = source.values  # ResidueSet
+        yield from _iter_array(source, chunk_size)
+        return
+
+    kind, _, level = source.partition(":")
+    if level.isdigit() and not os.path.exists(source):
+        table = default_provider.get(kind, int(level))
+        yield from _iter_array(np.frombuffer(table, dtype=np.uint64), chunk_size)
+    elif source.lower().endswith(".json"):
+        yield from _iter_array(_json_residues(source, json_key), chunk_size)
+    elif source.lower().endswith(".blk"):
+        from level_store import BlockLevel
+
+        with BlockLevel(source) as level:
+            yield from level.iter_chunks(max(1, chunk_size // level.block_size))
+    else:
+        for _, values, unreadable in iter_prime_chunks(source, chunk_size):
+            if unreadable:
+                offset, field = unreadable[0]
+                raise ValueError(f"{source} : ligne illisible à l'offset {offset} ({field!r})")
+            yield np.asarray(values, dtype=np.uint64)
+
+
+class _SortedStream:
+    """Flux trié d'une source, consommé par préfixes (≤ borne)."""
+
+    def __init__(self, name, chunks):
+        self.name = name
+        self._chunks = chunks
+        self._buffer = np.empty(0, dtype=np.uint64)
+        self._last = -1
+        self.count = 0
+        self.exhausted = False
+        self._fill()
+
+    def _fill(self):
+        while not len(self._buffer) and not self.exhausted:
+            block = next(self._chunks, None)
+            if block is None:
+                self.exhausted = True
+                return
+            if len(block) and (int(block[0]) <= self._last or np.any(block[1:] <= block[:-1])):
+                bad = 0 if int(block[0]) <= self._last else int(np.argmax(block[1:] <= block[:-1])) + 1
+                raise ValueError(f"Source {self.name} non triée (ou doublon) "
+                                 f"à l'index {self.count + bad:,} : {int(block[bad]):,}")
+            if len(block):
+                self._last = int(block[-1])
+            self.count += len(block)
+            self._buffer = block
+
+    @property
+    def head_max(self):
+        """Plus grande valeur du bloc en cours (None si épuisé)."""
+        return int(self._buffer[-1]) if len(self._buffer) else None
+
+    def take_until(self, bound):
+        """Retire et retourne les valeurs ≤ bound du bloc en cours."""
+        cut = int(np.searchsorted(self._buffer, np.uint64(bound), side="right"))
+        part, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        self._fill()
+        return part
+
+    def take_all(self):
+        part, self._buffer = self._buffer, np.empty(0, dtype=np.uint64)
+        self._fill()
+        return part
+
+
+# ============================================================
+# DIFFÉRENCE
+# ============================================================
+
+def diff_levels(source_a, source_b, class_level=DEFAULT_CLASS_LEVEL, first=DEFAULT_FIRST,
+                chunk_size=DEFAULT_CHUNK_SIZE, json_key=None):
+    """
+    Fusionne deux niveaux triés en une passe et retourne un rapport (dict).
+
+    only_a / only_b : nombre de résidus propres à chaque côté ;
+    classes_a / classes_b : leurs comptes par résidu mod P_class_level ;
+    first_a / first_b : les `first` plus petits résidus propres.
+    """
+    class_modulus = primorial(class_level)
+    a = _SortedStream("A", iter_level_chunks(source_a, chunk_size, json_key))
+    b = _SortedStream("B", iter_level_chunks(source_b, chunk_size, json_key))
+
+    common = 0
+    only = {"a": 0, "b": 0}
+    classes = {"a": np.zeros(class_modulus, dtype=np.int64),
+               "b": np.zeros(class_modulus, dtype=np.int64)}
+    firsts = {"a": [], "b": []}
+
+    def record(side, values):
+        if not len(values):
+            return
+        only[side] += len(values)
+        classes[side] += np.bincount(values % np.uint64(class_modulus), minlength=class_modulus)
+        missing = first - len(firsts[side])
+        if missing > 0:
+            firsts[side].extend(values[:missing].tolist())
+
+    while a.head_max is not None and b.head_max is not None:
+        # Tout ce qui est ≤ borne est présent dans les deux préfixes
+        bound = min(a.head_max, b.head_max)
+        part_a, part_b = a.take_until(bound), b.take_until(bound)
+        shared = np.intersect1d(part_a, part_b, assume_unique=True)
+        common += len(shared)
+        record("a", np.setdiff1d(part_a, shared, assume_unique=True))
+        record("b", np.setdiff1d(part_b, shared, assume_unique=True))
+
+    for side, stream in (("a", a), ("b", b)):
+        while stream.head_max is not None:
+            record(side, stream.take_all())
+
+    return {
+        "count_a": a.count,
+        "count_b": b.count,
+        "common": common,
+        "only_a": only["a"],
+        "only_b": only["b"],
+        "class_modulus": class_modulus,
+        "classes_a": {r: int(c) for r, c in enumerate(classes["a"]) if c},
+        "classes_b": {r: int(c) for r, c in enumerate(classes["b"]) if c},
+        "first_a": firsts["a"],
+        "first_b": firsts["b"],
+        "identical": only["a"] == only["b"] == 0,
+    }
+
+
+def print_diff(report, name_a="A", name_b="B"):
+    """Affiche un rapport de diff_levels."""
+    print("\n" + "="*90)
+    print(f"DIFFÉRENCE {name_a} ↔ {name_b}")
+    print("="*90)
+    print(f"\n  {name_a:<40} : {report['count_a']:>15,} résidus")
+    print(f"  {name_b:<40} : {report['count_b']:>15,} résidus")
+    print(f"  {'Communs':<40} : {report['common']:>15,}")
+    print(f"  {'Seulement dans ' + name_a:<40} : {report['only_a']:>15,}")
+    print(f"  {'Seulement dans ' + name_b:<40} : {report['only_b']:>15,}")
+
+    for side, name in (("a", name_a), ("b", name_b)):
+        if not report[f"only_{side}"]:
+            continue
+        print(f"\n  Seulement dans {name}, par classe mod {report['class_modulus']:,} :")
+        for r, c in sorted(report[f"classes_{side}"].items()):
+            print(f"    r ≡ {r:>6} : {c:,}")
+        print(f"  Premiers résidus : {', '.join(f'{x:,}' for x in report[f'first_{side}'])}")
+
+    if report["identical"]:
+        print("\n✓ Niveaux identiques")
+    else:
+        print("\n⚠ Niveaux différents")
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Différence en flux entre deux niveaux triés")
+    parser.add_argument("a", help="fichier (.u64/.npy/.npz/.csv/.json) ou kind:level")
+    parser.add_argument("b", help="fichier (.u64/.npy/.npz/.csv/.json) ou kind:level")
+    parser.add_argument("--class-level", type=int, default=DEFAULT_CLASS_LEVEL)
+    parser.add_argument("--first", type=int, default=DEFAULT_FIRST)
+    parser.add_argument("--json-key")
+    args = parser.parse_args()
+
+    t0 = time.time()
+    try:
+        report = diff_levels(args.a, args.b, args.class_level, args.first, json_key=args.json_key)
+    except (ValueError, KeyError) as e:
+        print(f"✗ {e}")
+        raise SystemExit(2)
+    print_diff(report, args.a, args.b)
+    print(f"\nTemps : {time.time() - t0:.1f}s")
+    raise SystemExit(0 if report["identical"] else 1)
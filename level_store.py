@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Fichiers de niveau compressés par blocs
+=======================================
+
+Un fichier .u64 coûte 8 octets par résidu : ≈ 1.7 Go à P_10, ≈ 50 Go à
+P_11 en SG. Or les résidus triés d'un niveau sont proches : l'écart
+moyen est P_k / Res(P_k) (≈ 30 à P_10), quelques bits suffisent.
+
+Format .blk :
+
+  en-tête   magic, modulus, count, taille de bloc B, nombre de blocs
+  blocs     B résidus triés par bloc : premier résidu dans l'index,
+            puis les B - 1 écarts (moins 1) sur w bits (w propre au bloc)
+  index     premier résidu, offset et largeur w de chaque bloc (creux :
+            une entrée pour B résidus)
+
+Lecture (BlockLevel) : fichier en memory-map, index lu sans copie.
+Une requête ponctuelle (contains, rank, select) cherche le bloc dans
+l'index puis décode ce seul bloc ; un cache LRU garde les blocs décodés.
+Les parcours d'intervalle ne décodent que les blocs qui le recouvrent.
+
+L'empreinte (fingerprint.py) est écrite dans les métadonnées comme
+pour un .u64 ; level_diff.iter_level_chunks lit aussi les .blk.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from fingerprint import FingerprintAccumulator, write_metadata
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+MAGIC = b"SGBLOCK1"
+
+# magic, modulus, count, taille de bloc, blocs, offset de l'index
+HEADER = struct.Struct("<8sQQIIQ")
+HEADER_SIZE = 64
+
+# Résidus par bloc : un bloc décodé ≈ 8 Ko, index ≈ 0.13 bit par résidu
+DEFAULT_BLOCK_SIZE = 1024
+
+# Blocs décodés gardés en cache (≈ 32 Mo par défaut)
+DEFAULT_CACHE_BLOCKS = 4096
+
+# Au-delà, un écart ne tient plus dans une lecture de 8 octets décalée
+MAX_FAST_WIDTH = 56
+
+
+# ============================================================
+# CODAGE D'UN BLOC
+# ============================================================
+
+def _encode_block(values):
+    """Octets des écarts (moins 1) de `values`, et leur largeur en bits."""
+    gaps = np.diff(values) - np.uint64(1)
+    width = int(gaps.max()).bit_length() if len(gaps) else 0
+    if width == 0:
+        return b"", 0
+    bits = (gaps[:, None] >> np.arange(width, dtype=np.uint64)) & np.uint64(1)
+    return np.packbits(bits.astype(np.uint8).ravel(), bitorder="little").tobytes(), width
+
+
+def _decode_block(data, first, n, width):
+    """Résidus (uint64) d'un bloc à partir de ses octets."""
+    gaps = np.ones(n, dtype=np.uint64)
+    gaps[0] = first
+    if width and n > 1:
+        if width <= MAX_FAST_WIDTH:
+            # Chaque écart est relu octet par octet depuis son octet de départ
+            span = (width + 14) // 8
+            buf = np.concatenate([np.frombuffer(data, dtype=np.uint8), np.zeros(span, dtype=np.uint8)])
+            pos = np.arange(0, (n - 1) * width, width, dtype=np.int64)
+            start = pos >> 3
+            words = buf[start].astype(np.uint64)
+            for k in range(1, span):
+                words |= buf[start + k].astype(np.uint64) << np.uint64(8 * k)
+            mask = np.uint64((1 << width) - 1)
+            gaps[1:] += (words >> (pos & 7).astype(np.uint64)) & mask
+        else:
+            bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=(n - 1) * width,
+                                 bitorder="little").reshape(n - 1, width).astype(np.uint64)
+            gaps[1:] += (bits << np.arange(width, dtype=np.uint64)).sum(axis=1, dtype=np.uint64)
+    return np.cumsum(gaps, dtype=np.uint64)
+
+
+# ============================================================
+# ÉCRITURE
+# ============================================================
+
+def _iter_sorted(chunks):
+    """Blocs en entrée, vérifiés triés et sans doublon d'un bloc à l'autre."""
+    previous, offset = None, 0
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=np.uint64)
+        if not len(chunk):
+            continue
+        bad = np.flatnonzero(chunk[1:] <= chunk[:-1])
+        if len(bad) or (previous is not None and chunk[0] <= previous):
+            index = offset + (int(bad[0]) + 1 if len(bad) else 0)
+            raise ValueError(f"Entrée non triée ou avec doublon à l'indice {index:,}")
+        previous = chunk[-1]
+        offset += len(chunk)
+        yield chunk
+
+
+def write_level(source, path, kind, modulus, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Écrit un niveau trié au format .blk ; retourne le nombre de résidus.
+
+    `source` : tableau, itérable de blocs triés, ou toute source de
+    level_diff.iter_level_chunks (chemin, « kind:level », ResidueSet).
+    Mémoire : un bloc d'entrée et l'index.
+    """
+    if isinstance(source, (np.ndarray, array)):
+        source = [source]
+    elif isinstance(source, (str, os.PathLike)) or hasattr(source, "contains_many"):
+        from level_diff import iter_level_chunks
+        source = iter_level_chunks(source)  # Fichier, « kind:level » ou ResidueSet
+
+    firsts, offsets, widths = [], [], []
+    acc = FingerprintAccumulator()
+    pending = np.empty(0, dtype=np.uint64)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(b"\0" * HEADER_SIZE)
+        position = HEADER_SIZE
+
+        def emit(values):
+            nonlocal position
+            data, width = _encode_block(values)
+            firsts.append(int(values[0]))
+            offsets.append(position)
+            widths.append(width)
+            f.write(data)
+            position += len(data)
+
+        for chunk in _iter_sorted(source):
+            acc.update(chunk)
+            pending = np.concatenate([pending, chunk]) if len(pending) else chunk
+            full = len(pending) - len(pending) % block_size
+            for i in range(0, full, block_size):
+                emit(pending[i:i + block_size])
+            pending = pending[full:]
+        if len(pending):
+            emit(pending)
+
+        offsets.append(position)
+        # Index aligné sur 8 octets : lu sans copie depuis le memory-map
+        f.write(b"\0" * (-position % 8))
+        index = position + (-position % 8)
+        f.write(np.asarray(firsts, dtype="<u8").tobytes())
+        f.write(np.asarray(offsets, dtype="<u8").tobytes())
+        f.write(np.asarray(widths, dtype=np.uint8).tobytes())
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, modulus, acc.count, block_size, len(firsts), index))
+    os.replace(tmp, path)
+    write_metadata(path, kind, modulus, acc.result(), ordered=True, format="blocks",
+                   block_size=block_size)
+    return acc.count
+
+
+# ============================================================
+# LECTURE
+# ============================================================
+
+class BlockLevel:
+    """
+    Niveau .blk en lecture : requêtes ponctuelles et parcours par blocs.
+
+    Utilisable avec `with`. `cache_blocks` borne le cache LRU des blocs
+    décodés ; hits / misses comptent les accès au cache.
+    """
+
+    def __init__(self, path, cache_blocks=DEFAULT_CACHE_BLOCKS):
+        self.path = path
+        self._cache = OrderedDict()
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.modulus, self.count, self.block_size, self.n_blocks, index = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} : pas un fichier de niveau compressé ({magic!r})")
+        nb = self.n_blocks
+        self.firsts = np.frombuffer(self._map, dtype="<u8", count=nb, offset=index)
+        self.offsets = np.frombuffer(self._map, dtype="<u8", count=nb + 1, offset=index + 8 * nb)
+        self.widths = np.frombuffer(self._map, dtype=np.uint8, count=nb, offset=index + 16 * nb + 8)
+        if index % 8:
+            # Index non aligné : searchsorted copierait tout le tableau à chaque appel
+            self.firsts, self.offsets = self.firsts.copy(), self.offsets.copy()
+        self.cache_blocks = cache_blocks
+        self.hits = self.misses = 0
+
+    def close(self):
+        # Les vues NumPy sur le memory-map doivent disparaître avant sa fermeture
+        self.firsts = self.offsets = self.widths = None
+        self._cache.clear()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return f"BlockLevel({self.path!r}, {self.count:,} résidus mod {self.modulus:,})"
+
+    @property
+    def nbytes(self):
+        """Taille du fichier (octets)."""
+        return len(self._map)
+
+    # --------------------------------------------------------
+    # Blocs
+    # --------------------------------------------------------
+
+    def _decode(self, i):
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        n = min(self.block_size, self.count - i * self.block_size)
+        return _decode_block(self._map[start:end], int(self.firsts[i]), n, int(self.widths[i]))
+
+    def block(self, i):
+        """Bloc i décodé (uint64, trié), via le cache LRU."""
+        values = self._cache.get(i)
+        if values is not None:
+            self.hits += 1
+            self._cache.move_to_end(i)
+            return values
+        self.misses += 1
+        values = self._decode(i)
+        self._cache[i] = values
+        if len(self._cache) > self.cache_blocks:
+            self._cache.popitem(last=False)
+        return values
+
+    def _block_of(self, r):
+        """Indice du bloc qui contiendrait r (-1 si r précède tout)."""
+        return int(np.searchsorted(self.firsts, np.uint64(r), side="right")) - 1
+
+    # --------------------------------------------------------
+    # Requêtes ponctuelles
+    # --------------------------------------------------------
+
+    def __contains__(self, r):
+        if not 0 <= r < 2**64:
+            return False
+        i = self._block_of(r)
+        if i < 0:
+            return False
+        values = self.block(i)
+        j = int(np.searchsorted(values, np.uint64(r)))
+        return j < len(values) and int(values[j]) == r
+
+    def contains_many(self, residues):
+        """Masque booléen d'appartenance (un décodage par bloc touché ; faux hors de [0, modulus))."""
+        residues = np.asarray(residues)
+        if residues.dtype.kind not in "iu":
+            # Entiers Python hors int64 / uint64 : test scalaire
+            return np.fromiter((r in self for r in residues.tolist()), dtype=bool,
+                               count=len(residues))
+        in_range = residues < self.modulus
+        if residues.dtype.kind == "i":
+            in_range &= residues >= 0
+        residues = np.where(in_range, residues, 0).astype(np.uint64)
+        out = np.zeros(len(residues), dtype=bool)
+        blocks = np.where(in_range, np.searchsorted(self.firsts, residues, side="right") - 1, -1)
+        for i in np.unique(blocks[blocks >= 0]).tolist():
+            sel = np.flatnonzero(blocks == i)
+            values = self.block(i)
+            j = np.minimum(np.searchsorted(values, residues[sel]), len(values) - 1)
+            out[sel] = values[j] == residues[sel]
+        return out
+
+    def rank(self, r):
+        """Nombre de résidus < r."""
+        i = self._block_of(r)
+        if i < 0:
+            return 0
+        return i * self.block_size + int(np.searchsorted(self.block(i), np.uint64(r)))
+
+    def __getitem__(self, k):
+        """k-ième résidu (select)."""
+        if k < 0:
+            k += self.count
+        if not 0 <= k < self.count:
+            raise IndexError(f"Indice hors limites : {k}")
+        i, j = divmod(k, self.block_size)
+        return int(self.block(i)[j])
+
+    # --------------------------------------------------------
+    # Parcours
+    # --------------------------------------------------------
+
+    def range(self, lo, hi):
+        """Résidus de [lo, hi) (uint64) ; seuls les blocs recouvrants sont décodés."""
+        lo, hi = max(lo, 0), min(hi, self.modulus)
+        if hi <= lo:
+            return np.empty(0, dtype=np.uint64)
+        first, last = max(self._block_of(lo), 0), self._block_of(hi - 1)
+        parts = [self.block(i) for i in range(first, last + 1)]
+        if not parts:
+            return np.empty(0, dtype=np.uint64)
+        values = np.concatenate(parts)
+        return values[(values >= np.uint64(lo)) & (values < np.uint64(hi))]
+
+    def iter_chunks(self, blocks_per_chunk=1024):
+        """Tout le niveau par blocs, dans l'ordre (sans passer par le cache)."""
+        for i in range(0, self.n_blocks, blocks_per_chunk):
+            yield np.concatenate([self._decode(b)
+                                  for b in range(i, min(i + blocks_per_chunk, self.n_blocks))])
+
+    def values(self):
+        """Niveau entier décodé (uint64)."""
+        chunks = list(self.iter_chunks())
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.uint64)
+
+
+# ============================================================
+# MESURES
+# ============================================================
+
+def benchmark(level, queries=20000, seed=0):
+    """
+    Latences (µs) de contains et rank sur des résidus aléatoires.
+
+    Retourne {op: (p50, p99)} ; les requêtes tirées au hasard sur tout le
+    niveau mesurent surtout le décodage (le cache les sert rarement),
+    celles concentrées sur quelques blocs le chemin du cache.
+    """
+    import time
+
+    rng = np.random.default_rng(seed)
+    sample = rng.integers(0, max(level.modulus, 1), size=queries, dtype=np.uint64).tolist()
+    members = [level[k] for k in rng.integers(0, level.count, size=queries).tolist()]
+    # Requêtes concentrées sur 64 blocs : servies par le cache
+    hot = [level[k] for k in rng.integers(0, min(level.count, 64 * level.block_size),
+                                          size=queries).tolist()]
+    results = {}
+    for name, op, args in (("contains (bloc en cache)", level.__contains__, hot),
+                           ("contains (membre)", level.__contains__, members),
+                           ("contains (aléatoire)", level.__contains__, sample),
+                           ("rank", level.rank, sample)):
+        latencies = []
+        for r in args:
+            t0 = time.perf_counter()
+            op(r)
+            latencies.append(time.perf_counter() - t0)
+        latencies.sort()
+        results[name] = (1e6 * latencies[len(latencies) // 2], 1e6 * latencies[int(len(latencies) * 0.99)])
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from fingerprint import verify_file
+
+    parser = argparse.ArgumentParser(description="Niveaux compressés par blocs (.blk)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("compress", help="source triée → .blk")
+    p.add_argument("source", help="« kind:level », fichier .u64/.npy/…")
+    p.add_argument("output")
+    p.add_argument("--kind", default="sg")
+    p.add_argument("--modulus", type=int, help="requis si la source n'est pas « kind:level »")
+    p.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+
+    p = sub.add_parser("info", help="taille, compression, latences")
+    p.add_argument("path")
+    p.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.command == "compress":
+        from residue_tables import primorial
+
+        kind, modulus = args.kind, args.modulus
+        spec_kind, _, spec_level = args.source.partition(":")
+        if spec_level.isdigit() and not os.path.exists(args.source):
+            kind, modulus = spec_kind, primorial(int(spec_level))
+        if modulus is None:
+            parser.error("--modulus requis pour une source fichier")
+        t0 = time.time()
+        written = write_level(args.source, args.output, kind, modulus, args.block_size)
+        size = os.path.getsize(args.output)
+        print(f"✓ {written:,} résidus → {args.output} en {time.time() - t0:.1f}s")
+        print(f"  {size:,} octets ({8 * size / max(written, 1):.2f} bits/résidu, "
+              f"{8 * written / size:.1f}× plus petit que .u64)")
+    else:
+        with BlockLevel(args.path) as level:
+            size = level.nbytes
+            print(f"{level}")
+            print(f"  Blocs       : {level.n_blocks:,} × {level.block_size:,} résidus")
+            print(f"  Taille      : {size:,} octets ({8 * size / max(level.count, 1):.2f} bits/résidu, "
+                  f"{8 * level.count / size:.1f}× plus petit que .u64)")
+            print(f"  Largeurs    : {int(level.widths.min())}–{int(level.widths.max())} bits par écart")
+            ok, expected, actual = verify_file(args.path)
+            print(f"  Empreinte   : {'✓ conforme' if ok else '⚠ non conforme'} ({actual.key})")
+
+            print(f"\n  {'Requête':<24} | {'p50':>9} | {'p99':>9}")
+            print("  " + "-" * 48)
+            for name, (p50, p99) in benchmark(level, args.queries).items():
+                print(f"  {name:<24} | {p50:7.1f}µs | {p99:7.1f}µs")
+            print(f"\n  Cache : {level.hits:,} hits, {level.misses:,} misses")
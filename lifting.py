@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Relèvement multi-niveaux en une passe (CRT)
+===========================================
+
+generate_via_crt ajoute un premier à la fois : passer de 9,699,690 à
+6,469,693,230 matérialise d'abord les 7,952,175 résidus mod 223,092,870.
+
+Ici plusieurs nouveaux premiers p_1..p_m sont combinés d'un coup :
+
+  Q = p_1 × … × p_m
+  S = {s mod Q : s mod p_i ∉ créneaux interdits de p_i, pour tout i}
+  |S| = ∏(p_i - 2)
+
+Chaque résidu r du niveau de départ (mod M) donne exactement |S|
+résidus du niveau final, x = r + M·t avec t = (s - r)·M⁻¹ mod Q. Aucun
+niveau intermédiaire n'est stocké ; le niveau final s'écrit en flux.
+
+Mode trié (lift_sorted_chunks) : pour t fixé, la tranche {r + M·t} est
+triée si le niveau de départ l'est, et occupe [t·M, (t+1)·M). Émettre les
+Q tranches dans l'ordre de t (en sautant les créneaux interdits) produit
+donc le niveau final trié, sans tri global.
+"""
+
+import os
+from array import array
+
+import numpy as np
+
+from catalog import record_level_quietly
+from fingerprint import FingerprintAccumulator, write_metadata
+from residue_tables import PRIMES, forbidden_residues, lift_table, primorial
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+# Résidus produits par bloc vectorisé
+DEFAULT_CHUNK_OUTPUT = 1 << 22
+
+# t = (s - r)·M⁻¹ mod Q doit tenir sur 63 bits avant réduction
+MAX_COMBINED_MODULUS = 2**31
+
+
+# ============================================================
+# CRÉNEAUX AUTORISÉS COMBINÉS
+# ============================================================
+
+def allowed_slots(kind, primes):
+    """Créneaux autorisés mod Q = ∏ primes, triés (uint64)."""
+    slots, q = array("Q", [0]), 1
+    for p in primes:
+        slots = lift_table(slots, q, p, kind)
+        q *= p
+    return np.asarray(slots, dtype=np.uint64)
+
+
+def _as_uint64(table):
+    if isinstance(table, np.ndarray):
+        return table.astype(np.uint64, copy=False)
+    if isinstance(table, (set, frozenset)):
+        return np.fromiter(table, dtype=np.uint64, count=len(table))
+    return np.asarray(table, dtype=np.uint64)
+
+
+# ============================================================
+# RELÈVEMENT
+# ============================================================
+
+def lift_chunks(table, modulus, primes, kind, chunk_output=DEFAULT_CHUNK_OUTPUT):
+    """
+    Itère sur les blocs (uint64) du niveau modulus × ∏ primes.
+
+    Une seule passe sur `table` ; l'ordre des résidus n'est pas trié.
+    """
+    primes = tuple(primes)
+    q = 1
+    for p in primes:
+        if modulus % p == 0:
+            raise ValueError(f"{p} divise déjà le modulus {modulus:,}")
+        q *= p
+    if q >= MAX_COMBINED_MODULUS:
+        raise ValueError(f"Q = {q:,} trop grand pour une passe (max 2^31)")
+    if modulus * q >= 2**64:
+        raise OverflowError("Niveau final ≥ 2^64")
+
+    table = _as_uint64(table)
+    slots = allowed_slots(kind, primes)
+    if not len(slots):
+        return  # Constellation bloquée par un des premiers : niveau vide
+    inv = np.uint64(pow(modulus % q, -1, q))
+    q64, m64 = np.uint64(q), np.uint64(modulus)
+
+    rows = max(1, chunk_output // len(slots))
+    for i in range(0, len(table), rows):
+        r = table[i:i + rows]
+        # (s - r) mod Q sans passer en négatif : s + Q - (r mod Q)
+        diff = (slots[None, :] + (q64 - r[:, None] % q64)) % q64
+        t = diff * inv % q64
+        yield (r[:, None] + m64 * t).ravel()
+
+
+def lift_sorted_chunks(table, modulus, primes, kind, chunk_output=DEFAULT_CHUNK_OUTPUT):
+    """
+    Itère sur les blocs triés (uint64, croissants) du niveau modulus × ∏ primes.
+
+    `table` doit être triée. Pour chaque nouveau premier p, r mod p est
+    calculé une fois ; la tranche t ne coûte ensuite que des comparaisons
+    (r + M·t) mod p ∉ interdits ⟺ r mod p ∉ {(f - M·t) mod p}.
+    """
+    primes = tuple(primes)
+    q = 1
+    for p in primes:
+        if modulus % p == 0:
+            raise ValueError(f"{p} divise déjà le modulus {modulus:,}")
+        q *= p
+    if modulus * q >= 2**64:
+        raise OverflowError("Niveau final ≥ 2^64")
+
+    table = _as_uint64(table)
+    residues_mod = [(p, (table % np.uint64(p)).astype(np.uint16), forbidden_residues(kind, p))
+                    for p in primes]
+    if any(len(forbidden) == p for p, _, forbidden in residues_mod):
+        return  # Constellation bloquée par un des premiers : niveau vide
+    m64 = np.uint64(modulus)
+
+    for t in range(q):
+        offset = m64 * np.uint64(t)
+        for i in range(0, len(table), chunk_output):
+            mask = np.ones(min(chunk_output, len(table) - i), dtype=bool)
+            for p, r_mod, forbidden in residues_mod:
+                shift = (modulus * t) % p
+                for f in forbidden:
+                    mask &= r_mod[i:i + chunk_output] != (f - shift) % p
+            yield table[i:i + chunk_output][mask] + offset
+
+
+def lift_multi(table, modulus, primes, kind, ordered=False):
+    """Niveau final complet (uint64) en une passe ; trié si `ordered`."""
+    lift = lift_sorted_chunks if ordered else lift_chunks
+    chunks = list(lift(table, modulus, primes, kind))
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.uint64)
+
+
+def lift_to_file(table, modulus, primes, kind, path, chunk_output=DEFAULT_CHUNK_OUTPUT,
+                 ordered=False, catalog=True):
+    """
+    Écrit le niveau final en uint64 brut (format du cache .u64), en flux.
+
+    Avec `ordered`, le fichier est trié (directement utilisable par un
+    écrivain compressé ou une recherche binaire). L'empreinte est
+    accumulée bloc par bloc et écrite dans les métadonnées du fichier ;
+    elle ne dépend pas de l'ordre. Le niveau est enregistré au catalogue
+    sauf si `catalog` est faux (fichier partiel, ex. shard de work_queue).
+    Retourne le nombre de résidus écrits. Mémoire crête : un bloc.
+    """
+    lift = lift_sorted_chunks if ordered else lift_chunks
+    acc = FingerprintAccumulator()
+    final_modulus = modulus
+    for p in primes:
+        final_modulus *= p
+    with open(path, "wb") as f:
+        for chunk in lift(table, modulus, primes, kind, chunk_output):
+            f.write(chunk.astype("<u8", copy=False).tobytes())
+            acc.update(chunk)
+    write_metadata(path, kind, final_modulus, acc.result(), ordered=ordered)
+    if catalog:
+        record_level_quietly(kind, final_modulus, acc.count, acc.result().key, os.path.abspath(path))
+    return acc.count
+
+
+def lift_levels(table, from_level, to_level, kind, ordered=False):
+    """Relève une table du niveau from_level au niveau to_level d'un coup."""
+    return lift_multi(table, primorial(from_level), PRIMES[from_level:to_level], kind, ordered)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from residue_tables import residue_count, residue_table
+
+    kind = "sg"
+    from_level, to_level = 8, 10
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    path = args[0] if args else f"{kind}_{primorial(to_level)}.u64"
+
+    base = residue_table(kind, from_level)
+    primes = PRIMES[from_level:to_level]
+
+    print(f"Relèvement direct mod {primorial(from_level):,} → mod {primorial(to_level):,} "
+          f"(p = {', '.join(map(str, primes))})")
+    t0 = time.time()
+    written = lift_to_file(base, primorial(from_level), primes, kind, path,
+                           ordered="--sorted" in sys.argv)
+    elapsed = time.time() - t0
+
+    print(f"✓ {written:,} résidus écrits dans {path} en {elapsed:.1f}s "
+          f"({written / elapsed:,.0f} résidus/s)")
+    print(f"✓ Attendu ∏(p-2) : {residue_count(kind, to_level):,} "
+          f"({'OK' if written == residue_count(kind, to_level) else 'ÉCART'})")
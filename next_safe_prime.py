@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+next_safe_prime(n) à faible latence pour n < 2^64
+=================================================
+
+Le service demande surtout « le prochain safe prime après n ». Le chemin
+par blocs (search_block) construit des listes NumPy pour 16 tours de
+roue et teste chaque survivant par 2 × 20 tours de Miller-Rabin
+aléatoires : plusieurs dizaines de millisecondes par requête.
+
+Ici, une requête ne parcourt que les candidats nécessaires, en scalaire :
+
+  roue      table des écarts entre résidus safe consécutifs mod 2·P_8,
+            restreints à p ≡ 3 (mod 4) puisque (p-1)/2 est impair
+            (378,675 résidus, densité 1.95%) : x += écart
+  crible    x mod q ∉ {0, 1} pour 23 ≤ q < 200, par groupes de premiers
+            (une table d'octets par produit Q de 2 à 4 premiers : un seul
+            x mod Q par groupe) ; le résidu du premier groupe, consulté à
+            chaque candidat, est mis à jour par incréments
+  pgcd      pgcd(∏ q < 2^11, p·(p-1)/2) = 1 : division d'essai des deux
+            nombres par 300 premiers en une opération sur grands entiers
+  preuve    q = (p-1)/2 : Miller-Rabin fort en base 2 (rejet), puis p par
+            Pocklington (2^(p-1) ≡ 1 mod p suffit quand q est premier),
+            puis q par Miller-Rabin déterministe (bases de Jaeschke /
+            Sinclair, exactes pour q < 2^64)
+
+Aucun tirage aléatoire : le résultat est prouvé, pas seulement probable.
+L'arithmétique passe par bigint (gmpy2 s'il est installé).
+"""
+
+import math
+from bisect import bisect_left
+from functools import lru_cache
+
+import numpy as np
+
+from bigint import powmod, strong_prp
+from residue_tables import PRIMES, default_provider, primorial
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+WHEEL_LEVEL = 8
+
+# Premiers du crible par tables de groupes (au-delà de la roue)
+GROUP_LIMIT = 200
+
+# Taille maximale d'une table de groupe (octets)
+MAX_GROUP_TABLE = 1 << 20
+
+# Division d'essai par pgcd jusqu'à cette borne (au-delà, le reste du
+# produit coûte plus cher que les tests de Miller-Rabin évités)
+GCD_LIMIT = 1 << 11
+
+# En dessous, réponse par la liste des petits safe primes (≥ 2·GCD_LIMIT + 1)
+SMALL_LIMIT = 1 << 16
+
+# Bases de Miller-Rabin déterministes : (borne, bases) pour n < borne
+DETERMINISTIC_BASES = (
+    (2_047, (2,)),
+    (1_373_653, (2, 3)),
+    (25_326_001, (2, 3, 5)),
+    (3_215_031_751, (2, 3, 5, 7)),
+    (2_152_302_898_747, (2, 3, 5, 7, 11)),
+    (3_474_749_660_383, (2, 3, 5, 7, 11, 13)),
+    (341_550_071_728_321, (2, 3, 5, 7, 11, 13, 17)),
+    (2**64, (2, 325, 9375, 28178, 450775, 9780504, 1795265022)),
+)
+
+
+# ============================================================
+# TABLES
+# ============================================================
+
+def _primes_below(limit):
+    mask = np.ones(limit, dtype=bool)
+    mask[:2] = False
+    for q in range(2, math.isqrt(limit - 1) + 1):
+        if mask[q]:
+            mask[q * q::q] = False
+    return np.flatnonzero(mask).tolist()
+
+
+def _group_table(primes):
+    """Octets 1 / 0 : x mod Q admissible pour chaque premier du groupe (x mod q ∉ {0, 1})."""
+    modulus = math.prod(primes)
+    ok = np.ones(modulus, dtype=np.uint8)
+    for q in primes:
+        ok[0::q] = 0
+        ok[1::q] = 0
+    return modulus, ok.tobytes()
+
+
+@lru_cache(maxsize=1)
+def _tables():
+    """Roue, écarts, tables de groupes, produit du pgcd, petits safe primes (une fois par processus)."""
+    table = np.frombuffer(default_provider.get("safe", WHEEL_LEVEL), dtype=np.uint64)
+    # P_8 ≡ 2 (mod 4) : de r et r + P_8 (mod 2·P_8), un seul est ≡ 3 (mod 4)
+    level_modulus = primorial(WHEEL_LEVEL)
+    modulus = 2 * level_modulus
+    residues = np.sort(np.where(table % np.uint64(4) == 3, table, table + np.uint64(level_modulus)))
+    gaps = np.diff(residues, append=residues[0] + np.uint64(modulus)).tolist()
+
+    groups, current = [], []
+    for q in _primes_below(GROUP_LIMIT):
+        if q <= PRIMES[WHEEL_LEVEL - 1]:
+            continue
+        if current and math.prod(current) * q > MAX_GROUP_TABLE:
+            groups.append(_group_table(current))
+            current = []
+        current.append(q)
+    if current:
+        groups.append(_group_table(current))
+
+    primes = _primes_below(SMALL_LIMIT)
+    prime_set = set(primes)
+    small = [p for p in primes if p > 3 and (p - 1) // 2 in prime_set]
+    product = math.prod(q for q in primes if PRIMES[WHEEL_LEVEL - 1] < q < GCD_LIMIT)
+    return residues.tolist(), gaps, modulus, groups, product, small
+
+
+# ============================================================
+# PREUVE
+# ============================================================
+
+def _bases(n):
+    for bound, bases in DETERMINISTIC_BASES:
+        if n < bound:
+            return bases
+    raise ValueError(f"{n} ≥ 2^64 : pas de bases déterministes")
+
+
+def _proves_safe(p, product):
+    """p (impair, hors des petits premiers) est un safe prime ; preuve complète."""
+    q = p >> 1
+    if math.gcd(product, p * q) != 1:
+        return False
+    if not strong_prp(q, 2):
+        return False
+    # Pocklington, p - 1 = 2q avec q > √p : a = 2, pgcd(2² - 1, p) = 1
+    if powmod(2, p - 1, p) != 1:
+        return False
+    return all(strong_prp(q, a) for a in _bases(q)[1:])
+
+
+def is_safe_prime_64(p):
+    """Test déterministe pour p < 2^65 (même preuve que next_safe_prime)."""
+    residues, _, modulus, groups, product, small = _tables()
+    if p < SMALL_LIMIT:
+        i = bisect_left(small, p)
+        return i < len(small) and small[i] == p
+    r = p % modulus
+    i = bisect_left(residues, r)
+    if i == len(residues) or residues[i] != r:
+        return False
+    return all(table[p % q] for q, table in groups) and _proves_safe(p, product)
+
+
+# ============================================================
+# RECHERCHE
+# ============================================================
+
+def next_safe_prime(n):
+    """Plus petit safe prime ≥ n, pour n < 2^64 (résultat prouvé)."""
+    if n >= 2**64:
+        raise ValueError("n ≥ 2^64 : utiliser safe_prime_pipeline.search_block")
+    residues, gaps, modulus, groups, product, small = _tables()
+    if n <= small[-1]:
+        return small[bisect_left(small, n)]
+    n = max(n, SMALL_LIMIT)
+
+    i = bisect_left(residues, n % modulus)
+    base = n - n % modulus
+    if i == len(residues):
+        i, base = 0, base + modulus
+    x = base + residues[i]
+
+    (first_modulus, first_table), others = groups[0], groups[1:]
+    r = x % first_modulus
+    count = len(gaps)
+    while True:
+        if first_table[r]:
+            for q, table in others:
+                if not table[x % q]:
+                    break
+            else:
+                if _proves_safe(x, product):
+                    return x
+        gap = gaps[i]
+        x += gap
+        r += gap
+        if r >= first_modulus:
+            r %= first_modulus
+        i += 1
+        if i == count:
+            i = 0
+
+
+# ============================================================
+# MESURES
+# ============================================================
+
+def benchmark(bits=(16, 24, 32, 40, 48, 56, 63), queries=500, seed=0):
+    """Latences (s) de next_safe_prime sur des n aléatoires de chaque taille."""
+    import random
+    import time
+
+    _tables()  # Construction hors mesure
+    rng = random.Random(seed)
+    results = {}
+    for b in bits:
+        latencies = []
+        for _ in range(queries):
+            n = rng.getrandbits(b)
+            t0 = time.perf_counter()
+            next_safe_prime(n)
+            latencies.append(time.perf_counter() - t0)
+        latencies.sort()
+        results[b] = latencies
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    from bigint import backend_name
+    from residue_server import _next_safe_prime, percentile
+
+    parser = argparse.ArgumentParser(description="next_safe_prime à faible latence (n < 2^64)")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--compare", type=int, default=20, help="requêtes comparées au chemin par blocs")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    _tables()
+    print("="*70)
+    print(f"NEXT_SAFE_PRIME (n < 2^64) — arithmétique : {backend_name()}")
+    print("="*70)
+    print(f"Tables construites en {1e3 * (time.perf_counter() - t0):.0f} ms "
+          f"(roue 2·P_{WHEEL_LEVEL}, crible < {GROUP_LIMIT}, pgcd < {GCD_LIMIT:,})")
+
+    print(f"\n{'Bits':>5} | {'p50':>10} | {'p99':>10} | {'Blocs p50':>10} | {'Gain':>7} | Résultats")
+    print("-" * 66)
+    rng = random.Random(1)
+    for b, latencies in benchmark(queries=args.queries).items():
+        inputs = [rng.getrandbits(b) for _ in range(args.compare)]
+        reference = []
+        for n in inputs:
+            t1 = time.perf_counter()
+            reference.append((_next_safe_prime(n), time.perf_counter() - t1))
+        same = all(next_safe_prime(n) == p for n, (p, _) in zip(inputs, reference))
+        slow = percentile(sorted(t for _, t in reference), 50)
+        fast = percentile(latencies, 50)
+        print(f"{b:5d} | {1e6 * fast:8.1f}µs | {1e6 * percentile(latencies, 99):8.1f}µs | "
+              f"{1e3 * slow:8.2f}ms | {slow / fast:6.0f}× | {'✓ identiques' if same else '⚠ DIFFÉRENTS'}")
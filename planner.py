@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Planificateur d'exécution selon les ressources
+==============================================
+
+Qu'un niveau tienne en RAM, on le découvrait jusqu'ici par un OOM kill.
+Or toutes les tailles sont connues d'avance :
+
+  Res(P_n) = ∏(p_i - 2)  résidus, 8 octets chacun (uint64)
+
+Pour une opération (lift, count, uniformity, collisions, export), un
+niveau cible et un budget (mémoire, cœurs, disque), le planificateur
+estime pour chaque stratégie la mémoire crête, le disque et la durée
+(débits calibrés), puis choisit :
+
+  in-memory   : niveau entier en RAM (le plus simple)
+  sharded     : relèvement réparti sur les cœurs (work_queue local)
+  out-of-core : flux par blocs (lift_to_file, fichiers de niveau)
+  count-only  : seul le compte ∏(p-2) quand rien d'autre ne tient
+
+Parmi les stratégies qui tiennent dans le budget, la plus rapide est
+retenue ; le plan est affiché avant l'exécution. Les débits par défaut
+ont été mesurés sur une machine de référence ; chaque exécution est
+enregistrée au catalogue (runs « plan_<op>_<stratégie> ») et les
+mesures locales remplacent ensuite les valeurs par défaut.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import time
+from statistics import median
+
+import numpy as np
+
+from residue_tables import DEFAULT_CACHE_DIR, PRIMES, forbidden_residues, primorial, residue_count
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+OPERATIONS = ("lift", "count", "uniformity", "collisions", "export")
+STRATEGIES = ("in-memory", "sharded", "out-of-core", "count-only")
+
+# Niveau de départ des relèvements (table du cache, ≈ 33 Mo en SG)
+BASE_LEVEL = 8
+
+# Uniformité : la table parente (niveau - 1) doit venir du cache
+MAX_UNIFORMITY_LEVEL = BASE_LEVEL + 2
+
+# Résidus par bloc en flux (lifting.DEFAULT_CHUNK_OUTPUT)
+CHUNK = 1 << 22
+
+# Débits par défaut (éléments/s et par cœur), machine de référence
+DEFAULT_THROUGHPUT = {
+    ("lift", "in-memory"): 35e6,
+    ("lift", "sharded"): 15e6,
+    ("lift", "out-of-core"): 20e6,
+    ("export", "in-memory"): 13e6,
+    ("export", "out-of-core"): 50e6,
+    ("uniformity", "in-memory"): 10e6,
+    ("uniformity", "out-of-core"): 12e6,
+    ("collisions", "in-memory"): 6e6,
+    ("collisions", "out-of-core"): 7e6,
+}
+
+# Marge de sécurité appliquée au budget mémoire
+MEMORY_HEADROOM = 0.8
+
+# Mesures locales retenues pour la calibration
+CALIBRATION_RUNS = 5
+
+_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+# ============================================================
+# RESSOURCES
+# ============================================================
+
+def parse_size(text):
+    """« 512M », « 8G », « 1.5T » ou un nombre d'octets."""
+    text = str(text).strip().upper().removesuffix("B").removesuffix("I")
+    unit = text[-1] if text and text[-1] in _UNITS else ""
+    return int(float(text[:len(text) - len(unit)]) * _UNITS[unit])
+
+
+def format_size(n):
+    for unit in ("o", "Ko", "Mo", "Go", "To"):
+        if n < 1024 or unit == "To":
+            return f"{n:,.0f} {unit}" if unit == "o" else f"{n:,.1f} {unit}"
+        n /= 1024
+
+
+def format_duration(seconds):
+    if seconds < 120:
+        return f"{seconds:.1f} s"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def available_memory():
+    """Mémoire disponible (MemAvailable sous Linux, sinon mémoire physique)."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def available_disk(path=DEFAULT_CACHE_DIR):
+    while not os.path.exists(path):
+        path = os.path.dirname(os.path.abspath(path))
+    return shutil.disk_usage(path).free
+
+
+# ============================================================
+# CALIBRATION
+# ============================================================
+
+def calibrate(catalog=None):
+    """
+    Débits par (opération, stratégie), par cœur.
+
+    Médiane des dernières exécutions du catalogue si elles existent,
+    valeurs par défaut sinon.
+    """
+    throughput = dict(DEFAULT_THROUGHPUT)
+    try:
+        if catalog is None:
+            from catalog import default_catalog
+            catalog = default_catalog()
+        for op, strategy in DEFAULT_THROUGHPUT:
+            rates = [run["throughput"] / json.loads(run["params"]).get("cores", 1)
+                     for run in catalog.runs(f"plan_{op}_{strategy}", limit=CALIBRATION_RUNS)
+                     if run["throughput"]]
+            if rates:
+                throughput[op, strategy] = median(rates)
+    except (OSError, sqlite3.Error):
+        pass
+    return throughput
+
+
+# ============================================================
+# MODÈLES DE COÛT
+# ============================================================
+
+def _base_level(level):
+    return max(1, min(level - 1, BASE_LEVEL))
+
+
+def estimates(op, kind, level, cores=1):
+    """
+    Coûts de chaque stratégie applicable : {stratégie: (mémoire, disque, éléments)}.
+
+    Mémoire en octets (crête), disque en octets écrits, éléments traités
+    (résidus produits ou lus) pour l'estimation de durée.
+    """
+    n = residue_count(kind, level)
+    parent = residue_count(kind, level - 1) if level > 1 else 1
+    base = residue_count(kind, _base_level(level)) if level > 1 else 1
+    # Un bloc en flux et ses temporaires (diff, t, produit)
+    chunk = 4 * 8 * CHUNK
+    out = {"count-only": (0, 0, 0)}
+
+    if op == "lift":
+        # Résultat + copie de concaténation
+        out["in-memory"] = (8 * base + 16 * n, 0, n)
+        out["out-of-core"] = (8 * base + chunk, 8 * n, n)
+        if cores > 1:
+            # Chaque worker charge la table de base ; fichiers de shards + assemblage
+            out["sharded"] = (cores * (8 * base + chunk), 16 * n, n)
+    elif op == "export":
+        # Niveau trié sur disque : tri en mémoire, ou relèvement trié en flux
+        # (un uint16 par résidu de base et par nouveau premier)
+        out["in-memory"] = (8 * base + 24 * n, 8 * n, n)
+        out["out-of-core"] = (8 * base + 2 * base * (level - _base_level(level)) + chunk, 8 * n, n)
+    elif op == "uniformity":
+        # Extensions par résidu parent : table, r mod M, indices, comptes
+        if level <= MAX_UNIFORMITY_LEVEL:
+            out["in-memory"] = (24 * n + 16 * parent, 0, n)
+            out["out-of-core"] = (16 * parent + chunk, 0, n)
+    elif op == "collisions":
+        # Créneaux interdits du nouveau premier, pour chaque résidu parent
+        out["in-memory"] = (8 * parent * (2 + len(forbidden_residues(kind, PRIMES[level - 1]))), 0, parent)
+        out["out-of-core"] = (8 * base + chunk, 0, parent)
+    elif op != "count":
+        raise ValueError(f"Opération inconnue : {op} (attendu : {', '.join(OPERATIONS)})")
+    return out
+
+
+def plan(op, kind, level, memory=None, cores=None, disk=None, throughput=None):
+    """
+    Choisit la stratégie et retourne le plan (dict).
+
+    `memory`, `disk` en octets (défaut : disponibles), `cores` (défaut :
+    os.cpu_count()). Le plan liste toutes les stratégies estimées.
+    """
+    if not 1 <= level <= len(PRIMES):
+        raise ValueError(f"Niveau hors limites : {level}")
+    if level < 2 and op != "count":
+        raise ValueError(f"{op} : niveau ≥ 2 requis (relèvement depuis le niveau 1)")
+    if primorial(level) >= 2**64:
+        raise OverflowError(f"P_{level} ≥ 2^64 : résidus non représentables en uint64")
+    memory = available_memory() if memory is None else memory
+    cores = cores or os.cpu_count() or 1
+    disk = available_disk() if disk is None else disk
+    throughput = throughput or calibrate()
+
+    options = []
+    for strategy, (mem, written, items) in estimates(op, kind, level, cores).items():
+        workers = cores if strategy == "sharded" else 1
+        rate = throughput.get((op, strategy))
+        runtime = items / (rate * workers) if items and rate else 0.0
+        fits = mem <= memory * MEMORY_HEADROOM and written <= disk
+        options.append({"strategy": strategy, "memory": mem, "disk": written,
+                        "runtime": runtime, "fits": fits})
+    options.sort(key=lambda o: STRATEGIES.index(o["strategy"]))
+
+    if op == "count":
+        chosen = options[-1]
+        reason = "compte exact par la formule ∏(p-2)"
+    else:
+        feasible = [o for o in options if o["fits"] and o["strategy"] != "count-only"]
+        if feasible:
+            chosen = min(feasible, key=lambda o: o["runtime"])
+            reason = "la plus rapide dans le budget"
+        elif op == "uniformity" and level > MAX_UNIFORMITY_LEVEL:
+            chosen = options[-1]
+            reason = f"uniformité limitée au niveau {MAX_UNIFORMITY_LEVEL} (table parente du cache)"
+        else:
+            chosen = options[-1]
+            reason = "aucune stratégie complète ne tient dans le budget"
+
+    return {"op": op, "kind": kind, "level": level, "modulus": primorial(level),
+            "residues": residue_count(kind, level), "memory_budget": memory,
+            "cores": cores, "disk_budget": disk, "strategy": chosen["strategy"],
+            "reason": reason, "estimate": chosen, "options": options}
+
+
+def print_plan(p):
+    """Affiche le plan et les alternatives estimées."""
+    print("\n" + "="*90)
+    print(f"PLAN : {p['op']} {p['kind']} niveau {p['level']} (mod {p['modulus']:,}, "
+          f"{p['residues']:,} résidus)")
+    print("="*90)
+    print(f"\n  Budget : {format_size(p['memory_budget'])} RAM, {p['cores']} cœur(s), "
+          f"{format_size(p['disk_budget'])} disque")
+    print(f"\n  {'Stratégie':<12} | {'Mémoire crête':>14} | {'Disque':>12} | {'Durée':>10} | Budget")
+    print("  " + "-" * 66)
+    for o in p["options"]:
+        mark = "→" if o["strategy"] == p["strategy"] else " "
+        print(f"{mark} {o['strategy']:<12} | {format_size(o['memory']):>14} | "
+              f"{format_size(o['disk']):>12} | {format_duration(o['runtime']):>10} | "
+              f"{'✓' if o['fits'] else '⚠ dépassé'}")
+    print(f"\n  Choix : {p['strategy']} ({p['reason']})")
+
+
+# ============================================================
+# EXÉCUTION
+# ============================================================
+
+def _base_table(kind, level):
+    from residue_tables import default_provider
+
+    return np.frombuffer(default_provider.get(kind, level), dtype=np.uint64)
+
+
+def _level_chunks(kind, level, path, whole=False):
+    """
+    Blocs du niveau : fichier existant, table du cache, ou relèvement en flux.
+
+    Avec `whole`, un seul bloc : le niveau entier en mémoire.
+    """
+    from level_diff import iter_level_chunks
+    from lifting import lift_chunks, lift_levels
+
+    if whole:
+        if path and os.path.exists(path):
+            return [np.fromfile(path, dtype="<u8")]
+        if level <= BASE_LEVEL + 1:
+            return [_base_table(kind, level)]
+        return [lift_levels(_base_table(kind, _base_level(level)), _base_level(level), level, kind)]
+    if path and os.path.exists(path):
+        return iter_level_chunks(path, CHUNK)
+    if level <= BASE_LEVEL + 1:
+        return iter_level_chunks(f"{kind}:{level}", CHUNK)
+    base = _base_level(level)
+    return lift_chunks(_base_table(kind, base), primorial(base), PRIMES[base:level], kind, CHUNK)
+
+
+def _lift(p, path):
+    from lifting import lift_levels, lift_to_file
+
+    kind, level = p["kind"], p["level"]
+    base = _base_level(level)
+    primes = PRIMES[base:level]
+    if p["strategy"] == "in-memory":
+        table = _base_table(kind, level) if level <= BASE_LEVEL + 1 else \
+            lift_levels(_base_table(kind, base), base, level, kind)
+        if path:
+            table.astype("<u8", copy=False).tofile(path)
+        return {"count": len(table)}, len(table)
+    if p["strategy"] == "out-of-core":
+        written = lift_to_file(_base_table(kind, base), primorial(base), primes, kind,
+                               path or f"{kind}_{primorial(level)}.u64")
+        return {"count": written}, written
+
+    import tempfile
+    from multiprocessing import Process
+
+    from work_queue import concatenate_lift, plan_lift, run_worker
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path)) if path else None) as root:
+        plan_lift(root, kind, base, level, shards=4 * p["cores"])
+        workers = [Process(target=run_worker, args=(root,)) for _ in range(p["cores"])]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        report = concatenate_lift(root, path or f"{kind}_{primorial(level)}.u64")
+    return {"count": report["count"], "fingerprint": report["fingerprint"]}, report["count"]
+
+
+def _export(p, path):
+    from fingerprint import fingerprint, write_metadata
+    from lifting import lift_levels, lift_to_file
+
+    kind, level = p["kind"], p["level"]
+    base = _base_level(level)
+    path = path or f"{kind}_{primorial(level)}.u64"
+    if p["strategy"] == "in-memory":
+        table = lift_levels(_base_table(kind, base), base, level, kind)
+        table.sort()
+        table.astype("<u8", copy=False).tofile(path)
+        write_metadata(path, kind, primorial(level), fingerprint(table), ordered=True)
+        return {"count": len(table), "path": path}, len(table)
+    written = lift_to_file(_base_table(kind, base), primorial(base), PRIMES[base:level],
+                           kind, path, ordered=True)
+    return {"count": written, "path": path}, written
+
+
+def _uniformity(p, path):
+    kind, level = p["kind"], p["level"]
+    if level > MAX_UNIFORMITY_LEVEL:
+        raise ValueError(f"Uniformité : niveau ≤ {MAX_UNIFORMITY_LEVEL} seulement (table parente du cache)")
+    parent = _base_table(kind, level - 1)
+    modulus = np.uint64(primorial(level - 1))
+    counts = np.zeros(len(parent), dtype=np.int64)
+    items = 0
+    for chunk in _level_chunks(kind, level, path, whole=p["strategy"] == "in-memory"):
+        counts += np.bincount(np.searchsorted(parent, chunk % modulus), minlength=len(parent))
+        items += len(chunk)
+    expected = PRIMES[level - 1] - len(forbidden_residues(kind, PRIMES[level - 1]))
+    return {"min": int(counts.min()), "max": int(counts.max()), "expected": expected,
+            "uniform": bool(counts.min() == counts.max() == expected)}, items
+
+
+def _collisions(p, path):
+    kind, level = p["kind"], p["level"]
+    q = PRIMES[level - 1]
+    modulus = primorial(level - 1)
+    inv = np.int64(pow(modulus % q, -1, q))
+    forbidden = forbidden_residues(kind, q)
+    collisions = items = 0
+    for chunk in _level_chunks(kind, level - 1, None, whole=p["strategy"] == "in-memory"):
+        r = (chunk % np.uint64(q)).astype(np.int64)
+        # Tour t interdit par le créneau f : (f - r)·M⁻¹ mod q
+        slots = np.stack([((f - r) % q) * inv % q for f in forbidden])
+        distinct = (np.diff(np.sort(slots, axis=0), axis=0) != 0).sum(axis=0) + 1
+        collisions += int((distinct < len(forbidden)).sum())
+        items += len(chunk)
+    return {"prime": q, "parents": items, "collisions": collisions}, items
+
+
+def execute(p, path=None, catalog=None):
+    """
+    Exécute un plan ; retourne le résultat (dict).
+
+    La durée est enregistrée au catalogue (run « plan_<op>_<stratégie> »),
+    ce qui calibre les estimations suivantes.
+    """
+    op, strategy = p["op"], p["strategy"]
+    if strategy == "count-only":
+        result = {"count": residue_count(p["kind"], p["level"])}
+        if op != "count":
+            result["count_only"] = True
+        return result
+
+    runner = {"lift": _lift, "export": _export, "uniformity": _uniformity,
+              "collisions": _collisions}[op]
+    t0 = time.time()
+    result, items = runner(p, path)
+    elapsed = time.time() - t0
+    try:
+        if catalog is None:
+            from catalog import default_catalog
+            catalog = default_catalog()
+        catalog.record_run(f"plan_{op}_{strategy}", elapsed, items,
+                           {"kind": p["kind"], "level": p["level"],
+                            "cores": p["cores"] if strategy == "sharded" else 1})
+    except (OSError, sqlite3.Error):
+        pass
+    result["elapsed"] = elapsed
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Plan d'exécution selon les ressources")
+    parser.add_argument("op", choices=OPERATIONS)
+    parser.add_argument("level", type=int)
+    parser.add_argument("--kind", choices=("sg", "safe"), default="sg")
+    parser.add_argument("--memory", type=parse_size, help="ex. 4G (défaut : disponible)")
+    parser.add_argument("--cores", type=int)
+    parser.add_argument("--disk", type=parse_size)
+    parser.add_argument("--strategy", choices=STRATEGIES, help="impose une stratégie")
+    parser.add_argument("--output", help="fichier .u64 (lift, export) ou niveau existant (uniformity)")
+    parser.add_argument("--run", action="store_true", help="exécute le plan après affichage")
+    args = parser.parse_args()
+
+    p = plan(args.op, args.kind, args.level, args.memory, args.cores, args.disk)
+    if args.strategy:
+        forced = next((o for o in p["options"] if o["strategy"] == args.strategy), None)
+        if forced is None:
+            parser.error(f"stratégie {args.strategy} non applicable à {args.op}")
+        p.update(strategy=args.strategy, estimate=forced, reason="imposée")
+    print_plan(p)
+
+    if args.run:
+        print(f"\nExécution ({p['strategy']})…")
+        result = execute(p, args.output)
+        for key, value in result.items():
+            number = isinstance(value, int) and not isinstance(value, bool)
+            print(f"  {key:<12} : {value:,}" if number else f"  {key:<12} : {value}")
+        if "elapsed" in result:
+            estimated = p["estimate"]["runtime"]
+            print(f"\n✓ Terminé en {format_duration(result['elapsed'])} "
+                  f"(estimé : {format_duration(estimated)})")
+        elif result.get("count_only"):
+            print("\n⚠ Budget insuffisant : seul le compte ∏(p-2) est fourni")
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Vérification de cohérence entre deux niveaux stockés
+====================================================
+
+analyze_uniformity n'échantillonne que 100,000 résidus. Ici deux niveaux
+stockés (fichiers uint64 triés, ex. cache .u64 ou lift_to_file ordered)
+sont comparés intégralement, en flux, mémoire bornée :
+
+  Passe 1 (blocs des deux niveaux) :
+    - valeurs hors de [0, M)
+    - ordre strictement croissant (fichier trié, sans doublon)
+    - admissibilité (filtre factorisé au niveau du fichier)
+    Un parent hors intervalle ou non trié rend la passe 2 sans objet :
+    il est signalé en erreur et la passe 2 n'est pas lancée.
+
+  Passe 2 (tranches de parents) :
+    Pour un intervalle de parents [a, b), les enfants r + M·t se trouvent,
+    pour chaque t < Q, dans l'intervalle contigu [t·M + a, t·M + b) du
+    fichier enfant trié (recherche binaire sur le mmap). On en déduit :
+    - couverture : chaque parent atteint
+    - multiplicités : exactement ∏(p - 2) enfants par parent
+    - orphelins : enfants dont la projection n'est pas un parent
+
+  Totaux comparés à la forme close ∏(p_i - 2) (fichier tronqué).
+
+Les deux passes se répartissent sur un pool de workers attachés aux
+niveaux en mémoire partagée (shared_levels).
+"""
+
+from collections import Counter
+
+import numpy as np
+
+from admissibility import admissible_mask
+from residue_tables import PRIMES, level_of, residue_count
+from shared_levels import chunk_ranges, pool_map, share_file, share_level_file, worker_level
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+# Éléments par tâche de la passe 1
+CHUNK_SIZE = 1 << 22
+
+# Parents par tâche de la passe 2
+PARENT_BUCKET = 1 << 16
+
+# Exemples de défauts conservés par catégorie
+MAX_EXAMPLES = 10
+
+
+# ============================================================
+# TÂCHES (exécutées dans les workers)
+# ============================================================
+
+def _scan_level(task):
+    """Passe 1 sur level[start:end] (0 : enfant, 1 : parent) : bornes, ordre, admissibilité."""
+    which, start, end, modulus, level, kind = task
+    values = worker_level(which)
+    block = np.asarray(values[start:end])
+    # Inclure l'élément précédent pour vérifier l'ordre à la jonction
+    prev = int(values[start - 1]) if start > 0 else -1
+
+    out_of_range = np.flatnonzero(block >= np.uint64(modulus))
+    diffs = np.diff(block.astype(np.int64)) if len(block) > 1 else np.empty(0, np.int64)
+    unsorted = np.flatnonzero(diffs <= 0) + 1
+    if len(block) and int(block[0]) <= prev:
+        unsorted = np.concatenate([[0], unsorted])
+    inadmissible = np.flatnonzero(~admissible_mask(block, level, kind))
+
+    def examples(idx):
+        return [(start + int(i), int(block[i])) for i in idx[:MAX_EXAMPLES]]
+
+    return {
+        "level": which,
+        "out_of_range": (len(out_of_range), examples(out_of_range)),
+        "unsorted": (len(unsorted), examples(unsorted)),
+        "inadmissible": (len(inadmissible), examples(inadmissible)),
+    }
+
+
+def _project_bucket(task):
+    """Passe 2 sur les parents [i0, i1) : multiplicités et orphelins."""
+    i0, i1, parent_modulus, q, factor = task
+    child, parent = worker_level(0), worker_level(1)
+    parents = np.asarray(parent[i0:i1])
+    # Intervalle de valeurs couvert par la tranche (contigu d'une tâche à l'autre)
+    low = int(parents[0]) if i0 > 0 else 0
+    high = int(parent[i1]) if i1 < len(parent) else parent_modulus
+
+    counts = np.zeros(len(parents), dtype=np.int64)
+    orphans = 0
+    orphan_examples = []
+
+    for t in range(q):
+        offset = parent_modulus * t
+        lo = int(np.searchsorted(child, np.uint64(offset + low)))
+        hi = int(np.searchsorted(child, np.uint64(offset + high)))
+        if lo == hi:
+            continue
+        projected = np.asarray(child[lo:hi]) - np.uint64(offset)
+        idx = np.searchsorted(parents, projected)
+        idx_clipped = np.minimum(idx, len(parents) - 1)
+        hit = parents[idx_clipped] == projected
+        counts += np.bincount(idx_clipped[hit], minlength=len(parents))
+        missed = np.flatnonzero(~hit)
+        orphans += len(missed)
+        for i in missed[:MAX_EXAMPLES - len(orphan_examples)]:
+            orphan_examples.append((lo + int(i), int(projected[i]) + offset))
+
+    multiplicities = Counter(counts.tolist())
+    bad = np.flatnonzero(counts != factor)
+    return {
+        "multiplicities": multiplicities,
+        "bad_parents": [(int(parents[i]), int(counts[i])) for i in bad[:MAX_EXAMPLES]],
+        "orphans": (orphans, orphan_examples),
+        "children": int(counts.sum()) + orphans,
+    }
+
+
+# ============================================================
+# VÉRIFICATION
+# ============================================================
+
+def _merge(parts, key):
+    total, examples = 0, []
+    for part in parts:
+        n, ex = part[key]
+        total += n
+        examples.extend(ex[:MAX_EXAMPLES - len(examples)])
+    return total, examples
+
+
+def check_projection(child_handle, parent_handle, kind="sg", workers=1):
+    """
+    Vérifie que le niveau enfant se projette exactement sur le parent.
+
+    Les handles décrivent deux niveaux triés (shared_levels.share_file,
+    share_level_file ou SharedLevel). Retourne un rapport (dict).
+    """
+    child_modulus, parent_modulus = child_handle.modulus, parent_handle.modulus
+    if child_modulus % parent_modulus:
+        raise ValueError(f"{parent_modulus:,} ne divise pas {child_modulus:,}")
+    q = child_modulus // parent_modulus
+    child_level, parent_level = level_of(child_modulus), level_of(parent_modulus)
+    factor = 1
+    for p in PRIMES[parent_level:child_level]:
+        factor *= p - 2
+
+    handles = (child_handle, parent_handle)
+    # Fichier vide : rien à projeter (et pas de mmap possible)
+    errors = [f"Fichier {name} vide ({handle.source})"
+              for name, handle in (("enfant", child_handle), ("parent", parent_handle))
+              if handle.length == 0]
+
+    scan_tasks = [(which, a, b, handle.modulus, level, kind)
+                  for which, (handle, level) in enumerate(((child_handle, child_level),
+                                                           (parent_handle, parent_level)))
+                  for a, b in chunk_ranges(handle.length, max(1, handle.length // CHUNK_SIZE))]
+    scans = pool_map(_scan_level, handles, scan_tasks, workers) if not errors else []
+    child_scans = [part for part in scans if part["level"] == 0]
+    parent_scans = [part for part in scans if part["level"] == 1]
+
+    # La passe 2 suppose un parent trié et dans [0, M_parent)
+    for key, label in (("out_of_range", "hors intervalle"), ("unsorted", "non trié")):
+        n, examples = _merge(parent_scans, key)
+        if n:
+            index, value = examples[0]
+            errors.append(f"Parent {label} : {n:,} valeur(s), ex. index {index:,} : {value:,}")
+
+    bucket_tasks = [(a, b, parent_modulus, q, factor)
+                    for a, b in chunk_ranges(parent_handle.length,
+                                             max(1, parent_handle.length // PARENT_BUCKET))]
+    buckets = pool_map(_project_bucket, handles, bucket_tasks, workers) if not errors else []
+
+    multiplicities = Counter()
+    bad_parents = []
+    for part in buckets:
+        multiplicities.update(part["multiplicities"])
+        bad_parents.extend(part["bad_parents"][:MAX_EXAMPLES - len(bad_parents)])
+
+    report = {
+        "kind": kind,
+        "child_modulus": child_modulus,
+        "parent_modulus": parent_modulus,
+        "factor": factor,
+        "child_count": child_handle.length,
+        "parent_count": parent_handle.length,
+        "child_expected": residue_count(kind, child_level),
+        "parent_expected": residue_count(kind, parent_level),
+        "out_of_range": _merge(child_scans, "out_of_range"),
+        "unsorted": _merge(child_scans, "unsorted"),
+        "inadmissible": _merge(child_scans, "inadmissible"),
+        "parent_inadmissible": _merge(parent_scans, "inadmissible"),
+        "orphans": _merge(buckets, "orphans"),
+        "multiplicities": dict(sorted(multiplicities.items())),
+        "uncovered_parents": multiplicities.get(0, 0),
+        "bad_parents": bad_parents,
+        "accounted_children": sum(part["children"] for part in buckets),
+        "errors": errors,
+    }
+    report["consistent"] = (
+        not errors
+        and report["child_count"] == report["child_expected"]
+        and report["parent_count"] == report["parent_expected"]
+        and report["accounted_children"] == report["child_count"]
+        and report["multiplicities"] == {factor: report["parent_count"]}
+        and not any(report[k][0] for k in ("out_of_range", "unsorted", "inadmissible",
+                                            "parent_inadmissible", "orphans"))
+    )
+    return report
+
+
+def check_levels(kind, child_level, parent_level, workers=1):
+    """check_projection sur deux niveaux du cache disque."""
+    return check_projection(share_level_file(kind, child_level),
+                            share_level_file(kind, parent_level), kind, workers)
+
+
+def check_files(child_path, parent_path, child_modulus, parent_modulus, kind="sg", workers=1):
+    """check_projection sur deux fichiers uint64 bruts."""
+    return check_projection(share_file(child_path, child_modulus),
+                            share_file(parent_path, parent_modulus), kind, workers)
+
+
+def print_report(report):
+    """Affiche un rapport de check_projection."""
+    print("\n" + "="*90)
+    print(f"COHÉRENCE mod {report['child_modulus']:,} → mod {report['parent_modulus']:,} "
+          f"({report['kind']})")
+    print("="*90)
+
+    def line(label, got, expected):
+        mark = "✓" if got == expected else "✗"
+        print(f"  {mark} {label:<28} : {got:,} (attendu {expected:,})")
+
+    print()
+    for error in report["errors"]:
+        print(f"  ✗ {error}")
+    line("Résidus enfant", report["child_count"], report["child_expected"])
+    line("Résidus parent", report["parent_count"], report["parent_expected"])
+    line("Enfants rattachés", report["accounted_children"], report["child_count"])
+    line("Parents non couverts", report["uncovered_parents"], 0)
+
+    for key, label in (("out_of_range", "Hors intervalle"), ("unsorted", "Non triés / doublons"),
+                       ("inadmissible", "Non admissibles"),
+                       ("parent_inadmissible", "Parents non admissibles"), ("orphans", "Orphelins")):
+        n, examples = report[key]
+        line(label, n, 0)
+        for index, value in examples:
+            print(f"      index {index:>14,} : {value:,}")
+
+    print(f"\n  Multiplicités (attendu {report['factor']} pour chaque parent) :")
+    for m, n in report["multiplicities"].items():
+        print(f"    {m:3d} extensions : {n:,} parents")
+    for parent, m in report["bad_parents"]:
+        print(f"      parent {parent:,} : {m} extensions")
+
+    if report["consistent"]:
+        print("\n✓✓✓ PROJECTION EXACTE : niveaux cohérents")
+    else:
+        print("\n⚠ INCOHÉRENCES DÉTECTÉES")
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    parser = argparse.ArgumentParser(description="Cohérence entre deux niveaux stockés")
+    parser.add_argument("--kind", choices=("sg", "safe"), default="sg")
+    parser.add_argument("--child-level", type=int, default=9)
+    parser.add_argument("--parent-level", type=int, default=8)
+    parser.add_argument("--child-file")
+    parser.add_argument("--parent-file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    from residue_tables import primorial
+
+    t0 = time.time()
+    if args.child_file:
+        report = check_files(args.child_file, args.parent_file, primorial(args.child_level),
+                             primorial(args.parent_level), args.kind, args.workers)
+    else:
+        report = check_levels(args.kind, args.child_level, args.parent_level, args.workers)
+    print_report(report)
+    print(f"\nTemps : {time.time() - t0:.1f}s")
+    raise SystemExit(0 if report["consistent"] else 1)
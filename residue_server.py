@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Serveur local de requêtes safe primes / résidus
+===============================================
+
+Serveur HTTP longue durée (localhost) : les tables de niveaux sont
+chargées une fois au démarrage (memory-map des fichiers du cache disque),
+puis chaque requête ne paie que son propre calcul.
+
+Endpoints (POST, corps JSON {"values": [...], "kind": ..., "level": ...}) :
+
+  /next_safe_prime   plus petit safe prime ≥ n
+  /is_safe           p et (p-1)/2 premiers
+  /is_sg             p et 2p+1 premiers
+  /admissible        n mod P_k dans la table `kind`
+  /rank              nombre d'entiers admissibles dans [0, n)
+  /unrank            i-ème entier admissible (à partir de 0)
+
+  GET /levels        nombre de résidus par (kind, niveau)
+
+Les requêtes concurrentes sont regroupées en micro-lots (même endpoint,
+même niveau) traités d'un seul appel vectorisé.
+
+Usage :
+  python residue_server.py serve [--port 8765] [--max-level 8]
+  python residue_server.py bench [--requests 2000] [--concurrency 16]
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from admissibility import admissible_mask, is_admissible
+from generate_safe_primes_validator import is_safe_prime, miller_rabin
+from next_safe_prime import next_safe_prime
+from residue_tables import KINDS, default_provider, primorial
+from safe_prime_pipeline import WHEEL_MODULUS, search_block, small_safe_primes
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Niveaux chargés au démarrage : jusqu'à P_8 = 9,699,690 (378,675 résidus)
+DEFAULT_MAX_LEVEL = 8
+
+# Micro-lots : au plus MAX_BATCH valeurs, ou MAX_DELAY secondes d'attente
+MAX_BATCH = 4096
+MAX_DELAY = 0.001
+
+# Tours de roue par bloc pour /next_safe_prime
+NEXT_BLOCK_TURNS = 16
+
+
+# ============================================================
+# TABLES DE NIVEAUX
+# ============================================================
+
+def open_level_store(kind, level, provider=default_provider):
+    """
+    Table triée du niveau, en memory-map si présente dans le cache disque.
+
+    Les petites tables (non persistées) sont simplement copiées en RAM.
+    """
+    table = provider.get(kind, level)
+    path = provider.cache_path(kind, primorial(level))
+    if provider.cache_dir is not None and os.path.exists(path):
+        return np.memmap(path, dtype=np.uint64, mode="r")
+    return np.asarray(table, dtype=np.uint64)
+
+
+class LevelStores:
+    """Tables de tous les (kind, niveau) ≤ max_level, ouvertes une fois."""
+
+    def __init__(self, max_level=DEFAULT_MAX_LEVEL):
+        self.max_level = max_level
+        self.tables = {
+            (kind, k): open_level_store(kind, k)
+            for kind in KINDS for k in range(1, max_level + 1)
+        }
+
+    def get(self, kind, level):
+        try:
+            return self.tables[(kind, level)]
+        except KeyError:
+            raise ValueError(f"Niveau {level} non chargé (max : {self.max_level})") from None
+
+    def counts(self):
+        return {
+            kind: {str(primorial(k)): len(self.tables[(kind, k)])
+                   for k in range(1, self.max_level + 1)}
+            for kind in KINDS
+        }
+
+
+# ============================================================
+# TRAITEMENTS PAR LOT
+# ============================================================
+
+def _rank(table, modulus, values):
+    """Nombre d'admissibles dans [0, n) : cycles complets + recherche."""
+    quotients, residues = zip(*(divmod(n, modulus) for n in values))
+    idx = np.searchsorted(table, np.asarray(residues, dtype=np.uint64), side="left")
+    return [q * len(table) + int(i) for q, i in zip(quotients, idx)]
+
+
+def _unrank(table, modulus, values):
+    """i-ème admissible : (i // Res) × P_k + table[i mod Res]."""
+    quotients, positions = zip(*(divmod(i, len(table)) for i in values))
+    residues = table[np.asarray(positions, dtype=np.int64)]
+    return [q * modulus + int(r) for q, r in zip(quotients, residues)]
+
+
+def _next_safe_prime(n):
+    small = small_safe_primes(n)
+    if small:
+        return small[0]
+    base = (n // WHEEL_MODULUS) * WHEEL_MODULUS
+    while True:
+        found = search_block(base, NEXT_BLOCK_TURNS, start=n)
+        if found:
+            return found[0]
+        base += NEXT_BLOCK_TURNS * WHEEL_MODULUS
+
+
+def process_batch(stores, op, kind, level, values):
+    """Traite un micro-lot homogène ; retourne une liste de résultats."""
+    if op == "is_safe":
+        return [is_safe_prime(n) for n in values]
+    if op == "is_sg":
+        return [miller_rabin(n) and miller_rabin(2 * n + 1) for n in values]
+    if op == "next_safe_prime":
+        # Chemin scalaire prouvé sous 2^64, recherche par blocs au-delà
+        return [next_safe_prime(n) if n < 2**64 else _next_safe_prime(n) for n in values]
+
+    if op == "admissible":
+        if max(values) < 2**64:
+            return admissible_mask(values, level, kind).tolist()
+        return [is_admissible(n, level, kind) for n in values]
+
+    table = stores.get(kind, level)
+    if op == "rank":
+        return _rank(table, primorial(level), values)
+    if op == "unrank":
+        return _unrank(table, primorial(level), values)
+    raise ValueError(f"Opération inconnue : {op!r}")
+
+
+OPERATIONS = ("next_safe_prime", "is_safe", "is_sg", "admissible", "rank", "unrank")
+
+# Opérations coûteuses (Miller-Rabin) : envoyées au pool de processus
+HEAVY_OPERATIONS = ("next_safe_prime", "is_safe", "is_sg")
+
+
+def _heavy_batch(op, kind, level, values):
+    """Exécuté dans un processus du pool (pas besoin des tables)."""
+    return process_batch(None, op, kind, level, values)
+
+
+# ============================================================
+# MICRO-LOTS
+# ============================================================
+
+class MicroBatcher:
+    """
+    Regroupe les requêtes concurrentes par clé (op, kind, level).
+
+    Un thread unique vide la file pendant au plus MAX_DELAY secondes (ou
+    MAX_BATCH valeurs), concatène les valeurs de même clé, appelle
+    process_batch une fois par clé et redistribue les résultats. Les lots
+    coûteux (HEAVY_OPERATIONS) sont répartis sur un pool de processus
+    sans bloquer ce thread.
+    """
+
+    def __init__(self, stores, max_batch=MAX_BATCH, max_delay=MAX_DELAY, workers=None):
+        self.stores = stores
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.workers = workers or os.cpu_count() or 1
+        self.batches = 0
+        self.requests = 0
+        self._pool = ProcessPoolExecutor(self.workers)
+        self._waiters = ThreadPoolExecutor(self.workers)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, op, kind, level, values):
+        future = Future()
+        self._queue.put(((op, kind, level), values, future))
+        return future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][1])
+            deadline = time.perf_counter() + self.max_delay
+            while size < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[1])
+
+            groups = {}
+            for key, values, future in pending:
+                groups.setdefault(key, []).append((values, future))
+
+            for key, items in groups.items():
+                if key[0] in HEAVY_OPERATIONS:
+                    self._waiters.submit(self._complete, key, items)
+                else:
+                    self._complete(key, items)
+
+    def _complete(self, key, items):
+        """Traite un groupe et résout les futures de ses requêtes."""
+        op, kind, level = key
+        merged = [v for values, _ in items for v in values]
+        try:
+            results = self._compute(op, kind, level, merged)
+        except Exception as exc:
+            # Une valeur fautive ne doit pas faire échouer les autres clients :
+            # chaque requête du groupe est rejouée seule
+            if len(items) == 1:
+                items[0][1].set_exception(exc)
+                return
+            for values, future in items:
+                try:
+                    future.set_result(self._compute(op, kind, level, values))
+                except Exception as item_exc:
+                    future.set_exception(item_exc)
+        else:
+            pos = 0
+            for values, future in items:
+                future.set_result(results[pos:pos + len(values)])
+                pos += len(values)
+        self.batches += 1
+        self.requests += len(items)
+
+    def _compute(self, op, kind, level, values):
+        if op in HEAVY_OPERATIONS:
+            size = -(-len(values) // self.workers)
+            chunks = [values[i:i + size] for i in range(0, len(values), size)]
+            futures = [self._pool.submit(_heavy_batch, op, kind, level, c) for c in chunks]
+            return [r for f in futures for r in f.result()]
+        return process_batch(self.stores, op, kind, level, values)
+
+
+# ============================================================
+# SERVEUR HTTP
+# ============================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "ResidueServer/1.0"
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/levels":
+            self._reply(200, self.server.stores.counts())
+        else:
+            self._reply(404, {"error": f"Endpoint inconnu : {self.path}"})
+
+    def do_POST(self):
+        op = self.path.strip("/")
+        if op not in OPERATIONS:
+            self._reply(404, {"error": f"Endpoint inconnu : {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            values = [int(v) for v in request.get("values", [])]
+            kind = request.get("kind", "safe")
+            level = int(request.get("level", 5))
+            if kind not in KINDS:
+                raise ValueError(f"Type inconnu : {kind!r}")
+            negative = [v for v in values if v < 0]
+            if negative:
+                raise ValueError(f"Valeurs négatives : {negative[:5]}")
+            if not values:
+                self._reply(200, {"results": []})
+                return
+            future = self.server.batcher.submit(op, kind, level, values)
+        except (ValueError, TypeError) as exc:
+            self._reply(400, {"error": str(exc)})
+            return
+        try:
+            results = future.result()
+        except (ValueError, TypeError, OverflowError) as exc:
+            self._reply(400, {"error": str(exc)})
+            return
+        except Exception as exc:
+            self._reply(500, {"error": f"{type(exc).__name__}: {exc}"})
+            return
+        self._reply(200, {"results": results})
+
+    def log_message(self, format, *args):
+        pass  # Pas de journal par requête
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # Rafales de clients concurrents
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, max_level=DEFAULT_MAX_LEVEL):
+    """Crée le serveur avec tables pré-chargées (sans le démarrer)."""
+    server = _Server((host, port), _Handler)
+    server.stores = LevelStores(max_level)
+    server.batcher = MicroBatcher(server.stores)
+    return server
+
+
+# ============================================================
+# CLIENT DE CHARGE
+# ============================================================
+
+def query(url, op, values, kind="safe", level=5, timeout=30):
+    """Requête unique ; retourne la liste des résultats."""
+    from urllib.request import Request, urlopen
+
+    body = json.dumps({"values": values, "kind": kind, "level": level}).encode()
+    request = Request(f"{url}/{op}", body, {"Content-Type": "application/json"})
+    with urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())["results"]
+
+
+def load_test(url, op="admissible", requests=2000, concurrency=16, batch=1,
+              level=8, kind="safe", seed=None):
+    """
+    Envoie `requests` requêtes depuis `concurrency` threads.
+
+    Retourne les latences triées (secondes) et le débit (requêtes/s).
+    """
+    import random
+
+    rng = random.Random(seed)
+    payloads = [[rng.randrange(10**12, 10**15) for _ in range(batch)] for _ in range(requests)]
+    latencies = []
+    lock = threading.Lock()
+    work = iter(payloads)
+
+    def client():
+        for values in work:
+            t0 = time.perf_counter()
+            query(url, op, values, kind, level)
+            elapsed = time.perf_counter() - t0
+            with lock:
+                latencies.append(elapsed)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    latencies.sort()
+    return latencies, len(latencies) / wall
+
+
+def percentile(sorted_values, pct):
+    """Percentile (plus proche rang) d'une liste triée."""
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def print_load_test(op, latencies, throughput):
+    print(f"\n{op:<18} {len(latencies):>8,} req  {throughput:>10,.0f} req/s  "
+          f"p50 {1e3*percentile(latencies, 50):>8.3f} ms  "
+          f"p99 {1e3*percentile(latencies, 99):>8.3f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serveur local safe primes / résidus")
+    parser.add_argument("command", choices=("serve", "bench"))
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-level", type=int, default=DEFAULT_MAX_LEVEL)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        t0 = time.perf_counter()
+        server = make_server(args.host, args.port, args.max_level)
+        print(f"✓ Tables P_1..P_{args.max_level} chargées en {time.perf_counter() - t0:.2f}s")
+        print(f"✓ Écoute sur http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        url = f"http://{args.host}:{args.port}"
+        print("="*70)
+        print(f"TEST DE CHARGE : {url} ({args.concurrency} clients, lots de {args.batch})")
+        print("="*70)
+        for op, n in (("admissible", args.requests), ("rank", args.requests),
+                      ("unrank", args.requests), ("is_safe", args.requests),
+                      ("next_safe_prime", max(1, args.requests // 10))):
+            latencies, throughput = load_test(url, op, n, args.concurrency,
+                                              args.batch, min(args.max_level, 8))
+            print_load_test(op, latencies, throughput)
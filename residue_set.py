@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+ResidueSet : ensemble compact de résidus d'un niveau
+====================================================
+
+Un set Python coûte ~60-70 octets par résidu ; ici un niveau est un
+tableau NumPy trié sans doublons : 4 octets par résidu si le modulus
+tient sur 32 bits (jusqu'à P_9 = 223,092,870), 8 octets sinon.
+
+  - len, in (recherche binaire), itération croissante
+  - projection vectorisée vers un sous-modulus (r mod MOD_PREV), avec
+    multiplicités des parents
+  - union / intersection / différence par fusion de tableaux triés
+"""
+
+import numpy as np
+
+from residue_tables import primorial, residue_table
+
+
+class ResidueSet:
+    """Résidus triés mod `modulus`, stockés dans un tableau NumPy."""
+
+    __slots__ = ("modulus", "_values")
+
+    def __init__(self, values, modulus, assume_sorted=False):
+        self.modulus = modulus
+        dtype = np.uint32 if modulus <= 2**32 else np.uint64
+        if isinstance(values, (set, frozenset)):
+            values = list(values)
+        if not (assume_sorted and isinstance(values, np.ndarray)
+                and values.dtype in (np.uint32, np.uint64)):
+            values = np.asarray(values)
+            # Bornes vérifiées avant la conversion (qui tronquerait en silence)
+            if values.size and (values.min() < 0 or values.max() >= modulus):
+                bad = values.min() if values.min() < 0 else values.max()
+                raise ValueError(f"Résidu {int(bad):,} hors de [0, {modulus:,})")
+            values = values.astype(dtype, copy=False)  # Tableaux externes : sans copie
+        if not assume_sorted:
+            values = np.unique(values)
+        if len(values) and int(values[-1]) >= modulus:
+            raise ValueError(f"Résidu {int(values[-1]):,} ≥ modulus {modulus:,}")
+        values = values.view()  # Ne pas figer le tableau de l'appelant
+        values.flags.writeable = False
+        self._values = values
+
+    @classmethod
+    def from_level(cls, kind, level):
+        """Table SG / safe du niveau `level` (fournisseur de tables)."""
+        return cls(residue_table(kind, level), primorial(level), assume_sorted=True)
+
+    @classmethod
+    def from_shared(cls, handle):
+        """Vue zéro-copie sur un niveau partagé (shared_levels.attach)."""
+        from shared_levels import attach
+        return cls(attach(handle), handle.modulus, assume_sorted=True)
+
+    # --------------------------------------------------------
+    # Protocole ensemble
+    # --------------------------------------------------------
+
+    @property
+    def values(self):
+        """Tableau trié en lecture seule."""
+        return self._values
+
+    @property
+    def nbytes(self):
+        return self._values.nbytes
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, r):
+        if not 0 <= r < self.modulus:
+            return False
+        i = np.searchsorted(self._values, r)
+        return i < len(self._values) and int(self._values[i]) == r
+
+    def contains_many(self, residues):
+        """Masque d'appartenance vectorisé (faux hors de [0, modulus), comme `in`)."""
+        residues = np.asarray(residues)
+        if residues.dtype.kind not in "iu":
+            # Entiers Python hors int64 / uint64 : test scalaire
+            return np.fromiter((r in self for r in residues.ravel().tolist()), dtype=bool,
+                               count=residues.size).reshape(residues.shape)
+        in_range = residues < self.modulus
+        if residues.dtype.kind == "i":
+            in_range &= residues >= 0
+        if not len(self._values):
+            return np.zeros(residues.shape, bool)
+        candidates = np.where(in_range, residues, 0).astype(self._values.dtype)
+        idx = np.searchsorted(self._values, candidates)
+        idx[idx == len(self._values)] = 0
+        return (self._values[idx] == candidates) & in_range
+
+    def __iter__(self):
+        for chunk_start in range(0, len(self._values), 1 << 16):
+            yield from self._values[chunk_start:chunk_start + (1 << 16)].tolist()
+
+    def __eq__(self, other):
+        if not isinstance(other, ResidueSet):
+            return NotImplemented
+        return self.modulus == other.modulus and np.array_equal(self._values, other._values)
+
+    def __repr__(self):
+        return f"ResidueSet({len(self):,} résidus mod {self.modulus:,}, {self.nbytes:,} octets)"
+
+    def to_set(self):
+        """Conversion en set Python (petits niveaux seulement)."""
+        return set(self._values.tolist())
+
+    # --------------------------------------------------------
+    # Projection
+    # --------------------------------------------------------
+
+    def project(self, sub_modulus):
+        """Image par r ↦ r mod sub_modulus (sub_modulus doit diviser modulus)."""
+        return self.project_counts(sub_modulus)[0]
+
+    def project_counts(self, sub_modulus):
+        """
+        Projection et multiplicités : (ResidueSet parent, comptes).
+
+        comptes[i] = nombre de résidus au-dessus du i-ème parent, soit
+        p - 2 partout si la loi est parfaitement uniforme.
+        """
+        if self.modulus % sub_modulus:
+            raise ValueError(f"{sub_modulus:,} ne divise pas {self.modulus:,}")
+        parents, counts = np.unique(self._values % sub_modulus, return_counts=True)
+        return ResidueSet(parents, sub_modulus, assume_sorted=True), counts
+
+    # --------------------------------------------------------
+    # Algèbre
+    # --------------------------------------------------------
+
+    def _check(self, other):
+        if not isinstance(other, ResidueSet):
+            raise TypeError(f"ResidueSet attendu, reçu {type(other).__name__}")
+        if other.modulus != self.modulus:
+            raise ValueError(f"Modulus différents : {self.modulus:,} ≠ {other.modulus:,}")
+
+    def union(self, other):
+        self._check(other)
+        return ResidueSet(np.union1d(self._values, other._values), self.modulus, True)
+
+    def intersection(self, other):
+        self._check(other)
+        return ResidueSet(np.intersect1d(self._values, other._values, assume_unique=True),
+                          self.modulus, True)
+
+    def difference(self, other):
+        self._check(other)
+        return ResidueSet(np.setdiff1d(self._values, other._values, assume_unique=True),
+                          self.modulus, True)
+
+    def symmetric_difference(self, other):
+        self._check(other)
+        return ResidueSet(np.setxor1d(self._values, other._values, assume_unique=True),
+                          self.modulus, True)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __xor__ = symmetric_difference
+
+
+if __name__ == "__main__":
+    import sys
+
+    level = 8
+    sg = ResidueSet.from_level("sg", level)
+    safe = ResidueSet.from_level("safe", level)
+
+    py_bytes = sys.getsizeof(sg.to_set()) + 32 * len(sg)
+    print(f"SG   : {sg}")
+    print(f"safe : {safe}")
+    print(f"set Python équivalent : ~{py_bytes:,} octets "
+          f"(×{py_bytes / sg.nbytes:.0f})")
+
+    both = sg & safe
+    print(f"\nSG ∩ safe : {len(both):,} résidus")
+    print(f"SG \\ safe : {len(sg - safe):,} résidus")
+    print(f"SG ∪ safe : {len(sg | safe):,} résidus")
+
+    parents, counts = sg.project_counts(primorial(level - 1))
+    print(f"\nProjection mod {parents.modulus:,} : {len(parents):,} parents, "
+          f"extensions min={counts.min()} max={counts.max()}")
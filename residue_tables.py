@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Tables de résidus SG / safe prime dérivées de la loi (p-2)
+==========================================================
+
+Chaque niveau P_k = 2 × 3 × 5 × … × p_k se déduit du niveau précédent
+par relèvement CRT : pour le nouveau premier p, seuls 2 créneaux sur p
+sont interdits, d'où Res(P_k) = Res(P_(k-1)) × (p - 2).
+
+  SG   : r mod p ∉ {0, (p-1)/2}   (r et 2r+1 non divisibles par p)
+  safe : r mod p ∉ {0, 1}         (r et (r-1)/2 non divisibles par p)
+
+Toute autre constellation (constellations.Constellation) peut servir de
+`kind` : ses créneaux interdits et ses comptes viennent de ses formes.
+
+Les tables sont mémorisées en RAM (éviction LRU bornée en octets) et
+persistées sur disque, indexées par (kind, modulus). Chaque fichier
+persisté porte son empreinte (fingerprint.py) : un fichier corrompu ou
+obsolète est détecté au chargement et reconstruit.
+"""
+
+import os
+from array import array
+from collections import OrderedDict
+
+from fingerprint import fingerprint, read_metadata, write_metadata
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47)
+
+KINDS = ("sg", "safe")
+
+# Cache disque par défaut (surchargeable par variable d'environnement,
+# relue à chaque accès : voir default_cache_dir)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sophie_germain_residues")
+
+# Budget RAM par défaut : 512 Mo de tables (8 octets par résidu)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# En dessous de cette taille, reconstruire est plus rapide que relire
+DEFAULT_PERSIST_MIN = 10_000
+
+# Taille à partir de laquelle le relèvement passe par NumPy (lifting.py)
+VECTORIZE_MIN = 1_000
+
+
+# ============================================================
+# ARITHMÉTIQUE DES NIVEAUX
+# ============================================================
+
+def primorial(level):
+    """Retourne P_level = produit des `level` premiers nombres premiers."""
+    if not 1 <= level <= len(PRIMES):
+        raise ValueError(f"Niveau {level} hors de [1, {len(PRIMES)}]")
+    m = 1
+    for p in PRIMES[:level]:
+        m *= p
+    return m
+
+
+def level_of(modulus):
+    """Retourne k tel que P_k = modulus (ValueError sinon)."""
+    m = 1
+    for k, p in enumerate(PRIMES, 1):
+        m *= p
+        if m == modulus:
+            return k
+        if m > modulus:
+            break
+    raise ValueError(f"{modulus:,} n'est pas un primorial supporté")
+
+
+def forbidden_residues(kind, p):
+    """
+    Créneaux interdits mod p pour un premier p du niveau.
+
+    Pour p = 2, seul le créneau pair est interdit (candidats impairs).
+    """
+    if not isinstance(kind, str):
+        return kind.forbidden(p)  # Constellation
+    if kind not in KINDS:
+        raise ValueError(f"Type inconnu : {kind!r} (attendu : {KINDS})")
+    if p == 2:
+        return (0,)
+    if kind == "sg":
+        return (0, (p - 1) // 2)
+    return (0, 1)
+
+
+def residue_count(kind, level):
+    """Res(P_level) = ∏(p_i - 2), forme close de la loi (p-2)."""
+    if not isinstance(kind, str):
+        return kind.count(level)  # Constellation : ∏(q - |F_q|)
+    if kind not in KINDS:
+        raise ValueError(f"Type inconnu : {kind!r} (attendu : {KINDS})")
+    count = 1
+    for p in PRIMES[1:level]:
+        count *= p - 2
+    return count
+
+
+# ============================================================
+# CONSTRUCTION PAR RELÈVEMENT
+# ============================================================
+
+def lift_table(table, modulus, p, kind):
+    """
+    Relève une table triée mod `modulus` vers mod `modulus × p`.
+
+    Les tranches {r + modulus·t} pour t = 0..p-1 sont disjointes et
+    croissantes : la sortie est donc déjà triée.
+    """
+    forbidden = forbidden_residues(kind, p)
+    lifted = array("Q")
+    for t in range(p):
+        offset = modulus * t
+        for r in table:
+            x = r + offset
+            if x % p not in forbidden:
+                lifted.append(x)
+    return lifted
+
+
+def build_residue_table(kind, level, base=None, base_level=1):
+    """
+    Construit la table triée (array 'Q') du niveau `level`.
+
+    `base` permet de repartir d'une table déjà connue au niveau
+    `base_level` plutôt que du niveau 1 ({1} mod 2 pour SG / safe).
+    """
+    if base is None:
+        forbidden = forbidden_residues(kind, 2)
+        base, base_level = array("Q", [r for r in range(2) if r not in forbidden]), 1
+    try:
+        from lifting import lift_multi
+    except ImportError:  # NumPy absent : relèvement pur Python
+        lift_multi = None
+
+    table = base
+    modulus = primorial(base_level)
+    for p in PRIMES[base_level:level]:
+        if lift_multi is not None and len(table) >= VECTORIZE_MIN:
+            lifted = array("Q")
+            lifted.frombytes(lift_multi(table, modulus, (p,), kind, ordered=True).tobytes())
+            table = lifted
+        else:
+            table = lift_table(table, modulus, p, kind)
+        modulus *= p
+    return table
+
+
+# ============================================================
+# FOURNISSEUR AVEC CACHE
+# ============================================================
+
+# cache_dir par défaut : SG_RESIDUE_CACHE, lue à chaque accès
+_FROM_ENV = object()
+
+
+def default_cache_dir():
+    """Cache disque courant : $SG_RESIDUE_CACHE, sinon DEFAULT_CACHE_DIR."""
+    return os.environ.get("SG_RESIDUE_CACHE", DEFAULT_CACHE_DIR)
+
+
+class ResidueTableProvider:
+    """
+    Fournit les tables SG / safe de n'importe quel niveau.
+
+    Ordre de recherche : cache RAM (LRU) → cache disque → relèvement
+    depuis le plus haut niveau disponible.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, cache_dir=_FROM_ENV,
+                 persist_min=DEFAULT_PERSIST_MIN):
+        self.max_bytes = max_bytes
+        self._cache_dir = cache_dir
+        self.persist_min = persist_min
+        self._tables = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def cache_dir(self):
+        """Répertoire du cache disque (None : RAM seulement)."""
+        return default_cache_dir() if self._cache_dir is _FROM_ENV else self._cache_dir
+
+    def cache_path(self, kind, modulus):
+        """Chemin du fichier de cache pour (kind, modulus)."""
+        return os.path.join(self.cache_dir, f"{kind}_{modulus}.u64")
+
+    def get(self, kind, level):
+        """Retourne la table triée (array 'Q') du niveau `level`."""
+        key = (kind, primorial(level))
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            return table
+
+        table = self._load(kind, level)
+        if table is None:
+            base_level, base = self._best_base(kind, level)
+            table = build_residue_table(kind, level, base, base_level)
+            self._save(kind, level, table)
+
+        self._remember(key, table)
+        return table
+
+    def fingerprint(self, kind, level):
+        """Empreinte du niveau (métadonnées du cache disque, sinon calculée)."""
+        if self.cache_dir is not None:
+            meta = read_metadata(self.cache_path(kind, primorial(level)))
+            if meta is not None and meta["count"] == residue_count(kind, level):
+                return meta["fingerprint"]
+        return fingerprint(self.get(kind, level))
+
+    def clear(self):
+        """Vide le cache RAM (le cache disque est conservé)."""
+        self._tables.clear()
+        self._bytes = 0
+
+    def _best_base(self, kind, level):
+        """Plus haut niveau inférieur déjà en RAM ou sur disque."""
+        for k in range(level - 1, 1, -1):
+            table = self._tables.get((kind, primorial(k)))
+            if table is None:
+                table = self._load(kind, k)
+            if table is not None:
+                return k, table
+        return 1, None
+
+    def _remember(self, key, table):
+        self._tables[key] = table
+        self._bytes += table.itemsize * len(table)
+        # Éviction LRU, en gardant toujours la table demandée
+        while self._bytes > self.max_bytes and len(self._tables) > 1:
+            _, old = self._tables.popitem(last=False)
+            self._bytes -= old.itemsize * len(old)
+
+    def _load(self, kind, level):
+        if self.cache_dir is None:
+            return None
+        modulus = primorial(level)
+        path = self.cache_path(kind, modulus)
+        expected = residue_count(kind, level)
+        try:
+            if os.path.getsize(path) != 8 * expected:
+                return None  # Fichier tronqué ou obsolète
+            meta = read_metadata(path)
+            if meta is None or (meta["kind"], meta["modulus"]) != (str(kind), modulus):
+                return None  # Sans empreinte : contenu non vérifiable
+            table = array("Q")
+            with open(path, "rb") as f:
+                table.fromfile(f, expected)
+            if fingerprint(table) != meta["fingerprint"]:
+                return None  # Fichier corrompu
+            return table
+        except (OSError, EOFError):
+            return None
+
+    def _save(self, kind, level, table):
+        if self.cache_dir is None or len(table) < self.persist_min:
+            return
+        modulus = primorial(level)
+        path = self.cache_path(kind, modulus)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp, "wb") as f:
+                table.tofile(f)
+            os.replace(tmp, path)
+            fp = fingerprint(table)
+            write_metadata(path, kind, modulus, fp, level=level)
+        except OSError:
+            # Cache disque non disponible : on garde seulement la RAM
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        from catalog import record_level_quietly  # catalog importe ce module
+        record_level_quietly(kind, modulus, len(table), fp.key, path)
+
+
+default_provider = ResidueTableProvider()
+
+
+def residue_table(kind, level):
+    """Table triée (array 'Q') via le fournisseur par défaut."""
+    return default_provider.get(kind, level)
+
+
+def residue_set(kind, level):
+    """Table du niveau sous forme de frozenset (tests d'appartenance)."""
+    return frozenset(default_provider.get(kind, level))
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    kind = sys.argv[1] if len(sys.argv) > 1 else "safe"
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    print(f"{'Niveau':>7} | {'Modulus':>15} | {'Résidus':>12} | {'Temps':>9}")
+    print("-" * 54)
+    for k in range(1, top + 1):
+        t0 = time.time()
+        table = residue_table(kind, k)
+        assert len(table) == residue_count(kind, k)
+        print(f"{k:7d} | {primorial(k):15,} | {len(table):12,} | {time.time() - t0:8.3f}s")
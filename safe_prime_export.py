@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Export en masse des safe primes générés
+=======================================
+
+Écrit les safe primes par lots typés, en flux (mémoire constante quel que
+soit le volume) :
+
+  .csv : mêmes colonnes que l'export historique de main()
+  .npy : répertoire d'un fichier .npy par colonne (mmap-able)
+  .npz : mêmes colonnes empaquetées dans une archive NumPy
+
+Colonnes : SafePrime (uint64), Residus2310 (uint16), SophieGermain,
+InSAFE, InSG (booléens).
+
+Le drapeau SophieGermain (2p+1 premier) est calculé par lot : crible
+vectorisé de 2p+1 par les petits premiers, puis Miller-Rabin sur les
+seuls survivants.
+"""
+
+import csv
+import os
+import shutil
+import zipfile
+
+from admissibility import admissible_mask, is_admissible
+from generate_safe_primes_validator import miller_rabin
+
+try:
+    import numpy as np
+except ImportError:  # Export CSV seulement
+    np = None
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+COLUMNS = (
+    ("SafePrime", "<u8"),
+    ("Residus2310", "<u2"),
+    ("SophieGermain", "|b1"),
+    ("InSAFE", "|b1"),
+    ("InSG", "|b1"),
+)
+
+FORMATS = ("csv", "npy", "npz")
+
+DEFAULT_BATCH_SIZE = 65536
+
+# Petits premiers pour le pré-crible de 2p+1
+SIEVE_PRIMES = tuple(
+    q for q in range(3, 1000, 2) if all(q % d for d in range(3, int(q**0.5) + 1, 2))
+)
+
+# En-tête .npy de taille fixe, réécrit à la fermeture avec la forme finale
+NPY_HEADER_SIZE = 128
+
+
+# ============================================================
+# DRAPEAUX SOPHIE GERMAIN PAR LOT
+# ============================================================
+
+def sophie_germain_flags(primes, is_prime=miller_rabin):
+    """
+    Pour chaque p du lot, vrai si 2p+1 est premier.
+
+    Le crible par SIEVE_PRIMES élimine ~85% des q = 2p+1 sans test de
+    primalité ; vectorisé avec NumPy quand q tient sur 64 bits.
+    """
+    primes = list(primes)
+    flags = [False] * len(primes)
+
+    if np is not None and primes and max(primes) < 2**63:
+        q = 2 * np.asarray(primes, dtype=np.uint64) + np.uint64(1)
+        alive = np.ones(len(q), dtype=bool)
+        for s in SIEVE_PRIMES:
+            alive &= (q % np.uint64(s) != 0) | (q == np.uint64(s))
+        survivors = np.flatnonzero(alive).tolist()
+    else:
+        survivors = [
+            i for i, p in enumerate(primes)
+            if all((2 * p + 1) % s or 2 * p + 1 == s for s in SIEVE_PRIMES)
+        ]
+
+    for i in survivors:
+        flags[i] = is_prime(2 * primes[i] + 1)
+    return flags
+
+
+def batch_columns(primes):
+    """Calcule les cinq colonnes d'un lot (tableaux NumPy si possible)."""
+    sg_flags = sophie_germain_flags(primes)
+
+    if np is not None and (not primes or max(primes) < 2**64):
+        arr = np.asarray(primes, dtype=np.uint64)
+        return [
+            arr,
+            (arr % np.uint64(2310)).astype(np.uint16),
+            np.asarray(sg_flags, dtype=bool),
+            admissible_mask(arr, 5, "safe"),
+            admissible_mask(arr, 5, "sg"),
+        ]
+
+    return [
+        list(primes),
+        [p % 2310 for p in primes],
+        sg_flags,
+        [is_admissible(p, 5, "safe") for p in primes],
+        [is_admissible(p, 5, "sg") for p in primes],
+    ]
+
+
+# ============================================================
+# ÉCRITURE .npy EN FLUX
+# ============================================================
+
+class _NpyColumnWriter:
+    """Colonne .npy écrite par ajouts successifs ; en-tête finalisé à la fin."""
+
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        self._f = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        header = (f"{{'descr': '{self.dtype.str}', 'fortran_order': False, "
+                  f"'shape': ({self.count},), }}")
+        prefix = b"\x93NUMPY\x01\x00"
+        body_len = NPY_HEADER_SIZE - len(prefix) - 2
+        body = header.ljust(body_len - 1).encode("latin1") + b"\n"
+        self._f.seek(0)
+        self._f.write(prefix + body_len.to_bytes(2, "little") + body)
+
+    def append(self, values):
+        values = np.asarray(values, dtype=self.dtype)
+        self._f.seek(0, os.SEEK_END)
+        self._f.write(values.tobytes())
+        self.count += len(values)
+
+    def close(self):
+        self._write_header()
+        self._f.close()
+
+
+# ============================================================
+# EXPORTEUR
+# ============================================================
+
+class SafePrimeExporter:
+    """
+    Exporte des safe primes par lots, en flux.
+
+    Usage :
+        with SafePrimeExporter("out.npz") as exp:
+            exp.write(generateur_de_safe_primes)
+    """
+
+    def __init__(self, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE):
+        if fmt is None:
+            fmt = os.path.splitext(path)[1].lstrip(".").lower() or "csv"
+        if fmt not in FORMATS:
+            raise ValueError(f"Format inconnu : {fmt!r} (attendu : {FORMATS})")
+        if fmt != "csv" and np is None:
+            raise ImportError(f"L'export {fmt} nécessite NumPy")
+
+        self.path = path
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer = []
+
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+
+        if fmt == "csv":
+            self._file = open(path, "w", newline="")
+            self._csv = csv.writer(self._file)
+            self._csv.writerow([name for name, _ in COLUMNS])
+        else:
+            self._dir = path if fmt == "npy" else f"{path}.parts"
+            os.makedirs(self._dir, exist_ok=True)
+            self._columns = [
+                _NpyColumnWriter(os.path.join(self._dir, f"{name}.npy"), dtype)
+                for name, dtype in COLUMNS
+            ]
+
+    def write(self, primes):
+        """Ajoute des safe primes (itérable quelconque, consommé en flux)."""
+        for p in primes:
+            self._buffer.append(p)
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """Écrit le lot en attente."""
+        if not self._buffer:
+            return
+        if self.fmt != "csv" and max(self._buffer) >= 2**64:
+            raise OverflowError("Format binaire limité à p < 2^64 (utiliser csv)")
+
+        columns = batch_columns(self._buffer)
+        if self.fmt == "csv":
+            rows = zip(*(c.tolist() if hasattr(c, "tolist") else c for c in columns))
+            self._csv.writerows(rows)
+        else:
+            for writer, values in zip(self._columns, columns):
+                writer.append(values)
+
+        self.count += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        """Vide le tampon et finalise les fichiers."""
+        self.flush()
+        if self.fmt == "csv":
+            self._file.close()
+            return
+
+        for writer in self._columns:
+            writer.close()
+
+        if self.fmt == "npz":
+            # Empaquetage en flux des colonnes déjà écrites
+            with zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for writer in self._columns:
+                    zf.write(writer.path, os.path.basename(writer.path))
+            shutil.rmtree(self._dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def export_safe_primes(primes, path, fmt=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Exporte un itérable de safe primes ; retourne le nombre écrit."""
+    with SafePrimeExporter(path, fmt, batch_size) as exporter:
+        exporter.write(primes)
+    return exporter.count
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Recherche de safe primes en pipeline producteur / consommateur
+==============================================================
+
+generate_safe_primes_optimized entrelace génération, filtrage et tests de
+primalité dans une seule boucle. Ici chaque étape tourne en parallèle,
+reliée aux suivantes par des files bornées (back-pressure) :
+
+  roue 2310 → crible petits premiers → pool Miller-Rabin → collecteur ordonné
+
+Chaque étape mesure son temps actif et ses attentes, ce qui désigne
+directement l'étape goulot. Les safe primes sortent dans l'ordre croissant,
+identiques à ceux de la recherche séquentielle.
+
+Limite : candidats < 2^63 (étapes vectorisées en uint64).
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from admissibility import admissible_mask, is_admissible
+from generate_safe_primes_validator import is_safe_prime
+from residue_tables import PRIMES, residue_table
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+WHEEL_LEVEL = 5
+WHEEL_MODULUS = 2310
+
+# Tours de roue par lot (135 candidats par tour)
+DEFAULT_BATCH_TURNS = 64
+
+DEFAULT_QUEUE_SIZE = 8
+
+# Premiers du crible au-delà de la roue : p mod q ∉ {0, 1}
+SIEVE_LIMIT = 2000
+SIEVE_PRIMES = tuple(
+    q for q in range(PRIMES[WHEEL_LEVEL], SIEVE_LIMIT, 2)
+    if all(q % d for d in range(3, int(q**0.5) + 1, 2))
+)
+
+# Safe primes que la roue et le crible excluent ((p-1)/2 divisible par
+# un premier de la roue) : search_block ne les retourne jamais
+SMALL_SAFE_PRIMES = (5, 7, 11, 23)
+
+_DONE = object()
+
+
+# ============================================================
+# STATISTIQUES PAR ÉTAPE
+# ============================================================
+
+class StageStats:
+    """Temps actif / attente et volume traité d'une étape."""
+
+    __slots__ = ("name", "workers", "busy", "wait_in", "wait_out", "items_in",
+                 "items_out", "batches")
+
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.workers = workers
+        self.busy = 0.0
+        self.wait_in = 0.0
+        self.wait_out = 0.0
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+
+    def utilization(self, wall):
+        """Fraction du temps mur passée à travailler (par worker)."""
+        return self.busy / (wall * self.workers) if wall > 0 else 0.0
+
+
+def print_stage_stats(stats, wall):
+    """Affiche l'utilisation de chaque étape et désigne le goulot."""
+    print("\n" + "="*70)
+    print("UTILISATION DU PIPELINE")
+    print("="*70)
+    print(f"\n{'Étape':<14} {'Lots':>6} {'Entrées':>12} {'Sorties':>12} "
+          f"{'Actif':>8} {'Att. entr.':>10} {'Att. sort.':>10}")
+    print("-"*78)
+    for s in stats:
+        print(f"{s.name:<14} {s.batches:>6,} {s.items_in:>12,} {s.items_out:>12,} "
+              f"{100*s.utilization(wall):>7.1f}% {s.wait_in:>9.2f}s {s.wait_out:>9.2f}s")
+    bottleneck = max(stats, key=lambda s: s.utilization(wall))
+    print(f"\nGoulot : {bottleneck.name} ({100*bottleneck.utilization(wall):.1f}% actif)")
+
+
+# ============================================================
+# ÉTAPES
+# ============================================================
+
+def _put(q, item, stop, stats):
+    """put bloquant (back-pressure) mais interruptible par `stop`."""
+    t0 = time.perf_counter()
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.05)
+            break
+        except queue.Full:
+            continue
+    stats.wait_out += time.perf_counter() - t0
+
+
+def _get(q, stop, stats):
+    t0 = time.perf_counter()
+    item = _DONE
+    while not stop.is_set():
+        try:
+            item = q.get(timeout=0.05)
+            break
+        except queue.Empty:
+            continue
+    stats.wait_in += time.perf_counter() - t0
+    return item
+
+
+def _run_stage(target, args, errors, stop):
+    """Corps d'un thread d'étape : une exception arrête le pipeline et part au collecteur."""
+    try:
+        target(*args)
+    except BaseException as exc:
+        errors.put(exc)
+        stop.set()
+
+
+def _stage_error(results_q):
+    """Exception transmise par une étape (le pipeline s'est arrêté sans le collecteur)."""
+    while True:
+        try:
+            item = results_q.get_nowait()
+        except queue.Empty:
+            return RuntimeError("Pipeline arrêté avant la fin de la recherche")
+        if isinstance(item, BaseException):
+            return item
+
+
+def wheel_block(base, turns, start=0):
+    """Candidats base + 2310·i + r (i < turns, r ∈ SAFE_RESIDUES_2310) ≥ start."""
+    wheel = np.asarray(residue_table("safe", WHEEL_LEVEL), dtype=np.uint64)
+    bases = np.uint64(base) + np.uint64(WHEEL_MODULUS) * np.arange(turns, dtype=np.uint64)
+    candidates = (bases[:, None] + wheel[None, :]).ravel()
+    if start > base:
+        candidates = candidates[candidates >= np.uint64(start)]
+    return candidates
+
+
+def sieve_block(candidates, level):
+    """Filtre factorisé au niveau `level` puis crible p mod q ∉ {0, 1}."""
+    mask = admissible_mask(candidates, level, "safe")
+    for q in SIEVE_PRIMES:
+        if q <= PRIMES[level - 1]:
+            continue
+        mask &= candidates % np.uint64(q) > np.uint64(1)
+    # Petits candidats (p ou (p-1)/2 parmi les premiers du crible) : pas de crible
+    mask |= candidates < np.uint64(2 * SIEVE_LIMIT + 2)
+    return candidates[mask].tolist()
+
+
+def small_safe_primes(start, stop=None):
+    """Safe primes de SMALL_SAFE_PRIMES dans [start, stop), absents de search_block."""
+    return [p for p in SMALL_SAFE_PRIMES if p >= start and (stop is None or p < stop)]
+
+
+def search_block(base, turns, level=8, start=0):
+    """
+    Bloc complet (roue, crible, Miller-Rabin) dans un seul appel.
+
+    Au-delà de 2^63, repli scalaire en entiers Python (tailles crypto).
+    """
+    end = base + turns * WHEEL_MODULUS
+    if end < 2**63:
+        survivors = sieve_block(wheel_block(base, turns, start), level)
+    else:
+        wheel = residue_table("safe", WHEEL_LEVEL)
+        survivors = [
+            p for b in range(base, end, WHEEL_MODULUS) for r in wheel
+            if (p := b + r) >= start and is_admissible(p, level)
+            and all(p % q > 1 for q in SIEVE_PRIMES)
+        ]
+    return [p for p in survivors if is_safe_prime(p)]
+
+
+def _generator_stage(start, batch_turns, out_q, stop, stats):
+    """Lots de candidats de la roue 2310, par tours consécutifs."""
+    base = (start // WHEEL_MODULUS) * WHEEL_MODULUS
+    seq = 0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        candidates = wheel_block(base, batch_turns, start)
+        base += batch_turns * WHEEL_MODULUS
+        stats.busy += time.perf_counter() - t0
+        stats.items_out += len(candidates)
+        stats.batches += 1
+        _put(out_q, (seq, candidates), stop, stats)
+        seq += 1
+
+
+def _sieve_stage(level, in_q, out_q, stop, stats):
+    """Étape de crible (voir sieve_block)."""
+    while not stop.is_set():
+        item = _get(in_q, stop, stats)
+        if item is _DONE:
+            break
+        seq, candidates = item
+        t0 = time.perf_counter()
+        survivors = sieve_block(candidates, level)
+        stats.busy += time.perf_counter() - t0
+        stats.items_in += len(candidates)
+        stats.items_out += len(survivors)
+        stats.batches += 1
+        _put(out_q, (seq, survivors), stop, stats)
+
+
+def _test_batch(candidates):
+    """Exécuté dans un processus du pool : safe primes du lot."""
+    t0 = time.perf_counter()
+    found = [p for p in candidates if is_safe_prime(p)]
+    return found, time.perf_counter() - t0
+
+
+def _dispatch_stage(executor, max_inflight, in_q, out_q, stop, stats):
+    """Soumet les lots au pool ; au plus `max_inflight` lots en vol."""
+    slots = threading.BoundedSemaphore(max_inflight)
+    # Rappels exécutés par le thread du pool ou, lot déjà fini, par celui-ci
+    lock = threading.Lock()
+
+    def on_done(future, seq, n):
+        slots.release()
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            out_q.put(future.exception())
+            stop.set()
+            return
+        found, busy = future.result()
+        with lock:
+            stats.busy += busy
+            stats.items_in += n
+            stats.items_out += len(found)
+            stats.batches += 1
+        out_q.put((seq, n, found))
+
+    while not stop.is_set():
+        item = _get(in_q, stop, stats)
+        if item is _DONE:
+            break
+        seq, survivors = item
+        t0 = time.perf_counter()
+        while not slots.acquire(timeout=0.05):
+            if stop.is_set():
+                return
+        stats.wait_out += time.perf_counter() - t0
+        future = executor.submit(_test_batch, survivors)
+        future.add_done_callback(lambda f, s=seq, n=len(survivors): on_done(f, s, n))
+
+
+# ============================================================
+# PIPELINE
+# ============================================================
+
+def generate_safe_primes_pipeline(start, count=100, level=8, batch_turns=DEFAULT_BATCH_TURNS,
+                                  workers=None, queue_size=DEFAULT_QUEUE_SIZE):
+    """
+    Génère `count` safe primes ≥ start via le pipeline concurrent.
+
+    Retourne (safe_primes, tested, stats) : mêmes safe primes que
+    generate_safe_primes_optimized, nombre de tests Miller-Rabin, et
+    StageStats de chaque étape.
+    """
+    if start >= 2**63:
+        raise ValueError("Pipeline limité aux candidats < 2^63")
+    workers = workers or os.cpu_count() or 1
+
+    stop = threading.Event()
+    candidates_q = queue.Queue(queue_size)
+    survivors_q = queue.Queue(queue_size)
+    results_q = queue.Queue()
+
+    gen_stats = StageStats("roue 2310")
+    sieve_stats = StageStats("crible")
+    pool_stats = StageStats("primalité", workers)
+    collect_stats = StageStats("collecteur")
+
+    print(f"Recherche en pipeline de {count} safe primes à partir de {start} "
+          f"({workers} workers, filtre P_{level})...")
+
+    safe_primes = []
+    tested = 0
+    pending = {}
+    next_seq = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        stages = [
+            (_generator_stage, (start, batch_turns, candidates_q, stop, gen_stats)),
+            (_sieve_stage, (level, candidates_q, survivors_q, stop, sieve_stats)),
+            (_dispatch_stage, (executor, 2 * workers, survivors_q, results_q, stop, pool_stats)),
+        ]
+        threads = [threading.Thread(target=_run_stage, args=(target, args, results_q, stop))
+                   for target, args in stages]
+        for t in threads:
+            t.daemon = True
+            t.start()
+
+        # Collecteur : réordonne les lots par numéro de séquence
+        while len(safe_primes) < count:
+            item = _get(results_q, stop, collect_stats)
+            if item is _DONE:
+                item = _stage_error(results_q)
+            if isinstance(item, BaseException):
+                stop.set()
+                raise item
+            seq, n, found = item
+            t0 = time.perf_counter()
+            collect_stats.items_in += len(found)
+            pending[seq] = (n, found)
+            while next_seq in pending and len(safe_primes) < count:
+                n, found = pending.pop(next_seq)
+                for p in found:
+                    safe_primes.append(p)
+                    if len(safe_primes) % 10 == 0:
+                        print(f"  {len(safe_primes)} safe primes trouvés")
+                    if len(safe_primes) >= count:
+                        break
+                tested += n
+                collect_stats.batches += 1
+                next_seq += 1
+            collect_stats.busy += time.perf_counter() - t0
+
+        # Arrêt : plus aucune soumission avant d'annuler les lots en vol
+        stop.set()
+        for t in threads:
+            t.join()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    collect_stats.items_out = len(safe_primes)
+    return safe_primes, tested, [gen_stats, sieve_stats, pool_stats, collect_stats]
+
+
+if __name__ == "__main__":
+    from bigint import backend_name
+    from generate_safe_primes_validator import generate_safe_primes_optimized
+
+    start = 8_000_000_000_000_000
+    count = 200
+
+    t0 = time.perf_counter()
+    primes_seq, tested_seq = generate_safe_primes_optimized(start, count)
+    t_seq = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    primes_pipe, tested_pipe, stats = generate_safe_primes_pipeline(start, count)
+    t_pipe = time.perf_counter() - t0
+
+    print_stage_stats(stats, t_pipe)
+
+    print(f"\n{'Méthode':<20} {'Temps':>10} {'Candidats testés':>18}")
+    print("-"*50)
+    print(f"{'Séquentielle':<20} {t_seq:>9.3f}s {tested_seq:>18,}")
+    print(f"{'Pipeline':<20} {t_pipe:>9.3f}s {tested_pipe:>18,}")
+    print(f"\n✓ Résultats identiques : {primes_seq == primes_pipe}")
+    print(f"✓ Backend arithmétique : {backend_name()}")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Accès zéro-copie à un niveau pour des workers parallèles
+========================================================
+
+Chaque worker qui fait json.load d'un niveau en garde sa propre copie
+(378K à 215M résidus). Ici le niveau est chargé une seule fois :
+
+  - mode "shm"  : copié une fois dans un segment multiprocessing.shared_memory
+  - mode "mmap" : fichier .u64 (cache disque, lift_to_file) projeté en
+                  lecture seule ; le cache de pages de l'OS est partagé
+
+Les workers reçoivent seulement un LevelHandle (quelques octets) et s'y
+attachent en vue NumPy lecture seule : N workers = une seule copie.
+"""
+
+import os
+from collections import namedtuple
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from residue_tables import default_provider, primorial
+
+
+# Descripteur picklable d'un niveau partagé
+LevelHandle = namedtuple("LevelHandle", "mode source length dtype modulus offset")
+
+# Copie vers la mémoire partagée par blocs (mémoire crête bornée)
+COPY_CHUNK = 1 << 22
+
+
+# ============================================================
+# CÔTÉ PROPRIÉTAIRE
+# ============================================================
+
+class SharedLevel:
+    """
+    Niveau copié une fois en mémoire partagée.
+
+    Le propriétaire doit appeler close() (ou utiliser `with`) : le
+    segment est détruit quand il n'est plus nécessaire.
+    """
+
+    def __init__(self, values, modulus):
+        values = values if isinstance(values, np.ndarray) else np.asarray(values, dtype=np.uint64)
+        dtype = np.dtype(np.uint64)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, len(values) * dtype.itemsize))
+        self.array = np.ndarray(len(values), dtype=dtype, buffer=self._shm.buf)
+        for i in range(0, len(values), COPY_CHUNK):
+            self.array[i:i + COPY_CHUNK] = values[i:i + COPY_CHUNK]
+        self.handle = LevelHandle("shm", self._shm.name, len(values), dtype.str, modulus, 0)
+
+    @classmethod
+    def from_level(cls, kind, level):
+        return cls(default_provider.get(kind, level), primorial(level))
+
+    def close(self):
+        self.array = None
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def share_file(path, modulus, dtype="<u8", offset=0):
+    """Handle mmap d'un fichier brut (pas de copie du tout)."""
+    itemsize = np.dtype(dtype).itemsize
+    size = os.path.getsize(path) - offset
+    if size % itemsize:
+        raise ValueError(f"Fichier tronqué : {path} ({size:,} octets, "
+                         f"pas un multiple de {itemsize})")
+    length = size // itemsize
+    return LevelHandle("mmap", os.path.abspath(path), length, np.dtype(dtype).str, modulus, offset)
+
+
+def share_level_file(kind, level):
+    """Handle mmap du fichier de cache du niveau (construit si besoin)."""
+    default_provider.get(kind, level)
+    path = default_provider.cache_path(kind, primorial(level))
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Niveau {level} non persisté : {path}")
+    return share_file(path, primorial(level))
+
+
+# ============================================================
+# CÔTÉ WORKER
+# ============================================================
+
+_attached = {}
+
+
+def attach(handle):
+    """
+    Vue NumPy lecture seule sur le niveau décrit par `handle`.
+
+    Mémorisée par processus : un seul attachement par segment.
+    """
+    view = _attached.get(handle)
+    if view is not None:
+        return view[0]
+
+    if handle.mode == "shm":
+        # Les workers du Pool partagent le resource_tracker du propriétaire :
+        # seul SharedLevel.close() détruit le segment
+        shm = shared_memory.SharedMemory(name=handle.source)
+        array = np.ndarray(handle.length, dtype=handle.dtype, buffer=shm.buf)
+        keepalive = shm
+    else:
+        array = np.memmap(handle.source, dtype=handle.dtype, mode="r",
+                          offset=handle.offset, shape=(handle.length,))
+        keepalive = None
+
+    array.flags.writeable = False
+    _attached[handle] = (array, keepalive)
+    return array
+
+
+_worker_handles = ()
+
+
+def _init_worker(handles):
+    global _worker_handles
+    _worker_handles = (handles,) if isinstance(handles, LevelHandle) else tuple(handles)
+    for handle in _worker_handles:
+        attach(handle)
+
+
+def worker_level(index=0):
+    """Niveau attaché n° `index` du worker courant (dans une fonction de pool_map)."""
+    return attach(_worker_handles[index])
+
+
+def pool_map(func, handles, tasks, processes=None):
+    """
+    pool.map(func, tasks) avec le(s) niveau(x) attaché(s) dans chaque worker.
+
+    `handles` est un LevelHandle ou une séquence de LevelHandle ; `func`
+    lit les niveaux via worker_level(i). Avec processes=1, exécution
+    dans le processus courant (sans Pool).
+    """
+    if processes == 1:
+        _init_worker(handles)
+        return [func(task) for task in tasks]
+    with Pool(processes, initializer=_init_worker, initargs=(handles,)) as pool:
+        return pool.map(func, tasks)
+
+
+def chunk_ranges(length, parts):
+    """Découpe [0, length) en `parts` intervalles contigus (aucun si length = 0)."""
+    if length <= 0:
+        return []
+    step = -(-length // max(1, parts))
+    return [(i, min(i + step, length)) for i in range(0, length, step)]
+
+
+# ============================================================
+# DÉMONSTRATION
+# ============================================================
+
+def _mod30_histogram(bounds):
+    start, end = bounds
+    view = worker_level()
+    return np.bincount(view[start:end] % np.uint64(30), minlength=30)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    level = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+    workers = os.cpu_count() or 1
+
+    for mode in ("shm", "mmap"):
+        t0 = time.time()
+        if mode == "shm":
+            owner = SharedLevel.from_level("sg", level)
+            handle = owner.handle
+        else:
+            owner = None
+            handle = share_level_file("sg", level)
+        t_load = time.time() - t0
+
+        t0 = time.time()
+        parts = pool_map(_mod30_histogram, handle, chunk_ranges(handle.length, 4 * workers), workers)
+        histogram = sum(parts)
+        t_run = time.time() - t0
+
+        classes = {r: int(c) for r, c in enumerate(histogram) if c}
+        print(f"[{mode}] {handle.length:,} résidus mod {handle.modulus:,} "
+              f"({8 * handle.length / 2**20:.0f} Mo, une copie pour {workers} workers)")
+        print(f"  Chargement : {t_load:.2f}s   Analyse : {t_run:.2f}s")
+        print(f"  Classes mod 30 : {classes}")
+
+        if owner is not None:
+            owner.close()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Validation en flux de gros fichiers de safe primes
+==================================================
+
+Contrairement à validate_safe_primes / analyze_distribution (liste en
+mémoire), ce module lit le fichier par blocs et garde une mémoire bornée :
+
+  - appartenance à la roue testée par blocs vectorisés, à n'importe quel
+    niveau (filtre factorisé, sans table)
+  - histogramme des résidus mod P_h (taille P_h, indépendante du volume)
+  - échantillon aléatoire uniforme (bottom-k) re-vérifié par Miller-Rabin
+  - lignes invalides rapportées avec leur offset dans le fichier
+
+Formats lus : CSV (première colonne), .npy, répertoire .npy de l'export
+en colonnes, .npz, et tableau brut uint64 (.u64).
+"""
+
+import os
+import zipfile
+
+import numpy as np
+
+from admissibility import admissible_mask, is_admissible
+from generate_safe_primes_validator import miller_rabin
+from residue_tables import primorial
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Niveau de l'histogramme : P_5 = 2310 comptes
+DEFAULT_HISTOGRAM_LEVEL = 5
+
+# Nombre maximum de lignes invalides conservées dans le rapport
+DEFAULT_MAX_REPORT = 100
+
+EXPORT_COLUMN = "SafePrime"
+
+
+# ============================================================
+# LECTURE PAR BLOCS
+# ============================================================
+
+def _iter_csv_chunks(path, chunk_size):
+    """
+    Blocs (offsets, valeurs, lignes illisibles) d'un CSV.
+
+    L'offset est la position en octets du début de ligne. Les entiers
+    négatifs sont rangés avec les lignes illisibles (pas de cast uint64).
+    """
+    offsets, values, unreadable = [], [], []
+    with open(path, "rb") as f:
+        pos = 0
+        for line in f:
+            start, pos = pos, pos + len(line)
+            field = line.split(b",", 1)[0].strip()
+            if not field:
+                continue
+            try:
+                value = int(field)
+            except ValueError:
+                # En-tête ou ligne corrompue
+                if start != 0:
+                    unreadable.append((start, field.decode("latin1")))
+                continue
+            if value < 0:
+                unreadable.append((start, field.decode("latin1")))
+                continue
+            values.append(value)
+            offsets.append(start)
+            if len(values) >= chunk_size:
+                yield np.asarray(offsets, dtype=np.uint64), values, unreadable
+                offsets, values, unreadable = [], [], []
+    if values or unreadable:
+        yield np.asarray(offsets, dtype=np.uint64), values, unreadable
+
+
+def _iter_array_chunks(array, base_offset, chunk_size):
+    """Blocs d'un tableau uint64 (mmap) ; offset = base + 8 × index."""
+    itemsize = array.dtype.itemsize
+    for i in range(0, len(array), chunk_size):
+        block = np.asarray(array[i:i + chunk_size], dtype=np.uint64)
+        offsets = base_offset + itemsize * np.arange(i, i + len(block), dtype=np.uint64)
+        yield offsets, block, []
+
+
+def iter_prime_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Itère sur les blocs (offsets, valeurs, lignes illisibles) d'un fichier.
+
+    Les valeurs sont un tableau uint64 (ou une liste d'entiers Python
+    pour un CSV contenant des valeurs ≥ 2^64).
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, f"{EXPORT_COLUMN}.npy")
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".csv":
+        for offsets, values, unreadable in _iter_csv_chunks(path, chunk_size):
+            if values and max(values) < 2**64:
+                values = np.asarray(values, dtype=np.uint64)
+            yield offsets, values, unreadable
+
+    elif ext == ".npy":
+        array = np.load(path, mmap_mode="r")
+        yield from _iter_array_chunks(array, array.offset, chunk_size)
+
+    elif ext == ".npz":
+        # Les membres .npz ne sont pas mmap-ables : lecture par blocs du zip,
+        # offsets relatifs au membre SafePrime.npy
+        with zipfile.ZipFile(path) as zf, zf.open(f"{EXPORT_COLUMN}.npy") as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+            base = f.tell()
+            done = 0
+            while done < shape[0]:
+                n = min(chunk_size, shape[0] - done)
+                block = np.frombuffer(f.read(n * dtype.itemsize), dtype=dtype)
+                offsets = base + dtype.itemsize * np.arange(done, done + n, dtype=np.uint64)
+                yield offsets, block.astype(np.uint64), []
+                done += n
+
+    else:
+        array = np.memmap(path, dtype="<u8", mode="r")
+        yield from _iter_array_chunks(array, 0, chunk_size)
+
+
+# ============================================================
+# VALIDATION
+# ============================================================
+
+def _is_member(p, kind):
+    """Re-vérification complète d'un élément de l'échantillon."""
+    if kind == "safe":
+        return miller_rabin(p) and miller_rabin((p - 1) // 2)
+    return miller_rabin(p) and miller_rabin(2 * p + 1)
+
+
+def validate_file(path, level=5, kind="safe", chunk_size=DEFAULT_CHUNK_SIZE,
+                  sample=0, seed=None, histogram_level=DEFAULT_HISTOGRAM_LEVEL,
+                  max_report=DEFAULT_MAX_REPORT):
+    """
+    Valide un fichier de safe primes (ou SG) en une passe, mémoire bornée.
+
+    Retourne un rapport : total, invalides (avec offsets), histogramme
+    mod P_histogram_level et résultat de l'échantillon re-vérifié.
+    """
+    hist_modulus = primorial(histogram_level)
+    histogram = np.zeros(hist_modulus, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+
+    total = 0
+    invalid_count = 0
+    invalid_rows = []
+    sample_keys = np.empty(0)
+    sample_values = []
+    sample_offsets = np.empty(0, dtype=np.uint64)
+
+    for offsets, values, unreadable in iter_prime_chunks(path, chunk_size):
+        for offset, field in unreadable:
+            invalid_count += 1
+            if len(invalid_rows) < max_report:
+                reason = "négatif" if field.startswith("-") and field[1:].isdigit() else "illisible"
+                invalid_rows.append({"offset": offset, "value": field, "reason": reason})
+
+        n = len(values)
+        if n == 0:
+            continue
+        total += n
+
+        if isinstance(values, np.ndarray):
+            ok = admissible_mask(values, level, kind)
+            histogram += np.bincount(values % np.uint64(hist_modulus), minlength=hist_modulus)
+        else:
+            # Valeurs ≥ 2^64 : repli scalaire
+            ok = np.array([is_admissible(v, level, kind) for v in values], dtype=bool)
+            for v in values:
+                histogram[v % hist_modulus] += 1
+
+        bad = np.flatnonzero(~ok)
+        invalid_count += len(bad)
+        for i in bad[:max(0, max_report - len(invalid_rows))]:
+            invalid_rows.append({
+                "offset": int(offsets[i]),
+                "value": int(values[i]),
+                "reason": f"hors roue P_{level}",
+            })
+
+        if sample:
+            # Échantillonnage bottom-k : les `sample` plus petites clés
+            keys = rng.random(n)
+            idx = np.argpartition(keys, sample)[:sample] if n > sample else np.arange(n)
+            keys = np.concatenate([sample_keys, keys[idx]])
+            pool = sample_values + [int(values[i]) for i in idx]
+            pool_offsets = np.concatenate([sample_offsets, offsets[idx]])
+            keep = np.argsort(keys)[:sample]
+            sample_keys = keys[keep]
+            sample_values = [pool[i] for i in keep]
+            sample_offsets = pool_offsets[keep]
+
+    sample_failures = [
+        {"offset": int(o), "value": v}
+        for v, o in zip(sample_values, sample_offsets)
+        if not _is_member(v, kind)
+    ]
+
+    return {
+        "path": path,
+        "level": level,
+        "modulus": primorial(level),
+        "kind": kind,
+        "total": total,
+        "invalid_count": invalid_count,
+        "invalid_rows": invalid_rows,
+        "histogram_modulus": hist_modulus,
+        "histogram": histogram,
+        "sample_size": len(sample_values),
+        "sample_failures": sample_failures,
+        "valid": invalid_count == 0 and not sample_failures,
+    }
+
+
+def print_report(report, top=10):
+    """Affiche un rapport de validate_file."""
+    print("\n" + "="*70)
+    print(f"VALIDATION EN FLUX : {report['path']}")
+    print("="*70)
+
+    total = report["total"]
+    print(f"\nÉléments lus         : {total:,}")
+    print(f"Roue                 : {report['kind']} mod {report['modulus']:,} (P_{report['level']})")
+    print(f"Éléments INVALIDES   : {report['invalid_count']:,}")
+
+    for row in report["invalid_rows"]:
+        print(f"  offset {row['offset']:>14,} : {row['value']} ({row['reason']})")
+    if report["invalid_count"] > len(report["invalid_rows"]):
+        print(f"  … {report['invalid_count'] - len(report['invalid_rows']):,} autres")
+
+    if report["sample_size"]:
+        failures = report["sample_failures"]
+        print(f"\nÉchantillon re-vérifié : {report['sample_size']:,} "
+              f"({len(failures)} échec(s))")
+        for row in failures:
+            print(f"  offset {row['offset']:>14,} : {row['value']} non premier")
+
+    histogram = report["histogram"]
+    observed = np.flatnonzero(histogram)
+    if len(observed):
+        counts = histogram[observed]
+        print(f"\nRésidus distincts mod {report['histogram_modulus']:,} : {len(observed):,}")
+        print(f"  Moyenne : {counts.mean():.2f}   Min : {counts.min()}   Max : {counts.max()}")
+        print(f"\nTop {top} résidus les plus fréquents :")
+        for i in np.argsort(-counts, kind="stable")[:top]:
+            print(f"  r = {int(observed[i]):6d} : {int(counts[i]):,}")
+
+    if report["valid"]:
+        print(f"\n✅ SUCCÈS : 100% des éléments dans la roue P_{report['level']}")
+    else:
+        print("\n❌ ERREUR : éléments invalides détectés")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validation en flux de safe primes")
+    parser.add_argument("path")
+    parser.add_argument("--level", type=int, default=5)
+    parser.add_argument("--kind", choices=("safe", "sg"), default="safe")
+    parser.add_argument("--sample", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    report = validate_file(args.path, args.level, args.kind, args.chunk_size,
+                           args.sample, args.seed)
+    print_report(report)
+    raise SystemExit(0 if report["valid"] else 1)
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+import async_safe_primes
+from async_safe_primes import safe_primes_from
+from generate_safe_primes_validator import is_safe_prime
+from safe_prime_pipeline import WHEEL_MODULUS
+
+
+@pytest.fixture(autouse=True)
+def pool():
+    async_safe_primes.configure(max_workers=1)
+    yield
+    async_safe_primes.shutdown()
+
+
+def take(start, count, **kwargs):
+    async def run():
+        found = []
+        stream = safe_primes_from(start, block_turns=2, prefetch=2, **kwargs)
+        async for p in stream:
+            found.append(p)
+            if len(found) == count:
+                break
+        await stream.aclose()
+        return found
+    return asyncio.run(run())
+
+
+def brute_force(start, count):
+    found, n = [], start
+    while len(found) < count:
+        if is_safe_prime(n):
+            found.append(n)
+        n += 1
+    return found
+
+
+def test_small_start_includes_small_safe_primes():
+    assert take(0, 12) == brute_force(0, 12)
+    assert take(0, 4) == [5, 7, 11, 23]
+    assert take(8, 3) == [11, 23, 47]
+
+
+def test_start_in_middle_of_wheel_turn():
+    start = 7 * WHEEL_MODULUS + 1000
+    found = take(start, 15)
+    assert found == brute_force(start, 15)
+    assert found == sorted(set(found))
+
+
+def test_aclose_cancels_blocks_in_flight():
+    async def run():
+        stream = safe_primes_from(10**12, block_turns=2, prefetch=3)
+        first = await stream.__anext__()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await stream.aclose()
+        await asyncio.sleep(0)
+        return first, tasks
+
+    first, tasks = asyncio.run(run())
+    assert is_safe_prime(first)
+    assert tasks and all(t.done() for t in tasks)
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+import bigint
+from bigint import BACKENDS, PythonBackend, backend_name, set_backend
+
+
+@pytest.fixture
+def restore_backend():
+    previous = bigint._backend.name
+    yield
+    set_backend(previous)
+
+
+def test_set_backend(restore_backend):
+    set_backend("python")
+    assert backend_name() == "python"
+    assert bigint.powmod(3, 200, 1009) == pow(3, 200, 1009)
+    with pytest.raises(ValueError, match="indisponible"):
+        set_backend("openssl")
+    assert backend_name() == "python"
+
+
+def test_environment_selects_backend(monkeypatch):
+    monkeypatch.setenv("SG_BIGINT_BACKEND", "python")
+    assert bigint._default_backend() is PythonBackend
+    monkeypatch.setenv("SG_BIGINT_BACKEND", "openssl")
+    with pytest.raises(ValueError):
+        bigint._default_backend()
+    monkeypatch.delenv("SG_BIGINT_BACKEND")
+    assert bigint._default_backend() is BACKENDS.get("gmpy2", PythonBackend)
+
+
+def test_python_strong_prp():
+    primes = {n for n in range(5, 5000, 2) if all(n % d for d in range(3, int(n**0.5) + 1, 2))}
+    for n in range(5, 5000, 2):
+        assert PythonBackend.strong_prp(n, 2) or n not in primes
+    # 2047 = 23·89 : pseudo-premier fort en base 2, pas en base 3
+    assert PythonBackend.strong_prp(2047, 2) and not PythonBackend.strong_prp(2047, 3)
+    assert PythonBackend.invert(3, 7) == 5
+    with pytest.raises(ValueError):
+        PythonBackend.invert(6, 9)
+
+
+def test_gmpy_agrees_with_python():
+    pytest.importorskip("gmpy2")
+    gmpy = BACKENDS["gmpy2"]
+    rng = random.Random(0)
+    for bits in (16, 64, 256, 1024):
+        for _ in range(20):
+            n = rng.getrandbits(bits) | 1 | (1 << (bits - 1))
+            a = rng.randrange(2, n - 1)
+            assert gmpy.powmod(a, n - 1, n) == PythonBackend.powmod(a, n - 1, n)
+            assert gmpy.strong_prp(n, a) == PythonBackend.strong_prp(n, a)
+    for n in (561, 1105, 2047, 3215031751, 2**61 - 1, 2**89 - 1):
+        for a in (2, 3, 5, 7):
+            assert gmpy.strong_prp(n, a) == PythonBackend.strong_prp(n, a)
+    assert gmpy.invert(3, 7) == 5
+    with pytest.raises(ValueError):
+        gmpy.invert(6, 9)
@@ -0,0 +1,45 @@
+from catalog import Catalog, default_catalog
+from residue_tables import default_provider
+
+
+def test_cached_recomputes_when_fingerprint_changes(tmp_path):
+    catalog = Catalog(str(tmp_path / "catalog.sqlite"))
+    assert catalog.cached("eps", "sg", 30, lambda: {"v": 1}, fingerprint="a") == {"v": 1}
+    assert catalog.cached("eps", "sg", 30, lambda: {"v": 2}, fingerprint="a") == {"v": 1}
+    assert catalog.cached("eps", "sg", 30, lambda: {"v": 3}, fingerprint="b") == {"v": 3}
+    assert catalog.analysis("eps", "sg", 30, fingerprint="a") is None
+    assert catalog.analysis("eps", "sg", 30) == {"v": 3}
+
+
+def test_defaults_follow_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("SG_RESIDUE_CACHE", str(tmp_path / "residues"))
+    monkeypatch.setenv("SG_CATALOG", str(tmp_path / "catalog.sqlite"))
+    assert default_provider.cache_dir == str(tmp_path / "residues")
+    assert default_catalog().path == str(tmp_path / "catalog.sqlite")
+    assert (tmp_path / "catalog.sqlite").exists()
+
+
+def test_changed_table_misses_cache(tmp_path):
+    from array import array
+
+    from fingerprint import fingerprint, level_fingerprint, write_metadata
+    from residue_tables import ResidueTableProvider, primorial
+
+    provider = ResidueTableProvider(cache_dir=str(tmp_path), persist_min=0)
+    catalog = Catalog(str(tmp_path / "catalog.sqlite"))
+    key = level_fingerprint("sg", 5, provider)
+    assert catalog.cached("eps", "sg", 2310, lambda: 1, fingerprint=key) == 1
+    assert catalog.cached("eps", "sg", 2310, lambda: 2, fingerprint=key) == 1
+
+    # Table régénérée différemment (même effectif, autre contenu)
+    table = array("Q", provider.get("sg", 5))
+    table[0] += 1
+    path = provider.cache_path("sg", primorial(5))
+    with open(path, "wb") as f:
+        table.tofile(f)
+    write_metadata(path, "sg", primorial(5), fingerprint(table))
+    provider.clear()
+
+    changed = level_fingerprint("sg", 5, provider)
+    assert changed != key
+    assert catalog.cached("eps", "sg", 2310, lambda: 3, fingerprint=changed) == 3
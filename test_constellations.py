@@ -0,0 +1,51 @@
+import pytest
+
+from constellations import (CONSTELLATIONS, SAFE, SOPHIE_GERMAIN, TRIPLETS, TWINS,
+                            Constellation, cunningham_chain, get)
+from residue_tables import PRIMES, build_residue_table, forbidden_residues, primorial
+
+
+def _brute_forbidden(constellation, q):
+    return tuple(r for r in range(q)
+                 if any(d % q and (a * r + b) % q == 0 for a, b, d in constellation.forms))
+
+
+@pytest.mark.parametrize("name", list(CONSTELLATIONS) + ["cunningham3", "cunningham5"])
+def test_forbidden_slots_and_counts(name):
+    constellation = get(name)
+    for q in PRIMES[:8]:
+        assert constellation.forbidden(q) == _brute_forbidden(constellation, q)
+    wheel = constellation.wheel(4)
+    assert len(wheel) == constellation.count(4)
+    assert wheel.tolist() == [r for r in range(primorial(4))
+                              if all(r % q not in constellation.forbidden(q) for q in PRIMES[:4])]
+
+
+@pytest.mark.parametrize("constellation, kind", [(SOPHIE_GERMAIN, "sg"), (SAFE, "safe")])
+def test_matches_hand_coded_tables(constellation, kind):
+    for q in PRIMES[:8]:
+        assert constellation.forbidden(q) == forbidden_residues(kind, q)
+    assert constellation.wheel(6).tobytes() == build_residue_table(kind, 6).tobytes()
+
+
+def test_collisions_and_blocking():
+    # Triplets r, r+2, r+6 : mod 3, r+6 ≡ r (collision)
+    assert TRIPLETS.forbidden(3) == (0, 1)
+    assert TRIPLETS.collisions(3) == 1
+    assert TWINS.blocked_by() == []
+    blocked = Constellation("blocked", [(1, 0), (1, 2), (1, 4)])
+    assert blocked.blocked_by() == [3]
+    assert blocked.count(4) == 0
+    assert cunningham_chain(2).forms == SOPHIE_GERMAIN.forms
+
+
+def test_twin_primes_fall_in_the_wheel():
+    allowed = set(TWINS.wheel(4).tolist())
+    primes = [n for n in range(11, 20_000) if all(n % d for d in range(2, int(n**0.5) + 1))]
+    prime_set = set(primes)
+    assert all(p % 210 in allowed for p in primes if p + 2 in prime_set)
+
+
+def test_unknown_name():
+    with pytest.raises(ValueError, match="inconnue"):
+        get("quadruplets")
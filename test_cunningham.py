@@ -0,0 +1,47 @@
+import pytest
+
+from cunningham import (chain_count, chain_element, chain_forbidden, chain_wheel,
+                        search_chains)
+from residue_tables import PRIMES, build_residue_table, primorial
+
+
+def _is_prime(n):
+    if n < 2:
+        return False
+    d = 2
+    while d * d <= n:
+        if n % d == 0:
+            return False
+        d += 1
+    return True
+
+
+@pytest.mark.parametrize("length", [2, 3, 4, 5])
+def test_forbidden_slots_and_counts(length):
+    for q in PRIMES[:8]:
+        expected = tuple(r for r in range(q)
+                         if any(chain_element(r, i) % q == 0 for i in range(length)))
+        assert chain_forbidden(q, length) == expected
+    wheel = chain_wheel(length, 4)
+    assert len(wheel) == chain_count(length, 4)
+    assert wheel.tolist() == [r for r in range(primorial(4))
+                              if all(r % q not in chain_forbidden(q, length) for q in PRIMES[:4])]
+
+
+def test_length_two_wheel_is_sophie_germain():
+    assert chain_wheel(2, 6).tobytes() == build_residue_table("sg", 6).tobytes()
+
+
+@pytest.mark.parametrize("length", [2, 3, 4])
+def test_search_matches_brute_force(length):
+    stop = 30_000
+    expected = []
+    for p in range(stop):
+        n = 0
+        while _is_prime(chain_element(p, n)):
+            n += 1
+        if n >= length:
+            expected.append((p, n))
+    stats = {}
+    assert search_chains(0, stop, length, level=5, block=4096, stats=stats) == expected
+    assert stats["sieved"] <= stats["candidates"]
@@ -0,0 +1,30 @@
+import random
+
+from density_estimator import ScanSampler, TableSampler, estimate_count
+
+
+def test_empty_admissible_range_is_exact_zero():
+    report = estimate_count(24, 28, level=5)
+    assert report["admissible"] == 0
+    assert report["samples"] == 0
+    assert report["estimate"] == 0
+
+
+def test_scan_count_matches_table_rank():
+    for a, b, level in [(10**6, 2 * 10**6, 5), (123_457, 173_457, 8)]:
+        scan = ScanSampler(a, b, level, "safe", random.Random(0))
+        table = TableSampler(a, b, level, "safe", random.Random(0))
+        assert scan.admissible == table.admissible
+
+
+def test_narrow_interval_at_high_level_terminates():
+    report = estimate_count(10**15, 10**15 + 10**5, level=14, max_samples=2000, seed=1)
+    assert report["sampler"] == "scan"
+    assert report["admissible_exact"]
+    assert report["samples"] == 2000
+
+
+def test_crt_sampler_stays_in_interval():
+    report = estimate_count(10**6, 10**7, level=8, sampler="crt", seed=1, rel_error=0.1)
+    low, high = report["interval"]
+    assert low <= 26_333 <= high
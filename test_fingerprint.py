@@ -0,0 +1,42 @@
+import numpy as np
+
+from fingerprint import EMPTY, fingerprint, fingerprint_file, verify_file
+from residue_tables import ResidueTableProvider, build_residue_table, primorial
+
+
+def test_fingerprint_is_order_independent_and_additive():
+    values = np.frombuffer(build_residue_table("sg", 6), dtype=np.uint64)
+    shuffled = np.random.default_rng(0).permutation(values)
+    assert fingerprint(shuffled) == fingerprint(values)
+    assert fingerprint(values[:100]) + fingerprint(values[100:]) == fingerprint(values)
+    assert fingerprint(values.tolist()) == fingerprint(values)
+    assert fingerprint([]) == EMPTY
+
+
+def test_corrupted_cache_is_rejected(tmp_path):
+    provider = ResidueTableProvider(cache_dir=str(tmp_path), persist_min=0)
+    expected = np.frombuffer(build_residue_table("sg", 6), dtype=np.uint64)
+    provider.get("sg", 6)
+    path = provider.cache_path("sg", primorial(6))
+    assert verify_file(path)[0]
+
+    # Même taille, un résidu modifié : seule l'empreinte le détecte
+    corrupted = expected.copy()
+    corrupted[10] += 2
+    corrupted.tofile(path)
+    ok, stored, actual = verify_file(path)
+    assert not ok and actual == fingerprint_file(path) != stored
+
+    provider.clear()
+    assert provider._load("sg", 6) is None
+    assert np.array_equal(np.frombuffer(provider.get("sg", 6), dtype=np.uint64), expected)
+
+
+def test_truncated_cache_is_rejected(tmp_path):
+    provider = ResidueTableProvider(cache_dir=str(tmp_path), persist_min=0)
+    provider.get("safe", 6)
+    path = provider.cache_path("safe", primorial(6))
+    with open(path, "r+b") as f:
+        f.truncate(8 * 10)
+    provider.clear()
+    assert provider._load("safe", 6) is None
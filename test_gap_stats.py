@@ -0,0 +1,44 @@
+import pytest
+
+from gap_stats import GapStats
+from generate_safe_primes_validator import is_safe_prime
+
+SAFE_PRIMES = [p for p in range(5, 100_000) if is_safe_prime(p)]
+
+
+def _assert_same(a, b):
+    assert (a.first, a.last, a.count) == (b.first, b.last, b.count)
+    assert (a.min_gap, a.max_gap) == (b.min_gap, b.max_gap)
+    assert a.histogram == b.histogram
+    assert a.records == b.records
+    assert a.mean == pytest.approx(b.mean)
+    assert a.m2 == pytest.approx(b.m2)
+
+
+def test_merge_matches_single_pass():
+    single = GapStats().update(SAFE_PRIMES)
+    cuts = [0, 97, 400, 401, len(SAFE_PRIMES)]
+    shards = [GapStats().update(SAFE_PRIMES[a:b]) for a, b in zip(cuts, cuts[1:])]
+
+    forward = GapStats()
+    for shard in shards:
+        forward.merge(shard)
+    _assert_same(forward, single)
+
+    backward = GapStats()
+    for shard in reversed(shards):
+        backward.merge(shard)
+    _assert_same(backward, single)
+
+
+def test_chunked_updates_match_single_pass():
+    chunked = GapStats()
+    for i in range(0, len(SAFE_PRIMES), 123):
+        chunked.update(SAFE_PRIMES[i:i + 123])
+    _assert_same(chunked, GapStats().update(SAFE_PRIMES))
+
+
+def test_overlapping_merge_rejected():
+    a = GapStats().update(SAFE_PRIMES[:100])
+    with pytest.raises(ValueError):
+        a.merge(GapStats().update(SAFE_PRIMES[50:150]))
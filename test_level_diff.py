@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from level_diff import diff_levels
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 13, 1000])
+def test_diff_matches_setdiff(chunk_size):
+    rng = np.random.default_rng(chunk_size)
+    a = np.unique(rng.integers(0, 30_000, 3000, dtype=np.uint64))
+    b = np.unique(np.concatenate([a[::3], rng.integers(0, 30_000, 1500, dtype=np.uint64)]))
+    report = diff_levels(a, b, class_level=3, first=5, chunk_size=chunk_size)
+
+    only_a, only_b = np.setdiff1d(a, b), np.setdiff1d(b, a)
+    assert (report["count_a"], report["count_b"]) == (len(a), len(b))
+    assert report["common"] == len(np.intersect1d(a, b))
+    assert (report["only_a"], report["only_b"]) == (len(only_a), len(only_b))
+    assert report["first_a"] == only_a[:5].tolist()
+    assert report["first_b"] == only_b[:5].tolist()
+    classes = np.bincount(only_a % np.uint64(30), minlength=30)
+    assert report["classes_a"] == {r: int(c) for r, c in enumerate(classes) if c}
+    assert not report["identical"]
+
+
+def test_identical_and_empty_sides():
+    a = np.arange(1, 500, 2, dtype=np.uint64)
+    assert diff_levels(a, a.copy(), chunk_size=11)["identical"]
+    report = diff_levels(a, np.empty(0, dtype=np.uint64), chunk_size=11)
+    assert (report["only_a"], report["only_b"], report["common"]) == (len(a), 0, 0)
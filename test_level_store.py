@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from level_store import BlockLevel, write_level
+from residue_tables import default_provider, primorial
+
+
+@pytest.fixture(scope="module")
+def level(tmp_path_factory):
+    values = np.frombuffer(default_provider.get("safe", 7), dtype=np.uint64)
+    path = str(tmp_path_factory.mktemp("blk") / "safe_7.blk")
+    assert write_level(values, path, "safe", primorial(7), block_size=64) == len(values)
+    with BlockLevel(path, cache_blocks=8) as blocks:
+        yield values, blocks
+
+
+def test_decoded_level_matches_source(level):
+    values, blocks = level
+    assert len(blocks) == len(values)
+    assert np.array_equal(blocks.values(), values)
+
+
+def test_point_queries(level):
+    values, blocks = level
+    rng = np.random.default_rng(0)
+    queries = rng.integers(0, primorial(7), 2000, dtype=np.uint64)
+    expected = np.isin(queries, values)
+    assert np.array_equal(blocks.contains_many(queries), expected)
+    members = set(values.tolist())
+    for r in queries[:200].tolist() + values[:50].tolist():
+        assert (r in blocks) == (r in members)
+        assert blocks.rank(r) == int(np.searchsorted(values, np.uint64(r)))
+    for k in (0, 1, 63, 64, len(values) - 1, -1):
+        assert blocks[k] == int(values[k])
+
+
+def test_range(level):
+    values, blocks = level
+    lo, hi = 1000, 200_000
+    assert np.array_equal(blocks.range(lo, hi), values[(values >= lo) & (values < hi)])
+    assert np.array_equal(blocks.range(-5, 100), values[values < 100])
+    for lo, hi in ((hi, lo), (lo, lo), (0, 0), (-10, 0), (primorial(7), primorial(7) + 50)):
+        assert blocks.range(lo, hi).tolist() == []
+
+
+def test_contains_many_out_of_range(level):
+    values, blocks = level
+    r = int(values[0])
+    queries = [r, -1, -r, r + primorial(7), 2**64 - 1, 2**70]
+    assert blocks.contains_many(queries).tolist() == [True] + [False] * 5
+    assert blocks.contains_many(np.array([r + primorial(7), r], dtype=np.uint64)).tolist() == [False, True]
+    assert blocks.contains_many(np.array([-r, r], dtype=np.int64)).tolist() == [False, True]
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from constellations import Constellation
+from lifting import lift_chunks, lift_levels, lift_multi, lift_sorted_chunks
+from residue_tables import PRIMES, build_residue_table, forbidden_residues, lift_table, primorial
+
+
+def _scalar_level(kind, level):
+    """Relèvement pur Python, premier par premier, depuis le niveau 1."""
+    table, modulus = [r for r in range(2) if r not in forbidden_residues(kind, 2)], 2
+    for p in PRIMES[1:level]:
+        table = lift_table(table, modulus, p, kind)
+        modulus *= p
+    return list(table)
+
+
+@pytest.mark.parametrize("kind", ["sg", "safe"])
+def test_lift_multi_matches_scalar_lift(kind):
+    base = np.array(_scalar_level(kind, 3), dtype=np.uint64)
+    expected = _scalar_level(kind, 7)
+    assert lift_multi(base, primorial(3), PRIMES[3:7], kind, ordered=True).tolist() == expected
+    assert sorted(lift_multi(base, primorial(3), PRIMES[3:7], kind).tolist()) == expected
+
+
+@pytest.mark.parametrize("kind", ["sg", "safe"])
+def test_lift_levels_matches_build_residue_table(kind):
+    base = np.frombuffer(build_residue_table(kind, 4), dtype=np.uint64)
+    lifted = lift_levels(base, 4, 8, kind, ordered=True)
+    assert np.array_equal(lifted, np.frombuffer(build_residue_table(kind, 8), dtype=np.uint64))
+
+
+@pytest.mark.parametrize("kind", ["sg", "safe"])
+def test_sorted_chunks_are_increasing(kind):
+    base = np.frombuffer(build_residue_table(kind, 4), dtype=np.uint64)
+    chunks = list(lift_sorted_chunks(base, primorial(4), PRIMES[4:7], kind, chunk_output=1000))
+    lifted = np.concatenate(chunks)
+    assert np.all(np.diff(lifted.astype(np.int64)) > 0)
+    assert np.array_equal(lifted, np.frombuffer(build_residue_table(kind, 7), dtype=np.uint64))
+
+
+def test_blocked_constellation_lifts_to_nothing():
+    # r, r+2, r+4 : un des trois est toujours divisible par 3
+    blocked = Constellation("blocked", [(1, 0), (1, 2), (1, 4)])
+    base = np.array([1], dtype=np.uint64)
+    assert list(lift_chunks(base, 2, (3, 5), blocked)) == []
+    assert list(lift_sorted_chunks(base, 2, (3, 5), blocked)) == []
+    assert lift_multi(base, 2, (3,), blocked, ordered=True).tolist() == []
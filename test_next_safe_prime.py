@@ -0,0 +1,36 @@
+import random
+from bisect import bisect_left
+
+import pytest
+
+from generate_safe_primes_validator import is_safe_prime
+from next_safe_prime import is_safe_prime_64, next_safe_prime
+from yield_tables import safe_primes_in
+
+SAFE_PRIMES = safe_primes_in(0, 200_000).tolist()
+
+
+def test_matches_sieve_below_limit():
+    for n in range(0, 190_000, 7):
+        assert next_safe_prime(n) == SAFE_PRIMES[bisect_left(SAFE_PRIMES, n)]
+
+
+@pytest.mark.parametrize("bits", [20, 32, 48, 63, 64])
+def test_no_safe_prime_skipped(bits):
+    rng = random.Random(bits)
+    for _ in range(5):
+        n = rng.getrandbits(bits) | (1 << (bits - 1))
+        p = next_safe_prime(n)
+        assert is_safe_prime(p)
+        assert not any(is_safe_prime(m) for m in range(n, p))
+
+
+def test_is_safe_prime_64_matches_sieve():
+    lo = 2**40
+    found = [p for p in range(lo, lo + 100_000) if is_safe_prime_64(p)]
+    assert found == safe_primes_in(lo, lo + 100_000).tolist()
+
+
+def test_rejects_inputs_above_64_bits():
+    with pytest.raises(ValueError):
+        next_safe_prime(2**64)
@@ -0,0 +1,25 @@
+import pytest
+
+from catalog import Catalog
+from planner import DEFAULT_THROUGHPUT, MAX_UNIFORMITY_LEVEL, _base_level, execute, plan
+
+BUDGET = {"memory": 2**34, "cores": 2, "disk": 2**40, "throughput": DEFAULT_THROUGHPUT}
+
+
+def test_uniformity_above_limit_is_count_only():
+    p = plan("uniformity", "safe", MAX_UNIFORMITY_LEVEL + 1, **BUDGET)
+    assert p["strategy"] == "count-only"
+    assert execute(p)["count_only"]
+
+
+def test_uniformity_plan_executes(tmp_path):
+    p = plan("uniformity", "safe", 7, **BUDGET)
+    assert p["strategy"] != "count-only"
+    assert execute(p, catalog=Catalog(str(tmp_path / "catalog.sqlite")))["uniform"]
+
+
+def test_low_levels():
+    assert _base_level(1) == 1
+    with pytest.raises(ValueError):
+        plan("lift", "safe", 1, **BUDGET)
+    assert plan("count", "safe", 1, **BUDGET)["strategy"] == "count-only"
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from projection_check import check_files
+from residue_tables import default_provider, primorial
+
+
+def _write(path, kind, level):
+    np.frombuffer(default_provider.get(kind, level), dtype=np.uint64).tofile(path)
+    return str(path)
+
+
+def test_consistent_levels(tmp_path):
+    child = _write(tmp_path / "child.u64", "sg", 6)
+    parent = _write(tmp_path / "parent.u64", "sg", 5)
+    report = check_files(child, parent, primorial(6), primorial(5), "sg", workers=1)
+    assert report["consistent"]
+
+
+def test_truncated_child_is_reported(tmp_path):
+    parent = _write(tmp_path / "parent.u64", "sg", 5)
+    values = np.frombuffer(default_provider.get("sg", 6), dtype=np.uint64)
+    child = tmp_path / "child.u64"
+    values[:-10].tofile(child)
+    report = check_files(str(child), parent, primorial(6), primorial(5), "sg", workers=1)
+    assert not report["consistent"]
+    assert report["child_count"] == len(values) - 10
+
+
+def test_empty_file_is_reported(tmp_path):
+    child, parent = tmp_path / "child.u64", tmp_path / "parent.u64"
+    child.write_bytes(b"")
+    parent.write_bytes(b"")
+    report = check_files(str(child), str(parent), primorial(6), primorial(5), "sg", workers=1)
+    assert not report["consistent"]
+    assert len(report["errors"]) == 2
+
+
+def test_unsorted_parent_is_rejected(tmp_path):
+    child = _write(tmp_path / "child.u64", "sg", 6)
+    values = np.frombuffer(default_provider.get("sg", 5), dtype=np.uint64).copy()
+    values[[3, 4]] = values[[4, 3]]
+    parent = tmp_path / "parent.u64"
+    values.tofile(parent)
+    report = check_files(child, str(parent), primorial(6), primorial(5), "sg", workers=1)
+    assert not report["consistent"]
+    assert any("non trié" in e for e in report["errors"])
+    assert report["accounted_children"] == 0  # Passe 2 non lancée
+
+
+def test_out_of_range_child_is_reported(tmp_path):
+    parent = _write(tmp_path / "parent.u64", "sg", 5)
+    values = np.frombuffer(default_provider.get("sg", 6), dtype=np.uint64).copy()
+    values[-1] = primorial(6) + 1
+    child = tmp_path / "child.u64"
+    values.tofile(child)
+    report = check_files(str(child), parent, primorial(6), primorial(5), "sg", workers=1)
+    assert not report["consistent"]
+    assert report["out_of_range"] == (1, [(len(values) - 1, primorial(6) + 1)])
+
+
+def test_partial_element_is_a_truncated_file(tmp_path):
+    parent = _write(tmp_path / "parent.u64", "sg", 5)
+    child = tmp_path / "child.u64"
+    child.write_bytes(np.frombuffer(default_provider.get("sg", 6), dtype=np.uint64).tobytes()[:-3])
+    with pytest.raises(ValueError, match="tronqué"):
+        check_files(str(child), parent, primorial(6), primorial(5), "sg", workers=1)
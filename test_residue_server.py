@@ -0,0 +1,18 @@
+import pytest
+
+from residue_server import LevelStores, MicroBatcher, _next_safe_prime, process_batch
+
+
+def test_next_safe_prime_small_values():
+    assert [_next_safe_prime(n) for n in (0, 6, 8, 12, 24)] == [5, 7, 11, 23, 47]
+    assert process_batch(None, "next_safe_prime", "safe", 5, [0, 24, 2**64]) == \
+        [5, 47, _next_safe_prime(2**64)]
+
+
+def test_bad_value_fails_only_its_request():
+    batcher = MicroBatcher(LevelStores(5), max_delay=0.05, workers=1)
+    good = batcher.submit("admissible", "safe", 5, [47, 48])
+    bad = batcher.submit("admissible", "safe", 5, [-1])
+    assert good.result(timeout=10) == [True, False]
+    with pytest.raises(OverflowError):
+        bad.result(timeout=10)
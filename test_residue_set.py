@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from residue_set import ResidueSet
+
+
+def test_contains_many_matches_in():
+    s = ResidueSet.from_level("sg", 5)
+    x = np.arange(3000)
+    assert s.contains_many(x).tolist() == [int(i) in s for i in x]
+
+
+def test_contains_many_out_of_range():
+    s = ResidueSet.from_level("sg", 5)
+    r = int(s.values[0])
+    assert s.contains_many([r, r + 2**32, -1, 2**70]).tolist() == [True, False, False, False]
+    assert s.contains_many(np.array([r + 2**32, r], dtype=np.uint64)).tolist() == [False, True]
+
+
+def test_init_rejects_values_outside_modulus():
+    with pytest.raises(ValueError, match="hors de"):
+        ResidueSet(np.array([3, 2**32 + 5], dtype=np.uint64), 2310)
+    with pytest.raises(ValueError, match="-1"):
+        ResidueSet([5, -1], 2310)
+    with pytest.raises(ValueError):
+        ResidueSet({2**70}, 2310)
+    assert ResidueSet({7, 3}, 2310).values.tolist() == [3, 7]
+    assert ResidueSet([], 2310).values.tolist() == []
@@ -0,0 +1,25 @@
+import pytest
+
+from generate_safe_primes_validator import is_safe_prime
+from safe_prime_export import export_safe_primes
+from stream_validator import iter_prime_chunks
+
+SAFE_PRIMES = [p for p in range(5, 20_000) if is_safe_prime(p)]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "npy", "npz"])
+def test_export_round_trip(tmp_path, fmt):
+    path = str(tmp_path / f"safe.{fmt}")
+    assert export_safe_primes(iter(SAFE_PRIMES), path, batch_size=37) == len(SAFE_PRIMES)
+    values = [int(v) for _, chunk, _ in iter_prime_chunks(path, chunk_size=50) for v in chunk]
+    assert values == SAFE_PRIMES
+
+
+def test_main_refuses_to_overwrite(tmp_path):
+    from generate_safe_primes_validator import main
+
+    target = tmp_path / "safe_primes_generated.csv"
+    target.write_text("reference\n")
+    with pytest.raises(SystemExit, match="--force"):
+        main(str(target))
+    assert target.read_text() == "reference\n"
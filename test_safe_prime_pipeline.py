@@ -0,0 +1,22 @@
+import pytest
+
+import safe_prime_pipeline
+from generate_safe_primes_validator import generate_safe_primes_optimized
+from safe_prime_pipeline import generate_safe_primes_pipeline
+
+
+def test_pipeline_matches_sequential_search():
+    start = 10**12
+    expected, _ = generate_safe_primes_optimized(start, 30)
+    found, tested, stats = generate_safe_primes_pipeline(start, 30, workers=2)
+    assert found == expected
+    assert tested > 0
+
+
+def test_stage_failure_reaches_caller(monkeypatch):
+    def broken(candidates, level):
+        raise RuntimeError("crible")
+
+    monkeypatch.setattr(safe_prime_pipeline, "sieve_block", broken)
+    with pytest.raises(RuntimeError, match="crible"):
+        generate_safe_primes_pipeline(10**12, 10, workers=1)
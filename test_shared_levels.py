@@ -0,0 +1,38 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from residue_tables import default_provider, primorial
+from shared_levels import SharedLevel, chunk_ranges, pool_map, worker_level
+
+
+def _chunk_sum(bounds):
+    start, end = bounds
+    return int(worker_level(0)[start:end].sum(dtype=np.uint64))
+
+
+def test_pool_workers_see_level_and_segment_is_freed():
+    values = np.frombuffer(default_provider.get("sg", 6), dtype=np.uint64)
+    with SharedLevel(values, primorial(6)) as shared:
+        name = shared.handle.source
+        parts = pool_map(_chunk_sum, shared.handle, chunk_ranges(len(values), 5), processes=2)
+        assert sum(parts) == int(values.sum(dtype=np.uint64))
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_segment_is_freed_when_body_raises():
+    with pytest.raises(RuntimeError):
+        with SharedLevel([1, 5, 7], 30) as shared:
+            name = shared.handle.source
+            raise RuntimeError("échec du calcul")
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_chunk_ranges_cover_exactly():
+    for length, parts in ((0, 3), (1, 4), (10, 3), (1000, 7)):
+        ranges = chunk_ranges(length, parts)
+        assert [i for a, b in ranges for i in range(a, b)] == list(range(length))
+        assert len(ranges) <= max(parts, 1)
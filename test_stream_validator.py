@@ -0,0 +1,19 @@
+from stream_validator import validate_file
+
+
+def test_valid_csv(tmp_path):
+    path = tmp_path / "safe.csv"
+    path.write_text("SafePrime\n47\n59\n83\n107\n")
+    report = validate_file(str(path), sample=2, seed=0)
+    assert report["total"] == 4
+    assert report["valid"]
+
+
+def test_negative_and_unreadable_rows_are_reported(tmp_path):
+    path = tmp_path / "safe.csv"
+    path.write_text("SafePrime\n47\n-5\n59\nabc\n")
+    report = validate_file(str(path))
+    assert report["total"] == 2
+    assert report["invalid_count"] == 2
+    assert [row["reason"] for row in report["invalid_rows"]] == ["négatif", "illisible"]
+    assert not report["valid"]
@@ -0,0 +1,32 @@
+import os
+import time
+
+import pytest
+
+from generate_safe_primes_validator import is_safe_prime
+from work_queue import claim, plan_search, reduce_results, requeue_stale, run_worker
+
+
+@pytest.mark.parametrize("lo, hi, shards", [(100, 100, 4), (100, 50, 4), (0, 100, 0)])
+def test_plan_search_rejects_empty_jobs(tmp_path, lo, hi, shards):
+    with pytest.raises(ValueError):
+        plan_search(str(tmp_path), lo, hi, shards)
+
+
+def test_search_job_counts_safe_primes(tmp_path):
+    root = str(tmp_path)
+    plan_search(root, 0, 50_000, 3)
+    assert run_worker(root) == 3
+    report = reduce_results(root)
+    assert not report["missing"]
+    assert report["count"] == sum(is_safe_prime(p) for p in range(5, 50_000, 2))
+
+
+def test_requeue_only_stale_claims(tmp_path):
+    root = str(tmp_path)
+    plan_search(root, 0, 10_000, 2)
+    path, _ = claim(root, "w1")
+    assert requeue_stale(root, timeout=60) == []
+    past = time.time() - 120
+    os.utime(path, (past, past))
+    assert requeue_stale(root, timeout=60) == [os.path.basename(path).split(".json")[0] + ".json"]
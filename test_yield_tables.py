@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from generate_safe_primes_validator import is_safe_prime
+from yield_tables import YieldTable, safe_primes_in
+
+
+@pytest.mark.parametrize("lo, hi", [(0, 5000), (1, 2), (4, 12), (9_999, 30_011), (100_001, 100_002)])
+def test_safe_primes_in_matches_brute_force(lo, hi):
+    expected = [p for p in range(lo, hi) if is_safe_prime(p)]
+    assert safe_primes_in(lo, hi).tolist() == expected
+
+
+def _table(lo, hi):
+    table = YieldTable(4)
+    table.add(safe_primes_in(lo, hi))
+    table.intervals = [(lo, hi)]
+    return table
+
+
+def test_merge_rejects_overlaps():
+    table = _table(0, 10_000)
+    table.merge(_table(20_000, 30_000))
+    assert table.intervals == [(0, 10_000), (20_000, 30_000)]
+    with pytest.raises(ValueError, match="déjà comptés"):
+        table.merge(_table(9_000, 12_000))
+    table.merge(_table(10_000, 20_000))
+    assert table.intervals == [(0, 30_000)]
+    assert table.total + table.outside == len(safe_primes_in(0, 30_000))
+
+
+def test_missing_lists_gaps():
+    table = _table(100, 200).merge(_table(300, 400))
+    assert table.missing(0, 500) == [(0, 100), (200, 300), (400, 500)]
+    assert table.missing(150, 350) == [(200, 300)]
+    assert table.missing(120, 180) == []
+
+
+def test_save_load_round_trip(tmp_path):
+    table = _table(0, 50_000).merge(_table(60_000, 70_000))
+    path = str(tmp_path / "yield.npz")
+    table.save(path)
+    with np.load(path) as data:
+        assert data["intervals"].dtype == np.int64
+        assert data["intervals"].shape == (2, 2)
+    loaded = YieldTable.load(path)
+    assert loaded.intervals == table.intervals
+    assert np.array_equal(loaded.counts, table.counts)
+    assert (loaded.level, loaded.kind, loaded.outside) == (table.level, table.kind, table.outside)
+
+    YieldTable(4).save(path)
+    assert YieldTable.load(path).intervals == []
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+File de travail distribuée sur système de fichiers partagé
+==========================================================
+
+Le relèvement vers P_12 ou le comptage des safe primes jusqu'à 10^13 ne
+tiennent pas sur une seule machine. Ici aucun service n'est nécessaire :
+un répertoire partagé (NFS, SMB, disque local pour les tests) suffit.
+
+  <racine>/pending/   descripteurs de shards en attente (JSON)
+  <racine>/claimed/   shards pris par un worker (renommés atomiquement)
+  <racine>/done/      shards terminés
+  <racine>/results/   résultats (+ empreinte) de chaque shard
+
+Deux types de shards :
+
+  lift   : intervalle [i0, i1) d'indices du niveau de départ, relevé vers
+           le niveau final (lift_to_file, métadonnées + empreinte)
+  search : bloc [lo, hi) de la droite numérique, safe primes comptés et
+           listés (search_block de safe_prime_pipeline)
+
+Un worker prend un shard par os.rename(pending → claimed) : un seul
+renommage réussit. Pendant le calcul il rafraîchit le mtime du fichier
+réclamé ; un shard dont le mtime dépasse le délai est remis dans
+pending (worker perdu). Les mtimes sont comparés à l'heure du système de
+fichiers (mtime d'un fichier témoin touché), pas à l'horloge locale :
+un décalage d'horloge entre nœuds ne remet pas en file un shard vivant.
+Le réducteur fusionne les résultats (comptes, empreintes combinées) et
+vérifie la couverture complète.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+from fingerprint import EMPTY, Fingerprint, fingerprint, read_metadata, verify_file, write_metadata
+from residue_tables import PRIMES, default_provider, primorial, residue_count
+
+
+# ============================================================
+# CONSTANTES
+# ============================================================
+
+DIRS = ("pending", "claimed", "done", "results")
+
+# Délai au-delà duquel un shard réclamé sans signe de vie est remis en attente
+DEFAULT_TIMEOUT = 600.0
+
+# Attente entre deux tentatives quand pending est vide
+POLL_INTERVAL = 1.0
+
+# Tours de roue par appel à search_block dans un shard de recherche
+SEARCH_TURNS = 4096
+
+# Limite basse du crible par roue (les petits premiers sont testés un à un)
+SMALL_LIMIT = 2310
+
+
+# ============================================================
+# RÉPERTOIRE DE TRAVAIL
+# ============================================================
+
+def _paths(root):
+    return {d: os.path.join(root, d) for d in DIRS}
+
+
+def _write_json(path, data):
+    """Écriture atomique (fichier temporaire puis os.replace)."""
+    tmp = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def init_queue(root, job, shards):
+    """Crée le répertoire de travail et écrit les descripteurs de shards."""
+    paths = _paths(root)
+    for path in paths.values():
+        os.makedirs(path, exist_ok=True)
+    _write_json(os.path.join(root, "job.json"), {**job, "shards": len(shards)})
+    for i, shard in enumerate(shards):
+        _write_json(os.path.join(paths["pending"], f"shard_{i:06d}.json"), {"id": i, **shard})
+    return len(shards)
+
+
+def plan_lift(root, kind, from_level, to_level, shards):
+    """Job de relèvement : le niveau de départ découpé en `shards` intervalles."""
+    if shards < 1:
+        raise ValueError(f"Nombre de shards invalide : {shards}")
+    length = residue_count(kind, from_level)
+    step = -(-length // shards)
+    ranges = [{"type": "lift", "i0": i, "i1": min(i + step, length)}
+              for i in range(0, length, step)]
+    job = {"type": "lift", "kind": kind, "from_level": from_level, "to_level": to_level,
+           "expected": residue_count(kind, to_level)}
+    return init_queue(root, job, ranges)
+
+
+def plan_search(root, lo, hi, shards):
+    """Job de recherche : [lo, hi) découpé en blocs (multiples de 2310)."""
+    if hi <= lo:
+        raise ValueError(f"Intervalle vide : [{lo:,}, {hi:,})")
+    if shards < 1:
+        raise ValueError(f"Nombre de shards invalide : {shards}")
+    step = -(-(hi - lo) // shards)
+    step += -step % SMALL_LIMIT
+    blocks = [{"type": "search", "lo": a, "hi": min(a + step, hi)} for a in range(lo, hi, step)]
+    return init_queue(root, {"type": "search", "lo": lo, "hi": hi}, blocks)
+
+
+# ============================================================
+# RÉCLAMATION ET REMISE EN FILE
+# ============================================================
+
+def claim(root, worker_id):
+    """
+    Réclame un shard en attente ; retourne (chemin réclamé, descripteur) ou None.
+
+    os.rename est atomique sur un même système de fichiers : si deux
+    workers visent le même shard, un seul renommage réussit.
+    """
+    paths = _paths(root)
+    for name in sorted(os.listdir(paths["pending"])):
+        if not name.endswith(".json"):
+            continue
+        target = os.path.join(paths["claimed"], f"{name}.{worker_id}")
+        try:
+            os.rename(os.path.join(paths["pending"], name), target)
+        except (FileNotFoundError, PermissionError):
+            continue  # Pris par un autre worker
+        os.utime(target)
+        return target, _read_json(target)
+    return None
+
+
+def _filesystem_now(root):
+    """
+    Heure courante du système de fichiers partagé.
+
+    os.utime(path) sans date laisse le serveur (NFS) dater le fichier,
+    comme pour les battements de cœur : les deux mtimes viennent de la
+    même horloge, quel que soit le nœud qui compare.
+    """
+    path = os.path.join(root, ".clock")
+    with open(path, "a"):
+        pass
+    os.utime(path)
+    return os.path.getmtime(path)
+
+
+def requeue_stale(root, timeout=DEFAULT_TIMEOUT):
+    """Remet en attente les shards réclamés sans signe de vie depuis `timeout` s."""
+    paths = _paths(root)
+    now = _filesystem_now(root)
+    requeued = []
+    for name in os.listdir(paths["claimed"]):
+        path = os.path.join(paths["claimed"], name)
+        try:
+            if now - os.path.getmtime(path) < timeout:
+                continue
+            shard = name.split(".json", 1)[0] + ".json"
+            os.rename(path, os.path.join(paths["pending"], shard))
+            requeued.append(shard)
+        except FileNotFoundError:
+            continue  # Terminé ou remis entre-temps
+    return requeued
+
+
+class _Heartbeat(threading.Thread):
+    """Rafraîchit le mtime du shard réclamé pendant le calcul."""
+
+    def __init__(self, path, interval):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return  # Remis en file par un autre nœud
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+# ============================================================
+# EXÉCUTION DES SHARDS
+# ============================================================
+
+def _run_lift(root, job, shard):
+    from lifting import lift_to_file
+
+    kind, from_level, to_level = job["kind"], job["from_level"], job["to_level"]
+    base = np.frombuffer(default_provider.get(kind, from_level), dtype=np.uint64)
+    path = os.path.join(root, "results", f"shard_{shard['id']:06d}.u64")
+    tmp = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    lift_to_file(base[shard["i0"]:shard["i1"]], primorial(from_level),
+                 PRIMES[from_level:to_level], kind, tmp, catalog=False)
+    os.replace(tmp + ".json", path + ".json")
+    os.replace(tmp, path)
+    meta = read_metadata(path)
+    return {"count": meta["count"], "fingerprint": meta["key"], "file": os.path.basename(path)}
+
+
+def _run_search(root, job, shard):
+    from generate_safe_primes_validator import is_safe_prime
+    from safe_prime_pipeline import WHEEL_MODULUS, search_block
+
+    lo, hi = shard["lo"], shard["hi"]
+    found = [p for p in range(lo, min(hi, SMALL_LIMIT)) if is_safe_prime(p)]
+    start = max(lo, SMALL_LIMIT)
+    base = start - start % WHEEL_MODULUS
+    while base < hi:
+        turns = min(SEARCH_TURNS, -(-(hi - base) // WHEEL_MODULUS))
+        found.extend(p for p in search_block(base, turns, start=start) if p < hi)
+        base += turns * WHEEL_MODULUS
+
+    path = os.path.join(root, "results", f"shard_{shard['id']:06d}.primes.json")
+    _write_json(path, found)
+    fp = fingerprint(found)
+    return {"count": len(found), "fingerprint": fp.key, "file": os.path.basename(path)}
+
+
+RUNNERS = {"lift": _run_lift, "search": _run_search}
+
+
+def run_worker(root, worker_id=None, timeout=DEFAULT_TIMEOUT, max_shards=None, wait=False):
+    """
+    Boucle d'un worker : réclame, calcule, publie, jusqu'à épuisement.
+
+    Avec `wait`, le worker attend tant que des shards sont encore
+    réclamés ailleurs (pour reprendre ceux d'un nœud perdu).
+    Retourne le nombre de shards traités.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    paths = _paths(root)
+    job = _read_json(os.path.join(root, "job.json"))
+    processed = 0
+
+    while max_shards is None or processed < max_shards:
+        requeue_stale(root, timeout)
+        claimed = claim(root, worker_id)
+        if claimed is None:
+            if wait and os.listdir(paths["claimed"]):
+                time.sleep(POLL_INTERVAL)
+                continue
+            break
+
+        claimed_path, shard = claimed
+        heartbeat = _Heartbeat(claimed_path, max(0.1, timeout / 4))
+        heartbeat.start()
+        t0 = time.time()
+        try:
+            result = RUNNERS[shard["type"]](root, job, shard)
+        finally:
+            heartbeat.stop()
+
+        result.update(id=shard["id"], worker=worker_id, elapsed=time.time() - t0)
+        name = f"shard_{shard['id']:06d}.json"
+        _write_json(os.path.join(paths["results"], name), result)
+        try:
+            os.rename(claimed_path, os.path.join(paths["done"], name))
+        except FileNotFoundError:
+            # Remis en file pendant le calcul : le résultat (identique) est déjà publié
+            pass
+        processed += 1
+    return processed
+
+
+# ============================================================
+# SUIVI ET RÉDUCTION
+# ============================================================
+
+def status(root):
+    paths = _paths(root)
+    return {d: len([n for n in os.listdir(paths[d]) if not n.endswith(".tmp")])
+            for d in ("pending", "claimed", "done")}
+
+
+def reduce_results(root, verify=False):
+    """
+    Fusionne les résultats de tous les shards.
+
+    Les empreintes des shards s'additionnent en l'empreinte du niveau
+    complet. Avec `verify`, chaque fichier de résultat de relèvement est
+    relu et comparé à ses métadonnées.
+    """
+    job = _read_json(os.path.join(root, "job.json"))
+    results_dir = _paths(root)["results"]
+    results = {}
+    for name in os.listdir(results_dir):
+        if name.startswith("shard_") and name.endswith(".json") and name.count(".") == 1:
+            result = _read_json(os.path.join(results_dir, name))
+            results[result["id"]] = result
+
+    missing = sorted(set(range(job["shards"])) - set(results))
+    total = EMPTY
+    corrupt = []
+    for i, result in sorted(results.items()):
+        total = total + Fingerprint.from_key(result["fingerprint"])
+        if verify and job["type"] == "lift":
+            ok, _, _ = verify_file(os.path.join(results_dir, result["file"]))
+            if not ok:
+                corrupt.append(i)
+
+    report = {
+        "type": job["type"],
+        "shards": job["shards"],
+        "completed": len(results),
+        "missing": missing,
+        "corrupt": corrupt,
+        "count": total.count,
+        "fingerprint": total.key,
+        "worker_seconds": sum(r["elapsed"] for r in results.values()),
+    }
+    if job["type"] == "lift":
+        report["expected"] = job["expected"]
+        report["complete"] = not missing and not corrupt and total.count == job["expected"]
+    else:
+        report["complete"] = not missing
+    return report
+
+
+def collect_search_primes(root):
+    """Safe primes d'un job de recherche terminé, triés."""
+    results_dir = _paths(root)["results"]
+    primes = []
+    for name in sorted(os.listdir(results_dir)):
+        if name.endswith(".primes.json"):
+            primes.extend(_read_json(os.path.join(results_dir, name)))
+    return sorted(primes)
+
+
+def concatenate_lift(root, output):
+    """Assemble les fichiers des shards d'un relèvement en un seul .u64 (non trié)."""
+    job = _read_json(os.path.join(root, "job.json"))
+    results_dir = _paths(root)["results"]
+    with open(output, "wb") as out:
+        for i in range(job["shards"]):
+            with open(os.path.join(results_dir, f"shard_{i:06d}.u64"), "rb") as f:
+                while block := f.read(1 << 24):
+                    out.write(block)
+    report = reduce_results(root)
+    write_metadata(output, job["kind"], primorial(job["to_level"]),
+                   Fingerprint.from_key(report["fingerprint"]), ordered=False)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    from multiprocessing import Process
+
+    parser = argparse.ArgumentParser(description="File de travail sur répertoire partagé")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("plan-lift")
+    p.add_argument("root")
+    p.add_argument("--kind", choices=("sg", "safe"), default="sg")
+    p.add_argument("--from-level", type=int, default=8)
+    p.add_argument("--to-level", type=int, default=10)
+    p.add_argument("--shards", type=int, default=64)
+
+    p = sub.add_parser("plan-search")
+    p.add_argument("root")
+    p.add_argument("lo", type=int)
+    p.add_argument("hi", type=int)
+    p.add_argument("--shards", type=int, default=64)
+
+    p = sub.add_parser("worker")
+    p.add_argument("root")
+    p.add_argument("--processes", type=int, default=1)
+    p.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    p.add_argument("--wait", action="store_true")
+
+    for name in ("status", "requeue", "reduce"):
+        p = sub.add_parser(name)
+        p.add_argument("root")
+        p.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+        p.add_argument("--verify", action="store_true")
+        p.add_argument("--output")
+
+    args = parser.parse_args()
+
+    if args.command == "plan-lift":
+        n = plan_lift(args.root, args.kind, args.from_level, args.to_level, args.shards)
+        print(f"✓ {n} shards de relèvement écrits dans {args.root}")
+    elif args.command == "plan-search":
+        n = plan_search(args.root, args.lo, args.hi, args.shards)
+        print(f"✓ {n} shards de recherche écrits dans {args.root}")
+    elif args.command == "worker":
+        t0 = time.time()
+        workers = [Process(target=run_worker, args=(args.root, None, args.timeout, None, args.wait))
+                   for _ in range(args.processes)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        print(f"✓ Workers terminés en {time.time() - t0:.1f}s : {status(args.root)}")
+    elif args.command == "status":
+        print(status(args.root))
+    elif args.command == "requeue":
+        print(f"✓ Remis en attente : {requeue_stale(args.root, args.timeout)}")
+    else:
+        if args.output:
+            report = concatenate_lift(args.root, args.output)
+        else:
+            report = reduce_results(args.root, args.verify)
+        for key, value in report.items():
+            number = isinstance(value, int) and not isinstance(value, bool)
+            print(f"  {key:<15} : {value:,}" if number else f"  {key:<15} : {value}")
+        raise SystemExit(0 if report["complete"] else 1)